@@ -0,0 +1,4 @@
+import time
+
+# imported first by service.py, so its IMPORT_SECONDS covers the imports that follow
+IMPORT_T0 = time.perf_counter()
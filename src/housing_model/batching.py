@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List
+
+import numpy as np
+
+from .schema import ValidatedBatch, concat_batches
+
+logger = logging.getLogger(__name__)
+
+# histogram buckets for "requests per dispatched batch"
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+@dataclass
+class _Job:
+    predictor: Any
+    batch: ValidatedBatch
+    enqueued: float
+    future: Future = field(default_factory=Future)
+
+
+class MicroBatcher:
+    """Coalesces concurrent /predict calls into one ``Predictor.score`` call.
+
+    A single worker thread takes the oldest queued job plus every job already waiting
+    for the same predictor. It only holds the batch open (up to ``max_wait_ms`` or
+    ``max_batch_rows``) when recent batches show real concurrency, so a lone client
+    is never delayed by the wait window.
+    """
+
+    def __init__(self, max_batch_rows: int = 512, max_wait_ms: float = 2.0):
+        self.max_batch_rows = int(max_batch_rows)
+        self.max_wait = float(max_wait_ms) / 1000.0
+
+        self._jobs: Deque[_Job] = deque()
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread: threading.Thread | None = None
+        self._concurrency = 1.0  # EWMA of requests per dispatched batch
+
+        self._batches = 0
+        self._requests = 0
+        self._rows = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._size_hist = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+
+    def start(self) -> None:
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._loop, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def submit(self, predictor: Any, batch: ValidatedBatch) -> np.ndarray:
+        """Block until this batch has been scored (possibly together with others)."""
+        job = _Job(predictor=predictor, batch=batch, enqueued=time.perf_counter())
+        with self._cond:
+            if not self._running:
+                raise RuntimeError("MicroBatcher is not running")
+            self._jobs.append(job)
+            self._cond.notify()
+        return job.future.result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            hist = {f"le_{b}": n for b, n in zip(BATCH_SIZE_BUCKETS, self._size_hist)}
+            hist[f"gt_{BATCH_SIZE_BUCKETS[-1]}"] = self._size_hist[-1]
+            return {
+                "queue_depth": len(self._jobs),
+                "batches": self._batches,
+                "requests": self._requests,
+                "rows": self._rows,
+                "mean_requests_per_batch": self._requests / self._batches if self._batches else 0.0,
+                "wait_ms_mean": 1000.0 * self._wait_total / self._requests if self._requests else 0.0,
+                "wait_ms_max": 1000.0 * self._wait_max,
+                "batch_size_histogram": hist,
+            }
+
+    def _take(self) -> List[_Job]:
+        # caller holds self._cond and the queue is not empty
+        first = self._jobs.popleft()
+        jobs, rows = [first], len(first.batch)
+        deadline = first.enqueued + self.max_wait
+
+        while rows < self.max_batch_rows:
+            nxt = next((j for j in self._jobs if j.predictor is first.predictor), None)
+            if nxt is not None:
+                if rows + len(nxt.batch) > self.max_batch_rows:
+                    break
+                self._jobs.remove(nxt)
+                jobs.append(nxt)
+                rows += len(nxt.batch)
+                continue
+
+            # nothing else queued: only wait if other callers are likely on their way
+            remaining = deadline - time.perf_counter()
+            if self._concurrency < 1.5 or remaining <= 0 or not self._running:
+                break
+            self._cond.wait(timeout=remaining)
+        return jobs
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while self._running and not self._jobs:
+                    self._cond.wait()
+                if not self._jobs:
+                    return
+                jobs = self._take()
+            self._dispatch(jobs)
+
+    def _dispatch(self, jobs: List[_Job]) -> None:
+        now = time.perf_counter()
+        waits = [now - j.enqueued for j in jobs]
+        with self._cond:
+            self._batches += 1
+            self._requests += len(jobs)
+            self._rows += sum(len(j.batch) for j in jobs)
+            self._wait_total += sum(waits)
+            self._wait_max = max(self._wait_max, max(waits))
+            self._size_hist[np.searchsorted(BATCH_SIZE_BUCKETS, len(jobs))] += 1
+            self._concurrency = 0.8 * self._concurrency + 0.2 * len(jobs)
+
+        predictor = jobs[0].predictor
+        try:
+            scores = predictor.score(concat_batches([j.batch for j in jobs]))
+        except Exception as e:
+            if len(jobs) == 1:
+                jobs[0].future.set_exception(e)
+                return
+            # one bad request must not fail its neighbours: score them one by one
+            logger.warning("Batched scoring failed for %d requests, retrying individually", len(jobs))
+            for j in jobs:
+                try:
+                    j.future.set_result(predictor.score(j.batch))
+                except Exception as e:
+                    j.future.set_exception(e)
+            return
+
+        start = 0
+        for j in jobs:
+            stop = start + len(j.batch)
+            j.future.set_result(scores[start:stop])
+            start = stop
+
@@ -0,0 +1,182 @@
+import argparse
+import json
+import logging
+import platform
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from .io import write_json
+from .logging_setup import setup_logging
+from .pipeline import build_pipeline
+from .predictor import Predictor, load_predictor
+from .profiling import build_training_profile, compare_to_profile
+from .registry import ModelRegistry
+from .schema import REQUIRED_COLUMNS, validate_dataframe
+from .serving import sample_batches, serving_predictor, time_call
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = (1, 10, 100, 10_000)
+COMPONENTS = (
+    "validate_dataframe",
+    "preprocessing.sklearn",
+    "preprocessing.compiled",
+    "forest.sklearn",
+    "forest.compiled",
+    "compare_to_profile",
+    "build_training_profile",
+    "predict_df.sklearn",
+    "predict_df.compiled",
+)
+
+
+def _component_calls(name: str, batch: pd.DataFrame, sk: Predictor, compiled: Predictor,
+                     profile: Dict[str, Any]) -> Optional[Callable[[], Any]]:
+    x = validate_dataframe(batch)
+    if name == "validate_dataframe":
+        return lambda: validate_dataframe(batch)
+    if name == "preprocessing.sklearn":
+        return lambda: sk.preprocessing.transform(x)
+    if name == "preprocessing.compiled":
+        return None if compiled.transform is None else (lambda: compiled.transform.transform(x))
+    if name == "forest.sklearn":
+        if sk.model is None:
+            return None
+        features = sk.preprocessing.transform(x)
+        return lambda: sk.model[-1].predict(features)
+    if name == "forest.compiled":
+        if compiled.forest is None:
+            return None
+        features = sk.preprocessing.transform(x)
+        return lambda: compiled.forest.predict(features)
+    if name == "compare_to_profile":
+        return lambda: compare_to_profile(x, profile)
+    if name == "build_training_profile":
+        return lambda: build_training_profile(x)
+    if name == "predict_df.sklearn":
+        return None if sk.model is None else (lambda: sk.predict_df(batch))
+    if name == "predict_df.compiled":
+        return lambda: compiled.predict_df(batch)
+    raise ValueError(f"Unknown component: {name!r}")
+
+
+def run_benchmarks(sk: Predictor, compiled: Predictor, df: pd.DataFrame, *,
+                   sizes: Sequence[int] = DEFAULT_SIZES, components: Sequence[str] = COMPONENTS,
+                   min_seconds: float = 0.2, seed: int = 0) -> Dict[str, Any]:
+    """Time every component at every batch size. Results are keyed "<component>/<rows>"."""
+    profile = sk.training_profile or build_training_profile(df)
+    sk.training_profile = compiled.training_profile = profile
+
+    results: Dict[str, Any] = {}
+    for n, batch in sample_batches(df, sizes, seed).items():
+        for name in components:
+            call = _component_calls(name, batch, sk, compiled, profile)
+            if call is None:
+                logger.info("skip %s (not available for this model)", name)
+                continue
+            r = time_call(call, min_seconds=min_seconds)
+            r.update({"component": name, "rows": n, "us_per_row": 1000.0 * r["median_ms"] / n})
+            results[f"{name}/{n}"] = r
+            logger.info("%-24s rows=%-6d median_ms=%.3f us_per_row=%.2f repeats=%d",
+                        name, n, r["median_ms"], r["us_per_row"], r["repeats"])
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.25,
+            noise_floor_ms: float = 0.05) -> List[Dict[str, Any]]:
+    """Rows where the median got slower than baseline * (1 + tolerance).
+
+    Differences under noise_floor_ms are ignored (sub-50us calls jitter by more than 25%).
+    """
+    regressions = []
+    for key, cur in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        ratio = cur["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+        if ratio > 1.0 + tolerance and cur["median_ms"] - base["median_ms"] > noise_floor_ms:
+            regressions.append({"key": key, "baseline_ms": base["median_ms"],
+                                "current_ms": cur["median_ms"], "ratio": ratio})
+    return regressions
+
+
+def _load_or_fit(model_path: Optional[str], df: pd.DataFrame, target: str, fit_trees: int):
+    if model_path:
+        return (load_predictor(model_path, engine="sklearn", transform="sklearn"),
+                load_predictor(model_path, engine="compiled", transform="compiled"),
+                {"source": "model", "model_path": model_path})
+
+    # no trained model: a fixed small pipeline keeps runs comparable without the registry
+    pipe = build_pipeline(random_state=42, n_jobs=1).set_params(randomforestregressor__n_estimators=fit_trees)
+    pipe.fit(df[REQUIRED_COLUMNS], df[target])
+    return Predictor(model=pipe), serving_predictor(pipe), {"source": "fit", "n_estimators": fit_trees}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline micro-benchmarks of the scoring components")
+    parser.add_argument("--data", default="data/raw/housing.csv")
+    parser.add_argument("--target", default="median_house_value")
+    parser.add_argument("--registry", default="artifacts/models/registry")
+    parser.add_argument("--model", default=None, help="model path (default: registry active, else a quick fit)")
+    parser.add_argument("--fit-trees", type=int, default=100, help="trees for the quick fit")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    parser.add_argument("--components", default=",".join(COMPONENTS))
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="minimum timing window per row")
+    parser.add_argument("--output", default=None, help="default: artifacts/bench/bench-<timestamp>.json")
+    parser.add_argument("--compare", default=None, metavar="BASELINE", help="flag regressions vs this JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--save-baseline", action="store_true", help="also write artifacts/bench/baseline.json")
+    args = parser.parse_args()
+
+    setup_logging()
+    df = pd.read_csv(args.data)
+
+    model_path = args.model
+    if model_path is None:
+        registry = ModelRegistry(Path(args.registry))
+        if registry.active_symlink().exists():
+            model_path = str(registry.active_symlink())
+    sk, compiled, model_info = _load_or_fit(model_path, df, args.target, args.fit_trees)
+
+    results = run_benchmarks(
+        sk, compiled, df,
+        sizes=[int(s) for s in args.sizes.split(",")],
+        components=[c for c in args.components.split(",") if c],
+        min_seconds=args.min_seconds,
+    )
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "sklearn": sklearn.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "model": {**model_info, "run_id": sk.run_id},
+        "results": results,
+    }
+
+    output = args.output or f"artifacts/bench/bench-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    write_json(output, report)
+    if args.save_baseline:
+        write_json("artifacts/bench/baseline.json", report)
+    logger.info("Benchmark written: %s", output)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if baseline.get("model") != report["model"]:
+            logger.warning("Baseline was measured on a different model: %s", baseline.get("model"))
+        regressions = compare(report, baseline, tolerance=args.tolerance)
+        for r in regressions:
+            logger.warning("REGRESSION %s: %.3f ms -> %.3f ms (x%.2f)",
+                           r["key"], r["baseline_ms"], r["current_ms"], r["ratio"])
+        if regressions:
+            raise SystemExit(f"{len(regressions)} benchmark regression(s) vs {args.compare}")
+        logger.info("No regressions vs %s (tolerance %.0f%%)", args.compare, 100 * args.tolerance)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import itertools
+import math
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .schema import REQUIRED_COLUMNS, ValidatedBatch
+from .versioning import sha256_json
+
+# rough per-entry cost besides the key itself: OrderedDict node, float, tuple, expiry
+_ENTRY_OVERHEAD = 160
+
+
+def record_keys(batch: ValidatedBatch) -> List[str]:
+    """Canonical per-record hash of the validated values (so 880, 880.0 and "880" collide)."""
+    categories = batch.category_values().tolist()
+    keys = []
+    for row, cat in zip(batch.numeric.tolist(), categories):
+        values = [None if math.isnan(v) else v for v in row]
+        values.append(None if not isinstance(cat, str) and cat != cat else cat)
+        keys.append(sha256_json(dict(zip(REQUIRED_COLUMNS, values))))
+    return keys
+
+
+class PredictionCache:
+    """Bounded LRU/TTL cache of per-record predictions keyed by (loaded model, record hash).
+
+    A model is identified by the loaded predictor object, not its run_id: retraining with
+    the same config and data, or a forced reload, keeps the run_id but changes the model.
+    """
+
+    def __init__(self, max_entries: int = 100_000, max_bytes: int = 64 * 1024 * 1024,
+                 ttl_seconds: Optional[float] = None):
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self.ttl_seconds = float(ttl_seconds) if ttl_seconds else None
+
+        self._entries: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # key -> (value, expires)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._run_id: Optional[str] = None
+        # id(predictor) -> (weakref, token); the weakref tells a new object apart from a dead one with the same id
+        self._tokens: Dict[int, Tuple[weakref.ref, int]] = {}
+        self._next_token = itertools.count()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def set_model(self, run_id: Optional[str]) -> None:
+        """Drop everything on every model swap, even to the same run_id (old entries could never hit again)."""
+        with self._lock:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._run_id = run_id
+            self._tokens = {k: v for k, v in self._tokens.items() if v[0]() is not None}
+
+    def _token(self, predictor: Any) -> int:
+        ref, token = self._tokens.get(id(predictor), (None, None))
+        if ref is None or ref() is not predictor:
+            token = next(self._next_token)
+            self._tokens[id(predictor)] = (weakref.ref(predictor), token)
+        return token
+
+    def score(self, predictor: Any, batch: ValidatedBatch,
+              scorer: Callable[[ValidatedBatch], np.ndarray]) -> np.ndarray:
+        """Look every record up, score only the distinct misses with `scorer`, fill the cache."""
+        records = record_keys(batch)
+        out = np.empty(len(records), dtype=np.float64)
+
+        miss_rows: Dict[str, List[int]] = {}
+        now = time.monotonic()
+        with self._lock:
+            prefix = f"{self._token(predictor)}:"
+            keys = [prefix + k for k in records]
+            for i, k in enumerate(keys):
+                entry = self._entries.get(k)
+                if entry is not None and entry[1] < now:
+                    self._drop(k)
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    miss_rows.setdefault(k, []).append(i)
+                else:
+                    self._entries.move_to_end(k)
+                    out[i] = entry[0]
+            self.hits += len(keys) - sum(len(v) for v in miss_rows.values())
+            self.misses += sum(len(v) for v in miss_rows.values())
+
+        if not miss_rows:
+            return out
+
+        # duplicates inside the batch are scored once
+        first = np.fromiter((rows[0] for rows in miss_rows.values()), dtype=np.intp, count=len(miss_rows))
+        scores = scorer(batch if len(first) == len(batch) else batch.take(first))
+
+        expires = now + self.ttl_seconds if self.ttl_seconds else math.inf
+        with self._lock:
+            for (k, rows), value in zip(miss_rows.items(), scores.tolist()):
+                out[rows] = value
+                self._put(k, value, expires)
+        return out
+
+    def _put(self, key: str, value: float, expires: float) -> None:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self._entries[key] = (value, expires)
+            return
+        self._entries[key] = (value, expires)
+        self._bytes += len(key) + _ENTRY_OVERHEAD
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        del self._entries[key]
+        self._bytes -= len(key) + _ENTRY_OVERHEAD
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "run_id": self._run_id,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
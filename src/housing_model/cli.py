@@ -7,7 +7,7 @@ from pathlib import Path
 
 from .logging_setup import setup_logging
 from .config import load_config
-from .data import load_housing, stratified_split
+from .data import load_housing, load_split, stratified_split, streaming_split
 from .train import fit
 from .io import write_json
 from .versioning import sha256_file, sha256_bytes, short_hash
@@ -27,19 +27,37 @@ def main():
     config_hash = sha256_bytes(config_text.encode("utf-8"))
     data_hash = sha256_file(cfg.data.csv_path)
 
-    df = load_housing(cfg.data.csv_path)
-
-    X_train, X_test, y_train, y_test = stratified_split(
-        df = df,
-        target= cfg.data.target,
-        stratify_col= cfg.data.stratify_col,
-        bins = cfg.data.income_cat_bins,
-        labels= cfg.data.income_cat_labels,
-        test_size= cfg.data.test_size,
-        random_state = cfg.data.random_state
-    )
-
-
+    if cfg.data.split_mode == "streaming":
+        split = streaming_split(
+            cfg.data.csv_path,
+            target=cfg.data.target,
+            stratify_col=cfg.data.stratify_col,
+            bins=cfg.data.income_cat_bins,
+            labels=cfg.data.income_cat_labels,
+            test_size=cfg.data.test_size,
+            random_state=cfg.data.random_state,
+            out_dir=cfg.data.split_dir,
+            data_hash=data_hash,
+            chunk_rows=cfg.data.chunk_rows,
+            max_train_rows=cfg.data.max_train_rows,
+            max_test_rows=cfg.data.max_test_rows,
+        )
+        X_train, X_test, y_train, y_test = load_split(split["path"], cfg.data.target)
+    elif cfg.data.split_mode == "memory":
+        df = load_housing(cfg.data.csv_path, cache_dir=cfg.data.cache_dir, data_hash=data_hash)
+
+        X_train, X_test, y_train, y_test = stratified_split(
+            df = df,
+            target= cfg.data.target,
+            stratify_col= cfg.data.stratify_col,
+            bins = cfg.data.income_cat_bins,
+            labels= cfg.data.income_cat_labels,
+            test_size= cfg.data.test_size,
+            random_state = cfg.data.random_state
+        )
+        split = {"mode": "memory", "rows": len(df), "train_rows": len(X_train), "test_rows": len(X_test)}
+    else:
+        raise ValueError(f"Unknown data.split_mode: {cfg.data.split_mode!r} (expected memory or streaming)")
 
     manifest = {
     "run_id": f"{short_hash(config_hash)}_{short_hash(data_hash)}",
@@ -47,6 +65,7 @@ def main():
     "sklearn": sklearn.__version__,
     "config_path": args.config,
     "data_path": cfg.data.csv_path,
+    "split": split,
     # these will be filled after fit()
     }
 
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 import yaml
 
@@ -11,11 +11,22 @@ class TrainConfig:
     random_state: int
     income_cat_bins: list[float]
     income_cat_labels: list[int]
+    cache_dir: str | None = None  # typed column cache of the parsed CSV, keyed by data hash
+    split_mode: str = "memory"  # memory | streaming (chunked CSV, stratified reservoir, splits on disk)
+    split_dir: str = "artifacts/splits"
+    chunk_rows: int = 100_000
+    max_train_rows: int | None = None
+    max_test_rows: int | None = None
 
 @dataclass(frozen=True)
 class ModelConfig:
     random_state: int
     n_jobs: int
+    type: str = "random_forest"            # random_forest | hist_gradient_boosting | linear
+    compare: tuple = ()                    # more backends trained and selected against `type`
+    latency_budget_ms: float | None = None        # p99 single-row predict limit for selection
+    batch_latency_budget_ms: float | None = None  # p99 limit for a latency_batch_rows batch
+    latency_batch_rows: int = 1000
 
 @dataclass(frozen=True)
 class GridConfig:
@@ -23,6 +34,22 @@ class GridConfig:
     cv: int
     scoring: str
     param_grid: dict
+    strategy: str = "exhaustive"   # exhaustive | halving
+    warm_start: bool = False       # grow one forest per fold across n_estimators values
+    resource: str = "n_samples"    # halving resource: n_samples | n_estimators
+    factor: int = 3
+    evaluation: str = "cv"         # cv | oob | both (out-of-bag scores for bagged forests)
+
+@dataclass(frozen=True)
+class CompactConfig:
+    enabled: bool = False
+    max_leaf_error: float = 0.0    # quantization bound on leaf values (target units); 0 = exact leaves
+
+@dataclass(frozen=True)
+class ParallelConfig:
+    cores: int | None = None        # training core budget; None = model.n_jobs (-1: all available)
+    outer_jobs: int | None = None   # CV fits at once; None = as many as the budget and tasks allow
+    backend: str = "auto"           # auto | threads | processes
 
 @dataclass(frozen=True)
 class OutputConfig:
@@ -37,6 +64,14 @@ class AppConfig:
     model: ModelConfig
     grid: GridConfig
     output: OutputConfig
+    compact: CompactConfig = field(default_factory=CompactConfig)
+    parallel: ParallelConfig = field(default_factory=ParallelConfig)
+
+def _optional_float(value) -> float | None:
+    return None if value is None else float(value)
+
+def _optional_int(value) -> int | None:
+    return None if value is None else int(value)
 
 def load_config(path: str) -> AppConfig:
     payload = yaml.safe_load(Path(path).read_text(encoding='utf-8'))
@@ -45,6 +80,8 @@ def load_config(path: str) -> AppConfig:
     model = payload['model']
     grid = payload['grid']
     output = payload['output']
+    compact = payload.get('compact') or {}
+    parallel = payload.get('parallel') or {}
 
     return AppConfig(
         data=TrainConfig(
@@ -55,16 +92,32 @@ def load_config(path: str) -> AppConfig:
             random_state=int(data["random_state"]),
             income_cat_bins=[float(x) if x != ".inf" else float("inf") for x in data["income_cat_bins"]],
             income_cat_labels=[int(x) for x in data["income_cat_labels"]],
+            cache_dir=data.get("cache_dir"),
+            split_mode=str(data.get("split_mode", "memory")),
+            split_dir=str(data.get("split_dir", "artifacts/splits")),
+            chunk_rows=int(data.get("chunk_rows", 100_000)),
+            max_train_rows=_optional_int(data.get("max_train_rows")),
+            max_test_rows=_optional_int(data.get("max_test_rows")),
         ),
         model=ModelConfig(
             random_state=int(model["random_state"]),
             n_jobs=int(model["n_jobs"]),
+            type=str(model.get("type", "random_forest")),
+            compare=tuple(model.get("compare") or ()),
+            latency_budget_ms=_optional_float(model.get("latency_budget_ms")),
+            batch_latency_budget_ms=_optional_float(model.get("batch_latency_budget_ms")),
+            latency_batch_rows=int(model.get("latency_batch_rows", 1000)),
         ),
         grid=GridConfig(
             enabled=bool(grid["enabled"]),
             cv=int(grid["cv"]),
             scoring=str(grid["scoring"]),
             param_grid=grid["param_grid"] or {},
+            strategy=str(grid.get("strategy", "exhaustive")),
+            warm_start=bool(grid.get("warm_start", False)),
+            resource=str(grid.get("resource", "n_samples")),
+            factor=int(grid.get("factor", 3)),
+            evaluation=str(grid.get("evaluation", "cv")),
         ),
         output=OutputConfig(
             artifacts_dir=output["artifacts_dir"],
@@ -72,4 +125,13 @@ def load_config(path: str) -> AppConfig:
             metrics_path=output["metrics_path"],
             manifest_path=output["manifest_path"],
         ),
+        compact=CompactConfig(
+            enabled=bool(compact.get("enabled", False)),
+            max_leaf_error=float(compact.get("max_leaf_error", 0.0)),
+        ),
+        parallel=ParallelConfig(
+            cores=_optional_int(parallel.get("cores")),
+            outer_jobs=_optional_int(parallel.get("outer_jobs")),
+            backend=str(parallel.get("backend", "auto")),
+        ),
     )
\ No newline at end of file
@@ -1,14 +1,108 @@
+import json
 import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
 import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 
+from .versioning import sha256_file, sha256_json, short_hash
+
 logger = logging.getLogger(__name__)
 
-def load_housing(csv_path: str) -> pd.DataFrame:
-    df = pd.read_csv(csv_path)
+# explicit parse dtypes; numeric columns are narrowed to float32 afterwards only if lossless
+HOUSING_DTYPES = {
+    "longitude": "float64",
+    "latitude": "float64",
+    "housing_median_age": "float64",
+    "total_rooms": "float64",
+    "total_bedrooms": "float64",
+    "population": "float64",
+    "households": "float64",
+    "median_income": "float64",
+    "median_house_value": "float64",
+    "ocean_proximity": "category",
+}
+
+CACHE_FORMAT = 1
+
+def _narrow(col: pd.Series) -> pd.Series:
+    if col.dtype != np.float64:
+        return col
+    narrow = col.to_numpy().astype(np.float32)
+    if np.array_equal(narrow.astype(np.float64), col.to_numpy(), equal_nan=True):
+        return pd.Series(narrow, index=col.index, name=col.name)
+    return col
+
+def read_housing_csv(csv_path: str) -> pd.DataFrame:
+    header = pd.read_csv(csv_path, nrows=0).columns
+    df = pd.read_csv(csv_path, dtype={c: t for c, t in HOUSING_DTYPES.items() if c in header})
+    return df.apply(_narrow)
+
+def _write_cache(df: pd.DataFrame, cache_path: Path, data_hash: str) -> None:
+    tmp = cache_path.with_name(cache_path.name + f".tmp{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    meta = {"format": CACHE_FORMAT, "data_hash": data_hash, "rows": len(df), "columns": []}
+    for i, (name, col) in enumerate(df.items()):
+        entry = {"name": name, "file": f"{i:03d}.npy"}
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            entry["categories"] = [str(c) for c in col.cat.categories]
+            values = col.cat.codes.to_numpy()
+        else:
+            values = col.to_numpy()
+        if values.dtype == object:
+            raise TypeError(f"Column {name!r} has no fixed dtype; add it to HOUSING_DTYPES")
+        np.save(tmp / entry["file"], values, allow_pickle=False)
+        entry["dtype"] = str(values.dtype)
+        meta["columns"].append(entry)
+    (tmp / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+    # concurrent runs: first rename wins, the other copy is dropped
+    try:
+        os.replace(tmp, cache_path)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def _read_cache(cache_path: Path) -> Optional[pd.DataFrame]:
+    try:
+        meta = json.loads((cache_path / "meta.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if meta.get("format") != CACHE_FORMAT:
+        return None
+
+    columns = {}
+    for entry in meta["columns"]:
+        values = np.load(cache_path / entry["file"], allow_pickle=False)
+        if "categories" in entry:
+            values = pd.Categorical.from_codes(values, categories=entry["categories"])
+        columns[entry["name"]] = values
+    return pd.DataFrame(columns)
+
+def load_housing(csv_path: str, cache_dir: Optional[str] = None,
+                 data_hash: Optional[str] = None) -> pd.DataFrame:
+    """Parse the CSV with fixed dtypes; with cache_dir, reuse the typed column cache for this data hash."""
+    t0 = time.perf_counter()
+    if cache_dir is None:
+        df, source = read_housing_csv(csv_path), "csv"
+    else:
+        data_hash = data_hash or sha256_file(csv_path)
+        cache_path = Path(cache_dir) / data_hash
+        df, source = _read_cache(cache_path), "cache"
+        if df is None:
+            df, source = read_housing_csv(csv_path), "csv"
+            _write_cache(df, cache_path, data_hash)
+
     if df.empty:
         raise ValueError(f'Dataset is empty: {csv_path}')
+    logger.info("Loaded dataset rows=%d source=%s seconds=%.3f memory_mb=%.1f",
+                len(df), source, time.perf_counter() - t0, df.memory_usage(deep=True).sum() / 2**20)
     return df
 
 def add_income_cat(df: pd.DataFrame, income_col: str, 
@@ -56,4 +150,157 @@ def stratified_split(
     # print evez etmek olar ama bu daha rahatdi. uzerinde islemek daha rahatdi. cloud falan
     logger.info("Split sizes: train=%d test=%d", len(train_df), len(test_df))
 
-    return X_train, X_test, y_train, y_test
\ No newline at end of file
+    return X_train, X_test, y_train, y_test
+
+
+SPLIT_FORMAT = 1
+
+def _allocate(total: int, weights: np.ndarray) -> np.ndarray:
+    """`total` rows split across strata proportionally to `weights` (largest remainder), capped by weights."""
+    if total <= 0 or weights.sum() == 0:
+        return np.zeros_like(weights)
+    exact = total * weights / weights.sum()
+    out = np.floor(exact).astype(np.int64)
+    extra = int(total - out.sum())
+    out[np.argsort(-(exact - out), kind="stable")[:extra]] += 1
+    return np.minimum(out, weights)
+
+def _income_codes(values: pd.Series, bins: list[float], labels: list[int]) -> np.ndarray:
+    codes = pd.cut(values, bins=bins, labels=labels).cat.codes.to_numpy()
+    if (codes < 0).any():
+        raise ValueError(f'icome_cat has {int((codes < 0).sum())} NANs (bins may not cover all values)')
+    return codes
+
+def _read_chunks(csv_path: str, chunk_rows: int, usecols=None):
+    header = pd.read_csv(csv_path, nrows=0).columns
+    # categories differ per chunk, so strings here and one categorical at the end
+    dtypes = {c: ("object" if t == "category" else t) for c, t in HOUSING_DTYPES.items() if c in header}
+    return pd.read_csv(csv_path, dtype=dtypes, usecols=usecols, chunksize=chunk_rows)
+
+def streaming_split(
+        csv_path: str,
+        target: str,
+        stratify_col: str,
+        bins: list[float],
+        labels: list[int],
+        test_size: float,
+        random_state: int,
+        *,
+        out_dir: str,
+        data_hash: Optional[str] = None,
+        chunk_rows: int = 100_000,
+        max_train_rows: Optional[int] = None,
+        max_test_rows: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Stratified train/test split of a CSV that need not fit in memory, written to disk as columns.
+
+    Pass 1 counts rows per income_cat stratum (stratify column only). Pass 2 gives
+    every row a uniform random key and keeps, per stratum, the rows with the smallest
+    keys (a priority reservoir): the first ``test_s`` go to test, the next ``train_s``
+    to train. Memory is bounded by the output sizes (``max_*_rows``) plus one chunk.
+    The keys come from one seeded stream, so the split does not depend on chunk_rows.
+
+    Splits are written with the column cache layout under ``out_dir/<key>/{train,test}``
+    and reused when the data and parameters match.
+    """
+    t0 = time.perf_counter()
+    data_hash = data_hash or sha256_file(csv_path)
+    params = {"format": SPLIT_FORMAT, "data_hash": data_hash, "target": target, "stratify_col": stratify_col,
+              "bins": [str(b) for b in bins], "labels": list(labels), "test_size": test_size,
+              "random_state": random_state, "max_train_rows": max_train_rows, "max_test_rows": max_test_rows}
+    split_path = Path(out_dir) / short_hash(sha256_json(params))
+    try:
+        info = json.loads((split_path / "split.json").read_text(encoding="utf-8"))
+        logger.info("Reusing streaming split %s train=%d test=%d", split_path, info["train_rows"], info["test_rows"])
+        return {**info, "reused": True}
+    except (OSError, ValueError):
+        pass
+
+    # pass 1: rows per stratum
+    counts = np.zeros(len(labels), dtype=np.int64)
+    chunks = 0
+    for chunk in _read_chunks(csv_path, chunk_rows, usecols=[stratify_col]):
+        counts += np.bincount(_income_codes(chunk[stratify_col], bins, labels), minlength=len(labels))
+        chunks += 1
+    n_rows = int(counts.sum())
+    if n_rows == 0:
+        raise ValueError(f'Dataset is empty: {csv_path}')
+
+    # same sizes as train_test_split (test rounds up), then the optional caps
+    n_test = int(np.ceil(test_size * n_rows))
+    n_train = n_rows - n_test
+    if max_test_rows is not None:
+        n_test = min(n_test, int(max_test_rows))
+    if max_train_rows is not None:
+        n_train = min(n_train, int(max_train_rows))
+    test_s = _allocate(n_test, counts)
+    train_s = _allocate(n_train, counts - test_s)
+    keep = test_s + train_s
+
+    # pass 2: per-stratum reservoirs of the smallest keys
+    rng = np.random.default_rng(random_state)
+    kept: Dict[int, pd.DataFrame] = {}
+    kept_keys: Dict[int, np.ndarray] = {}
+    for chunk in _read_chunks(csv_path, chunk_rows):
+        keys = rng.random(len(chunk))
+        codes = _income_codes(chunk[stratify_col], bins, labels)
+        for s in np.unique(codes):
+            if keep[s] == 0:
+                continue
+            rows = np.flatnonzero(codes == s)
+            old_keys = kept_keys.get(s)
+            if old_keys is not None and len(old_keys) == keep[s]:
+                rows = rows[keys[rows] < old_keys.max()]  # full: only smaller keys can get in
+                if rows.size == 0:
+                    continue
+            frame = chunk.iloc[rows]
+            cand_keys = keys[rows] if old_keys is None else np.concatenate([old_keys, keys[rows]])
+            cand = frame if old_keys is None else pd.concat([kept[s], frame])
+            if len(cand_keys) > keep[s]:
+                idx = np.argpartition(cand_keys, keep[s] - 1)[:keep[s]]
+                cand, cand_keys = cand.iloc[idx], cand_keys[idx]
+            kept[s], kept_keys[s] = cand, cand_keys
+
+    parts = {"train": [], "test": []}
+    for s, frame in kept.items():
+        order = np.argsort(kept_keys[s], kind="stable")
+        parts["test"].append((kept_keys[s][order[:test_s[s]]], frame.iloc[order[:test_s[s]]]))
+        parts["train"].append((kept_keys[s][order[test_s[s]:]], frame.iloc[order[test_s[s]:]]))
+
+    for name, pieces in parts.items():
+        # shuffled like train_test_split: rows ordered by their random key across strata
+        keys = np.concatenate([k for k, _ in pieces])
+        frame = pd.concat([f for _, f in pieces]).iloc[np.argsort(keys, kind="stable")].reset_index(drop=True)
+        if "ocean_proximity" in frame.columns:
+            frame["ocean_proximity"] = frame["ocean_proximity"].astype("category")
+        _write_cache(frame.apply(_narrow), split_path / name, data_hash)
+
+    info = {
+        "mode": "streaming",
+        "path": str(split_path),
+        "rows": n_rows,
+        "train_rows": int(train_s.sum()),
+        "test_rows": int(test_s.sum()),
+        "chunk_rows": int(chunk_rows),
+        "chunks": chunks,
+        "strata": {str(label): {"rows": int(counts[i]), "train": int(train_s[i]), "test": int(test_s[i])}
+                   for i, label in enumerate(labels)},
+        "seconds": time.perf_counter() - t0,
+    }
+    (split_path / "split.json").write_text(json.dumps(info, indent=2), encoding="utf-8")
+    logger.info("Streaming split rows=%d train=%d test=%d chunks=%d seconds=%.3f path=%s",
+                n_rows, info["train_rows"], info["test_rows"], chunks, info["seconds"], split_path)
+    return {**info, "reused": False}
+
+def load_split(split_path: str, target: str) -> tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]:
+    """(X_train, X_test, y_train, y_test) from a streaming_split directory."""
+    out = []
+    for name in ("train", "test"):
+        df = _read_cache(Path(split_path) / name)
+        if df is None:
+            raise FileNotFoundError(f"No {name} split at {split_path}")
+        y = df.pop(target)
+        out.append((df, y))
+    (X_train, y_train), (X_test, y_test) = out
+    logger.info("Split sizes: train=%d test=%d", len(X_train), len(X_test))
+    return X_train, X_test, y_train, y_test
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+from .schema import REQUIRED_CATEGORICAL, REQUIRED_NUMERIC, ValidatedBatch
+from .sketches import FrequencyCounter, QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Window:
+    start: float
+    rows: int = 0
+    numeric: Dict[str, QuantileSketch] = field(default_factory=dict)
+    categorical: Dict[str, FrequencyCounter] = field(default_factory=dict)
+
+    @classmethod
+    def empty(cls, start: float) -> "_Window":
+        return cls(
+            start=start,
+            numeric={c: QuantileSketch() for c in REQUIRED_NUMERIC},
+            categorical={c: FrequencyCounter() for c in REQUIRED_CATEGORICAL},
+        )
+
+    def add(self, batch: ValidatedBatch) -> None:
+        self.rows += len(batch)
+        for j, c in enumerate(REQUIRED_NUMERIC):
+            self.numeric[c].add(batch.numeric[:, j])
+        self.categorical[REQUIRED_CATEGORICAL[0]].add_codes(batch.codes, batch.categories)
+
+
+class DriftMonitor:
+    """Off-hot-path drift: requests only append their batch, a thread folds them into sketches.
+
+    Data is grouped into tumbling windows of ``window_seconds``; the report covers the
+    last ``windows`` of them (a sliding window) and has the same per-column shape as
+    ``profiling.compare_to_profile``.
+    """
+
+    def __init__(self, profile: Optional[Dict[str, Any]], window_seconds: float = 300.0,
+                 windows: int = 12, interval_seconds: float = 5.0,
+                 rel_shift_threshold: float = 0.25, unknown_share_threshold: float = 0.05,
+                 max_pending: int = 10_000):
+        self.window_seconds = float(window_seconds)
+        self.interval_seconds = float(interval_seconds)
+        self.rel_shift_threshold = float(rel_shift_threshold)
+        self.unknown_share_threshold = float(unknown_share_threshold)
+        self.max_pending = int(max_pending)
+        self.dropped = 0
+
+        self._profile = profile
+        self._pending: List[ValidatedBatch] = []
+        self._pending_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._windows: Deque[_Window] = deque(maxlen=int(windows))
+        self._report: Optional[Dict[str, Any]] = None
+        self._alert = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="drift-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def reset(self, profile: Optional[Dict[str, Any]]) -> None:
+        """New baseline (e.g. a new model): forget collected windows."""
+        with self._pending_lock:
+            self._pending = []
+        with self._state_lock:
+            self._profile = profile
+            self._windows.clear()
+            self._report = None
+            self._alert = False
+
+    def observe(self, batch: ValidatedBatch) -> None:
+        # the whole per-request cost; if the refresher falls behind, sample rather than grow
+        with self._pending_lock:
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending.append(batch)
+
+    @property
+    def alert(self) -> bool:
+        return self._alert
+
+    def flag(self) -> Optional[Dict[str, Any]]:
+        """Lightweight per-response drift field (None without a training profile)."""
+        if self._profile is None:
+            return None
+        return {"alert": self._alert, "details": "/drift"}
+
+    def refresh(self, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        now = time.time() if now is None else now
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+
+        with self._state_lock:
+            if not self._windows or now - self._windows[-1].start >= self.window_seconds:
+                self._windows.append(_Window.empty(now))
+            for batch in pending:
+                self._windows[-1].add(batch)
+            self._report = self._build_report()
+            self._alert = bool(self._report and self._report["alert"])
+            return self._report
+
+    def _build_report(self) -> Optional[Dict[str, Any]]:
+        if self._profile is None:
+            return None
+        windows = list(self._windows)
+        rows = sum(w.rows for w in windows)
+        out: Dict[str, Any] = {
+            "window_seconds": self.window_seconds,
+            "windows": len(windows),
+            "window_start": windows[0].start if windows else None,
+            "rows": rows,
+            "dropped_batches": self.dropped,
+            "numeric": {},
+            "categorical": {},
+        }
+
+        for col, base in self._profile.get("numeric", {}).items():
+            sketch = QuantileSketch()
+            for w in windows:
+                sketch.merge(w.numeric[col])
+            base_med = float(base["q50"])
+            if sketch.count == 0:
+                out["numeric"][col] = {"current_q50": None, "baseline_q50": base_med, "rel_shift": None}
+                continue
+            cur_med = sketch.quantile(0.5)
+            denom = abs(base_med) if abs(base_med) > 1e-9 else 1.0
+            out["numeric"][col] = {"current_q50": cur_med, "baseline_q50": base_med,
+                                   "rel_shift": float((cur_med - base_med) / denom)}
+
+        for col, base_freq in self._profile.get("categorical", {}).items():
+            counter = FrequencyCounter()
+            for w in windows:
+                counter.merge(w.categorical[col])
+            cur = counter.frequencies()
+            unknown_share = sum(v for k, v in cur.items() if k not in base_freq)
+            out["categorical"][col] = {"unknown_share": float(unknown_share), "current_top": counter.top(5)}
+
+        shifted = [c for c, v in out["numeric"].items()
+                   if v["rel_shift"] is not None and abs(v["rel_shift"]) > self.rel_shift_threshold]
+        unknown = [c for c, v in out["categorical"].items()
+                   if v["unknown_share"] > self.unknown_share_threshold]
+        out["alert"] = bool(shifted or unknown)
+        out["alert_columns"] = shifted + unknown
+        return out
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Drift refresh failed")
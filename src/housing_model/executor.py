@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from threadpoolctl import threadpool_info, threadpool_limits
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_max_threads(max_threads: Optional[int]) -> int:
+    """Forest threads per call from ``inference.max_threads``: None (null) means all cores."""
+    return max(1, int(max_threads or os.cpu_count() or 1))
+
+
+class InferenceExecutor:
+    """Dedicated thread pool for /predict, separate from Starlette's shared one.
+
+    ``workers`` bounds concurrent model calls; each call may add up to
+    ``max_threads`` forest threads (see ``Predictor.n_jobs_for``). Native pools
+    (BLAS/OpenMP) are capped process-wide to ``native_threads`` while running, so
+    the two layers do not multiply into oversubscription.
+    """
+
+    def __init__(self, workers: int = 4, max_threads: Optional[int] = None,
+                 native_threads: Optional[int] = 1):
+        self.cores = os.cpu_count() or 1
+        self.workers = max(1, int(workers))
+        self.max_threads = resolve_max_threads(max_threads)
+        self.native_threads = None if native_threads is None else max(1, int(native_threads))
+
+        self._pool: ThreadPoolExecutor | None = None
+        self._limits: threadpool_limits | None = None
+        self._lock = threading.Lock()
+        self._active = 0
+        self._peak = 0
+        self._calls = 0
+
+    def start(self) -> None:
+        if self._pool is not None:
+            return
+        if self.native_threads is not None:
+            self._limits = threadpool_limits(limits=self.native_threads)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        budget = self.workers * self.max_threads
+        if budget > self.cores:
+            logger.warning("Inference thread budget %d (workers=%d x max_threads=%d) exceeds %d cores",
+                           budget, self.workers, self.max_threads, self.cores)
+        logger.info("Inference executor: workers=%d max_threads=%d native_threads=%s cores=%d",
+                    self.workers, self.max_threads, self.native_threads, self.cores)
+
+    def stop(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        if self._limits is not None:
+            self._limits.restore_original_limits()
+            self._limits = None
+
+    def _call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            self._active += 1
+            self._calls += 1
+            self._peak = max(self._peak, self._active)
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)`` on the pool; contextvars (the request's StageTimer) carry over."""
+        if self._pool is None:
+            raise RuntimeError("InferenceExecutor is not started")
+        ctx = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, functools.partial(ctx.run, self._call, fn, *args))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            active, peak, calls = self._active, self._peak, self._calls
+        return {
+            "workers": self.workers,
+            "max_threads": self.max_threads,
+            "native_threads": self.native_threads,
+            "cores": self.cores,
+            "active": active,
+            "peak_active": peak,
+            "calls": calls,
+            "native_pools": [{"api": p["internal_api"], "num_threads": p["num_threads"]}
+                             for p in threadpool_info()],
+        }
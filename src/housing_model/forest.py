@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, replace
+from typing import Optional
+
+import numpy as np
+from joblib import Parallel, delayed
+
+logger = logging.getLogger(__name__)
+
+_LEAF = -1  # sklearn TREE_LEAF
+
+
+@dataclass
+class CompiledForest:
+    """Fitted RandomForestRegressor flattened into contiguous node arrays.
+
+    All trees share the same arrays and ``roots[t]`` is the index of tree t's root.
+    Nodes are laid out so that the right child always follows the left one
+    (``right == left + 1``); leaves have ``feature == -1``.
+
+    A compact forest (see ``compact_forest``) stores the same layout in narrower
+    dtypes and ``value`` as integer codes, decoded as ``value * value_scale + value_offset``.
+    """
+    feature: np.ndarray      # intp, -1 for leaves
+    threshold: np.ndarray    # float64
+    left: np.ndarray         # intp, global index of the left child
+    value: np.ndarray        # float64 node value (only read at leaves)
+    roots: np.ndarray        # intp, one per tree
+    n_features: int
+    max_depth: int
+    value_scale: Optional[float] = None   # set for quantized leaf values
+    value_offset: float = 0.0
+
+    @property
+    def compact(self) -> bool:
+        return self.value_scale is not None or self.threshold.dtype != np.float64
+
+    @property
+    def n_trees(self) -> int:
+        return int(self.roots.shape[0])
+
+    @property
+    def n_nodes(self) -> int:
+        return int(self.feature.shape[0])
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(a.nbytes for a in (self.feature, self.threshold, self.left, self.value, self.roots)))
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Leaf index per (tree, row), shape (n_trees, n_rows)."""
+        # sklearn casts to float32 before comparing against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"X has shape {X.shape}, expected (n, {self.n_features})")
+        if not np.isfinite(X).all():
+            raise ValueError("Input X contains infinity or NaN.")
+
+        n = X.shape[0]
+        flat = X.ravel()
+        leaves = np.repeat(self.roots, n)
+        pos = np.arange(leaves.shape[0])
+        row_offset = np.tile(np.arange(n, dtype=np.intp) * self.n_features, self.n_trees)
+
+        # walk every (tree, row) pair one level per step, dropping pairs that reached a leaf
+        cur = leaves
+        while True:
+            feat = self.feature[cur]
+            inner = feat >= 0
+            if not inner.all():
+                done = ~inner
+                leaves[pos[done]] = cur[done]
+                cur, pos, row_offset, feat = cur[inner], pos[inner], row_offset[inner], feat[inner]
+                if cur.size == 0:
+                    break
+            cur = self.left[cur] + (flat[row_offset + feat] > self.threshold[cur])
+
+        return leaves.reshape(self.n_trees, n)
+
+    def predict(self, X: np.ndarray, n_jobs: int = 1) -> np.ndarray:
+        """Mean leaf value per row; ``n_jobs > 1`` scores row chunks on that many threads.
+
+        Rows are independent, so chunking does not change any prediction.
+        """
+        n_jobs = min(int(n_jobs), X.shape[0])
+        if n_jobs > 1:
+            chunks = np.array_split(np.asarray(X), n_jobs)
+            parts = Parallel(n_jobs=n_jobs, prefer="threads")(delayed(self._predict_rows)(c) for c in chunks)
+            return np.concatenate(parts)
+        return self._predict_rows(X)
+
+    def _predict_rows(self, X: np.ndarray) -> np.ndarray:
+        values = self.value[self.apply(X)]
+        if self.value_scale is not None:
+            values = values * self.value_scale + self.value_offset
+
+        # accumulate tree by tree in estimator order, as sklearn does, so the
+        # float64 sums (and therefore predictions) are bit-for-bit identical
+        out = np.zeros(values.shape[1], dtype=np.float64)
+        for row in values:
+            out += row
+        out /= self.n_trees
+        return out
+
+
+def _tree_arrays(tree, offset: int):
+    count = int(tree.node_count)
+    cl = tree.children_left[:count]
+    cr = tree.children_right[:count]
+    internal = np.flatnonzero(cl != _LEAF)
+
+    # new order: root, then (left, right) of every internal node in original order
+    order = np.empty(count, dtype=np.intp)
+    order[0] = 0
+    order[1::2] = cl[internal]
+    order[2::2] = cr[internal]
+    new_index = np.empty(count, dtype=np.intp)
+    new_index[order] = np.arange(count)
+
+    leaf = cl[order] == _LEAF
+    left = np.zeros(count, dtype=np.intp)
+    left[~leaf] = new_index[cl[order][~leaf]] + offset
+
+    return (
+        np.where(leaf, -1, tree.feature[:count][order]),
+        tree.threshold[:count][order],
+        left,
+        tree.value[:count, 0, 0][order],
+    )
+
+
+def _int_dtype(max_value: int, signed: bool = True) -> np.dtype:
+    kinds = (np.int8, np.int16, np.int32, np.int64) if signed else (np.uint8, np.uint16, np.uint32, np.uint64)
+    return np.dtype(next(t for t in kinds if np.iinfo(t).max >= max_value))
+
+
+def _float32_floor(threshold: np.ndarray) -> np.ndarray:
+    """Largest float32 <= each threshold.
+
+    Inputs are compared as float32, and for float32 x, ``x > t`` iff ``x > floor32(t)``,
+    so the narrowed thresholds route every row exactly like the float64 ones.
+    """
+    t32 = threshold.astype(np.float32)
+    above = t32.astype(np.float64) > threshold
+    t32[above] = np.nextafter(t32[above], np.float32(-np.inf))
+    return t32
+
+
+def compact_forest(forest: CompiledForest, max_leaf_error: float = 0.0) -> CompiledForest:
+    """Narrow a compiled forest for storage.
+
+    Thresholds become float32 (lossless, see ``_float32_floor``) and node indices the
+    smallest integer type that fits. With ``max_leaf_error > 0`` leaf values are
+    quantized to unsigned codes on a uniform grid, each within ``max_leaf_error`` of
+    the original, so every prediction (a mean of leaves) is within that bound too.
+    """
+    leaf = forest.feature < 0
+    value_scale, value_offset, value = None, 0.0, forest.value
+    if max_leaf_error > 0:
+        lo, hi = float(forest.value[leaf].min()), float(forest.value[leaf].max())
+        dtype = _int_dtype(int(np.ceil((hi - lo) / (2.0 * max_leaf_error))), signed=False)
+        # use the whole code range of the chosen dtype: same bytes, smaller error
+        value_scale = (hi - lo) / np.iinfo(dtype).max if hi > lo else 1.0
+        value = np.zeros(forest.n_nodes, dtype=dtype)
+        value[leaf] = np.rint((forest.value[leaf] - lo) / value_scale).astype(dtype)
+        value_offset = lo
+
+    return replace(
+        forest,
+        feature=forest.feature.astype(_int_dtype(forest.n_features)),
+        threshold=_float32_floor(forest.threshold),
+        left=forest.left.astype(_int_dtype(forest.n_nodes)),
+        value=value,
+        roots=forest.roots.astype(_int_dtype(forest.n_nodes)),
+        value_scale=value_scale,
+        value_offset=value_offset,
+    )
+
+
+def compile_forest(estimator) -> CompiledForest:
+    """Flatten a fitted RandomForestRegressor (or any bagged regression-tree ensemble)."""
+    trees = getattr(estimator, "estimators_", None)
+    if not isinstance(trees, list) or not trees:
+        raise ValueError(f"Cannot compile {type(estimator).__name__}: no fitted estimators_")
+    if getattr(estimator, "n_outputs_", 1) != 1:
+        raise ValueError("Only single-output forests can be compiled")
+
+    features, thresholds, lefts, values, roots = [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for est in trees:
+        tree = getattr(est, "tree_", None)
+        if tree is None:
+            raise ValueError(f"Cannot compile {type(est).__name__}: no tree_")
+
+        feature, threshold, left, value = _tree_arrays(tree, offset)
+        features.append(feature)
+        thresholds.append(threshold)
+        lefts.append(left)
+        values.append(value)
+        roots.append(offset)
+
+        offset += feature.shape[0]
+        max_depth = max(max_depth, int(tree.max_depth))
+
+    return CompiledForest(
+        feature=np.concatenate(features).astype(np.intp),
+        threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+        left=np.concatenate(lefts),
+        value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+        roots=np.asarray(roots, dtype=np.intp),
+        n_features=int(estimator.n_features_in_),
+        max_depth=max_depth,
+    )
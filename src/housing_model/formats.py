@@ -0,0 +1,85 @@
+import io
+import json
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+try:  # optional, several times faster on large bodies
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON = "application/json"
+ARROW = "application/vnd.apache.arrow.stream"
+NPY = "application/x-npy"
+MEDIA_TYPES = (JSON, ARROW, NPY)
+
+
+class UnsupportedFormat(Exception):
+    """Content-Type / Accept that /predict cannot handle (-> 415 / 406)."""
+
+
+def media_type(header: Optional[str], default: str = JSON) -> str:
+    value = (header or "").split(";")[0].strip().lower()
+    return value or default
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """First supported type in the Accept header (q-values ignored); JSON for */* or none."""
+    for part in (accept or "").split(","):
+        value = media_type(part, default="")
+        if value in MEDIA_TYPES:
+            return value
+        if value in ("*/*", "application/*"):
+            return JSON
+    if not accept:
+        return JSON
+    raise UnsupportedFormat(f"Cannot produce any of: {accept} (supported: {', '.join(MEDIA_TYPES)})")
+
+
+def loads_json(body: bytes) -> Any:
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+def dumps_json(payload: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=lambda a: a.tolist() if isinstance(a, np.ndarray) else str(a)).encode()
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise UnsupportedFormat("Arrow bodies need pyarrow: pip install pyarrow") from e
+    return pa
+
+
+def decode_columns(content_type: str, body: bytes) -> Dict[str, Any]:
+    """Arrow IPC stream or .npy structured array -> {column: 1-d array}."""
+    if content_type == ARROW:
+        pa = _pyarrow()
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+        return {name: table.column(name).to_numpy(zero_copy_only=False) for name in table.column_names}
+    if content_type == NPY:
+        arr = np.load(io.BytesIO(body), allow_pickle=False)
+        if arr.dtype.names is None:
+            raise ValueError("NPY body must be a structured array with one field per column")
+        return {name: arr[name] for name in arr.dtype.names}
+    raise UnsupportedFormat(f"Unsupported Content-Type: {content_type} (supported: {', '.join(MEDIA_TYPES)})")
+
+
+def encode_predictions(accept: str, predictions: np.ndarray, extra: Dict[str, Any]) -> Tuple[bytes, str]:
+    """JSON keeps the PredictResponse shape; the binary types carry predictions only."""
+    if accept == NPY:
+        buf = io.BytesIO()
+        np.save(buf, np.asarray(predictions, dtype=np.float64), allow_pickle=False)
+        return buf.getvalue(), NPY
+    if accept == ARROW:
+        pa = _pyarrow()
+        table = pa.table({"prediction": np.asarray(predictions, dtype=np.float64)})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes(), ARROW
+    return dumps_json({"predictions": np.asarray(predictions, dtype=np.float64), **extra}), JSON
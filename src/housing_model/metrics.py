@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+# milliseconds; covers a cached single row (~0.1 ms) up to a large batch
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 2500.0, 10000.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class StageTimer:
+    """Per-request monotonic spans: stage name -> milliseconds (repeated stages add up)."""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.labels: Dict[str, str] = {}
+
+    def add(self, stage: str, ms: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + ms
+
+    def server_timing(self) -> str:
+        # Server-Timing header value, e.g. "validate;dur=0.412, forest;dur=0.180"
+        return ", ".join(f"{name};dur={ms:.3f}" for name, ms in self.stages.items())
+
+
+_current: ContextVar[Optional[StageTimer]] = ContextVar("housing_stage_timer", default=None)
+
+
+def start_timer() -> StageTimer:
+    timer = StageTimer()
+    _current.set(timer)
+    return timer
+
+
+def current_timer() -> Optional[StageTimer]:
+    return _current.get()
+
+
+class span:
+    """Time a block into the current request's StageTimer; a no-op outside a request.
+
+    A plain class rather than @contextmanager: it never re-raises through a generator,
+    so exceptions (e.g. frozen SchemaError) pass through untouched.
+    """
+
+    __slots__ = ("stage", "_timer", "_t0")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self) -> None:
+        self._timer = _current.get()
+        self._t0 = time.perf_counter()
+
+    def __exit__(self, *exc) -> bool:
+        if self._timer is not None:
+            self._timer.add(self.stage, (time.perf_counter() - self._t0) * 1000.0)
+        return False
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _label_str(key: LabelKey, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(x: float) -> str:
+    return "+Inf" if x == float("inf") else repr(float(x))
+
+
+class MetricsRegistry:
+    """Histograms and counters rendered in the Prometheus text format (no client library)."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        self._help[name] = (kind, help_text)
+
+    @staticmethod
+    def _key(labels: Dict[str, str]) -> LabelKey:
+        return tuple(sorted((k, str(v).replace('"', "'")) for k, v in labels.items()))
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = _Histogram(self.buckets)
+            hist.observe(value)
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                self._header(lines, name, "histogram")
+                for key, h in sorted(series.items()):
+                    cum = 0
+                    for le, c in zip(self.buckets + (float("inf"),), h.counts):
+                        cum += c
+                        le_label = 'le="%s"' % _fmt(le)
+                        lines.append(f"{name}_bucket{_label_str(key, le_label)} {cum}")
+                    lines.append(f"{name}_sum{_label_str(key)} {_fmt(h.sum)}")
+                    lines.append(f"{name}_count{_label_str(key)} {h.count}")
+            for name, series in sorted(self._counters.items()):
+                self._header(lines, name, "counter")
+                for key, v in sorted(series.items()):
+                    lines.append(f"{name}{_label_str(key)} {_fmt(v)}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: List[str], name: str, kind: str) -> None:
+        help_text = self._help.get(name, (kind, ""))[1]
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
@@ -0,0 +1,247 @@
+import asyncio
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .metrics import MetricsRegistry, current_timer, start_timer
+
+DEBUG_HEADER = b"x-debug-timing"
+
+REQUEST_LATENCY = "housing_request_latency_ms"
+STAGE_LATENCY = "housing_stage_latency_ms"
+REQUESTS = "housing_requests_total"
+REJECTIONS = "housing_rejections_total"
+
+
+def handler_started(scope: Dict[str, Any]) -> None:
+    """Call first thing in a handler: time since the request arrived is stage "parse"."""
+    timer, t0 = current_timer(), scope.get("state", {}).get("timing_start")
+    if timer is not None and t0 is not None:
+        timer.add("parse", (time.perf_counter() - t0) * 1000.0)
+
+
+def handler_finished(scope: Dict[str, Any]) -> None:
+    """Call when the handler returns: time until the response starts is stage "serialize"."""
+    scope.setdefault("state", {})["timing_handler_end"] = time.perf_counter()
+
+
+class TimingMiddleware:
+    """Plain ASGI middleware: whole-request latency plus the stage spans of the handler.
+
+    Handlers add spans with ``metrics.span``; ``handler_started``/``handler_finished``
+    attribute the time before them to "parse" (body read, JSON decode, request model)
+    and after them to "serialize" (response model, JSON encode). With the
+    ``X-Debug-Timing: 1`` request header the stages are returned in ``Server-Timing``.
+    """
+
+    def __init__(self, app: Callable, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+        registry.describe(REQUEST_LATENCY, "histogram", "Request latency in milliseconds")
+        registry.describe(STAGE_LATENCY, "histogram", "Per-stage latency in milliseconds")
+        registry.describe(REQUESTS, "counter", "Requests by endpoint and status")
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        t0 = time.perf_counter()
+        timer = start_timer()
+        state = scope.setdefault("state", {})
+        state["timing_start"] = t0
+        debug = any(k == DEBUG_HEADER and v not in (b"", b"0") for k, v in scope.get("headers", []))
+        status = {"code": 500}
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                end = state.get("timing_handler_end")
+                if end is not None:
+                    timer.add("serialize", (time.perf_counter() - end) * 1000.0)
+                if debug:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", timer.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            total_ms = (time.perf_counter() - t0) * 1000.0
+            route = scope.get("route")
+            labels = {
+                "endpoint": getattr(route, "path", "unmatched"),
+                "run_id": timer.labels.get("run_id", "none"),
+            }
+            self.registry.observe(REQUEST_LATENCY, total_ms, **labels)
+            self.registry.inc(REQUESTS, **labels, status=str(status["code"]))
+            for stage, ms in timer.stages.items():
+                self.registry.observe(STAGE_LATENCY, ms, stage=stage, **labels)
+
+
+class AdmissionControl:
+    """Limits for the inference paths: body size, rows per request and concurrent requests.
+
+    At most ``max_concurrency`` requests run; up to ``max_queue`` more wait, each for at
+    most ``queue_timeout_ms``. Requests still uploading their body count against the same
+    total (``reserve``), so anything beyond is rejected before its body is read and memory
+    stays around (max_concurrency + max_queue) * max_body_bytes whatever the offered load.
+    """
+
+    def __init__(self, registry: MetricsRegistry, *, paths: Sequence[str] = ("/predict",),
+                 max_body_bytes: int = 1 << 20, max_rows: int = 10_000, max_concurrency: int = 4,
+                 max_queue: int = 64, queue_timeout_ms: float = 1000.0, retry_after_seconds: int = 1):
+        self.registry = registry
+        self.paths = set(paths)
+        self.max_body_bytes = int(max_body_bytes)
+        self.max_rows = int(max_rows)
+        self.max_concurrency = int(max_concurrency)
+        self.max_queue = int(max_queue)
+        self.queue_timeout = float(queue_timeout_ms) / 1000.0
+        self.retry_after_seconds = int(retry_after_seconds)
+
+        self.active = 0
+        self.waiting = 0
+        self.reading = 0
+        self.rejections: Dict[str, int] = {}
+        self._sem: Optional[asyncio.Semaphore] = None
+        registry.describe(REJECTIONS, "counter", "Requests rejected by admission control")
+
+    def reject(self, reason: str, endpoint: str) -> None:
+        self.rejections[reason] = self.rejections.get(reason, 0) + 1
+        self.registry.inc(REJECTIONS, endpoint=endpoint, reason=reason)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "reading": self.reading,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "max_rows": self.max_rows,
+            "max_body_bytes": self.max_body_bytes,
+            "rejections": dict(self.rejections),
+        }
+
+    def reserve(self) -> Optional[str]:
+        """Room for one more body read: None (call ``unreserve`` once read), else the rejection reason."""
+        if self.active + self.waiting + self.reading >= self.max_concurrency + self.max_queue:
+            return "queue_full"
+        self.reading += 1
+        return None
+
+    def unreserve(self) -> None:
+        self.reading -= 1
+
+    async def acquire(self) -> Optional[str]:
+        """None once a slot is held, else the rejection reason."""
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+        if not self._sem.locked():
+            await self._sem.acquire()  # free slot: returns without yielding
+            self.active += 1
+            return None
+        if self.waiting >= self.max_queue:
+            return "queue_full"
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._sem.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            return "queue_timeout"
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        return None
+
+    def release(self) -> None:
+        self.active -= 1
+        self._sem.release()
+
+
+# reason -> (status, detail)
+_REJECT = {
+    "body_too_large": (413, "Request body too large"),
+    "queue_full": (429, "Too many requests, retry later"),
+    "queue_timeout": (503, "Server overloaded, retry later"),
+}
+
+
+async def _send_rejection(send: Callable, status: int, detail: str, retry_after: Optional[int]) -> None:
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    headers: List = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    if retry_after is not None:
+        headers.append((b"retry-after", str(retry_after).encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """Enforces ``app.state.admission`` (an AdmissionControl) on its paths; no-op if unset.
+
+    A request first reserves room among the running, queued and uploading ones (else 429
+    before any of the upload is read). Its body is then read (up to the limit) before a
+    concurrency slot is taken, so slow uploads never hold a slot; it is then replayed to the app.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        control: Optional[AdmissionControl] = None
+        if scope["type"] == "http":
+            control = getattr(scope["app"].state, "admission", None)
+        if control is None or scope["path"] not in control.paths:
+            await self.app(scope, receive, send)
+            return
+        endpoint = scope["path"]
+
+        def too_large():
+            control.reject("body_too_large", endpoint)
+            return _send_rejection(send, *_REJECT["body_too_large"], None)
+
+        for k, v in scope.get("headers", []):
+            if k == b"content-length" and v.isdigit() and int(v) > control.max_body_bytes:
+                await too_large()
+                return
+
+        reason = control.reserve()
+        if reason is None:
+            try:
+                chunks: List[bytes] = []
+                size = 0
+                while True:
+                    message = await receive()
+                    if message["type"] == "http.disconnect":
+                        return
+                    chunk = message.get("body", b"")
+                    size += len(chunk)
+                    if size > control.max_body_bytes:
+                        await too_large()
+                        return
+                    chunks.append(chunk)
+                    if not message.get("more_body", False):
+                        break
+                body = b"".join(chunks)
+            finally:
+                control.unreserve()
+            # no await between unreserve and acquire: the request moves straight to active/waiting
+            reason = await control.acquire()
+        if reason is not None:
+            control.reject(reason, endpoint)
+            await _send_rejection(send, *_REJECT[reason], control.retry_after_seconds)
+            return
+
+        sent = False
+
+        async def replay() -> Dict[str, Any]:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        try:
+            await self.app(scope, replay, send)
+        finally:
+            control.release()
@@ -3,7 +3,8 @@ from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
 from sklearn.pipeline import make_pipeline
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Ridge
 
 from .features import ratio_transformer, log_transformer
 
@@ -46,13 +47,22 @@ def make_preprocessing() -> ColumnTransformer:
 
     return preprocessing
 
-def make_model(random_state: int, n_jobs: int):
-    return RandomForestRegressor(
-        random_state=random_state,
-        n_jobs=n_jobs,
-    )
+MODEL_TYPES = ("random_forest", "hist_gradient_boosting", "linear")
+
+def make_model(random_state: int, n_jobs: int, model_type: str = "random_forest"):
+    if model_type == "random_forest":
+        return RandomForestRegressor(
+            random_state=random_state,
+            n_jobs=n_jobs,
+        )
+    if model_type == "hist_gradient_boosting":
+        # threads come from OpenMP (threadpoolctl), there is no n_jobs
+        return HistGradientBoostingRegressor(random_state=random_state)
+    if model_type == "linear":
+        return Ridge()
+    raise ValueError(f"Unknown model.type: {model_type!r} (expected one of {MODEL_TYPES})")
 
-def build_pipeline(random_state: int, n_jobs: int):
+def build_pipeline(random_state: int, n_jobs: int, model_type: str = "random_forest"):
     preprocessing = make_preprocessing()
-    model = make_model(random_state=random_state, n_jobs=n_jobs)
+    model = make_model(random_state=random_state, n_jobs=n_jobs, model_type=model_type)
     return make_pipeline(preprocessing, model)
\ No newline at end of file
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import logging
+import mmap
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .reload import warm_up
+
+if TYPE_CHECKING:
+    from .predictor import Predictor
+
+logger = logging.getLogger(__name__)
+
+
+def _is_mapped(arr: np.ndarray) -> bool:
+    base = arr
+    while base is not None:
+        if isinstance(base, (np.memmap, mmap.mmap)):
+            return True
+        base = getattr(base, "base", None)
+    return False
+
+
+def _array_bytes(obj: Any, seen: Dict[int, Any]) -> int:
+    if id(obj) in seen:
+        return 0
+    seen[id(obj)] = obj  # keep temporaries alive so their ids are not reused
+    if isinstance(obj, np.ndarray):
+        return 0 if _is_mapped(obj) else int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sum(_array_bytes(v, seen) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(_array_bytes(v, seen) for v in obj)
+    if type(obj).__name__ == "Tree":
+        # sklearn's Cython Tree keeps its nodes/values outside __dict__
+        return _array_bytes(obj.__getstate__(), seen)
+    if hasattr(obj, "__dict__"):
+        return _array_bytes(vars(obj), seen)
+    return 0
+
+
+def predictor_nbytes(pred: Predictor) -> int:
+    """Resident array bytes of a loaded model (memory-mapped arrays are shared, not counted)."""
+    seen: Dict[int, Any] = {}
+    return sum(_array_bytes(part, seen) for part in (pred.model, pred.preprocessing, pred.forest, pred.transform))
+
+
+class ModelPool:
+    """Registry runs other than the active one, loaded on first use and kept in LRU order.
+
+    The pool holds at most ``max_models`` predictors and ``max_bytes`` of their arrays
+    (``predictor_nbytes``); the least recently used ones are dropped first. Concurrent
+    first requests for a run share one load. An evicted predictor stays alive until the
+    requests holding it finish.
+    """
+
+    def __init__(self, load: Callable[[str], Predictor], max_bytes: int = 1 << 30, max_models: int = 4,
+                 sizeof: Callable[[Predictor], int] = predictor_nbytes):
+        self._load = load
+        self._sizeof = sizeof
+        self.max_bytes = int(max_bytes)
+        self.max_models = max(1, int(max_models))
+
+        self._models: "OrderedDict[str, Tuple[Predictor, int]]" = OrderedDict()
+        self._loading: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+
+        self.hits = 0
+        self.loads = 0
+        self.shared_loads = 0
+        self.load_errors = 0
+        self.evictions = 0
+
+    def get(self, run_id: str) -> Predictor:
+        with self._lock:
+            entry = self._models.get(run_id)
+            if entry is not None:
+                self._models.move_to_end(run_id)
+                self.hits += 1
+                return entry[0]
+            future = self._loading.get(run_id)
+            owner = future is None
+            if owner:
+                future = self._loading[run_id] = Future()
+                self.loads += 1
+            else:
+                self.shared_loads += 1
+        if not owner:
+            return future.result()
+
+        try:
+            t0 = time.perf_counter()
+            pred = self._load(run_id)
+            load_seconds = time.perf_counter() - t0
+            warmup_seconds = warm_up(pred)
+            nbytes = self._sizeof(pred)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[run_id]
+                self.load_errors += 1
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._loading[run_id]
+            self._models[run_id] = (pred, nbytes)
+            self._bytes += nbytes
+            evicted = self._evict()
+        future.set_result(pred)
+        logger.info("Pool loaded run_id=%s bytes=%d load_seconds=%.3f warmup_seconds=%.3f evicted=%s",
+                    run_id, nbytes, load_seconds, warmup_seconds, evicted)
+        return pred
+
+    def _evict(self) -> List[str]:
+        # the newest model always stays, even when it alone is over max_bytes
+        evicted = []
+        while len(self._models) > 1 and (self._bytes > self.max_bytes or len(self._models) > self.max_models):
+            run_id, (_, nbytes) = self._models.popitem(last=False)
+            self._bytes -= nbytes
+            self.evictions += 1
+            evicted.append(run_id)
+        return evicted
+
+    def discard(self, run_id: Optional[str]) -> None:
+        with self._lock:
+            entry = self._models.pop(run_id, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+
+    def loaded(self) -> Dict[str, int]:
+        with self._lock:
+            return {run_id: nbytes for run_id, (_, nbytes) in self._models.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "models": len(self._models),
+                "bytes": self._bytes,
+                "max_models": self.max_models,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "loads": self.loads,
+                "shared_loads": self.shared_loads,
+                "load_errors": self.load_errors,
+                "evictions": self.evictions,
+            }
@@ -1,12 +1,24 @@
 from __future__ import annotations
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Any, Dict, Optional
 import json
+import logging
 import joblib
+import numpy as np
+from joblib import parallel_config
 import pandas as pd
 
-from .schema import validate_dataframe, REQUIRED_COLUMNS
+from .schema import validate_dataframe, ValidatedBatch
 from .profiling import compare_to_profile
+from .forest import CompiledForest, compile_forest
+from .metrics import span
+from .transform import CompiledPreprocessor, compile_preprocessing, max_abs_difference, probe_frame
+from .registry import SERVING_FORMAT, ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ("sklearn", "compiled")
 
 @dataclass
 class Predictor:
@@ -14,24 +26,86 @@ class Predictor:
     training_profile: Optional[Dict[str, Any]] = None
     allow_extra_columns: bool = False
     strict_categories:bool = False
+    forest: Optional[CompiledForest] = None
+    transform: Optional[CompiledPreprocessor] = None
+    preprocessing: Any = None   # fitted steps before the estimator; defaults to model[:-1]
+    run_id: Optional[str] = None
+    # forest threads per call: 1 below parallel_min_rows, then one per parallel_min_rows rows
+    parallel_min_rows: int = 0  # 0 = always single-threaded
+    max_threads: int = 1
+
+    def __post_init__(self):
+        if self.preprocessing is None and self.model is not None:
+            self.preprocessing = self.model[:-1]
+
+    def set_parallelism(self, parallel_min_rows: int, max_threads: int) -> None:
+        self.parallel_min_rows = max(0, int(parallel_min_rows))
+        self.max_threads = max(1, int(max_threads))
+        # a forest trained with n_jobs=-1 would fan every call out to all cores;
+        # with n_jobs=None sklearn takes the per-call count from parallel_config
+        if self.model is not None and hasattr(self.model[-1], "n_jobs"):
+            self.model[-1].n_jobs = None
+
+    def n_jobs_for(self, n_rows: int) -> int:
+        if self.parallel_min_rows <= 0 or n_rows < self.parallel_min_rows:
+            return 1
+        return min(self.max_threads, n_rows // self.parallel_min_rows)
+
+    @property
+    def engine(self) -> str:
+        return "compiled" if self.forest is not None else "sklearn"
+
+    @property
+    def transform_engine(self) -> str:
+        return "compiled" if self.transform is not None else "sklearn"
+
+    def _features(self, batch: ValidatedBatch) -> np.ndarray:
+        if self.transform is not None:
+            return self.transform.transform_batch(batch)
+        features = self.preprocessing.transform(batch.to_frame())
+        if hasattr(features, "toarray"):
+            features = features.toarray()
+        return features
+
+    def _predict_array(self, batch: ValidatedBatch) -> np.ndarray:
+        n_jobs = self.n_jobs_for(len(batch))
+        if self.forest is None and self.transform is None:
+            with span("model"), parallel_config(backend="threading", n_jobs=n_jobs):
+                return self.model.predict(batch.to_frame())
+        with span("transform"):
+            features = self._features(batch)
+        with span("forest"):
+            if self.forest is not None:
+                return self.forest.predict(features, n_jobs=n_jobs)
+            with parallel_config(backend="threading", n_jobs=n_jobs):
+                return self.model[-1].predict(features)
+
+    def score(self, batch: ValidatedBatch) -> np.ndarray:
+        return np.asarray(self._predict_array(batch), dtype=np.float64)
+
+    def drift(self, batch: ValidatedBatch) -> Optional[Dict[str, Any]]:
+        if self.training_profile is None:
+            return None
+        return compare_to_profile(batch.to_frame(), self.training_profile)
+
+    def predict_batch(self, batch: ValidatedBatch) -> Dict[str, Any]:
+        """Score an already validated batch (see schema.validate_records)."""
+        predictions = self.score(batch).tolist()
+        with span("drift"):
+            drift = self.drift(batch)
+        return {"predictions": predictions, "drift": drift}
 
     def predict_df(self, df: pd.DataFrame) -> Dict[str, Any]:
-        x = validate_dataframe(
-            df,
-            allow_extra_columns = self.allow_extra_columns,
-            strict_categories = self.strict_categories,
-            require_non_empty = True,
-        )
-        x = x[REQUIRED_COLUMNS]
-
-        preds  = self.model.predict(x)
-        preds = [float(p) for p in preds]
-
-        drift = None
-        if self.training_profile is not None:
-            drift = compare_to_profile(x, self.training_profile)
-        
-        return {"predictions": preds, "drift":drift}
+        with span("validate"):
+            x = validate_dataframe(
+                df,
+                allow_extra_columns = self.allow_extra_columns,
+                strict_categories = self.strict_categories,
+                require_non_empty = True,
+            )
+        with span("frame_to_batch"):
+            batch = ValidatedBatch.from_frame(x)
+        return self.predict_batch(batch)
     
 def _load_json_optional(path: str) -> Optional[Dict[str, Any]]:
     try: 
@@ -47,7 +121,126 @@ def _load_json_optional(path: str) -> Optional[Dict[str, Any]]:
     except json.JSONDecodeError:
         return None
     
-def load_predictor(model_path: str, training_profile_path: str | None = None) -> Predictor:
-    model = joblib.load(model_path)
+def compile_transform(preprocessing: Any, profile: Optional[Dict[str, Any]]) -> Optional[CompiledPreprocessor]:
+    """Compiled twin of a fitted preprocessing pipeline, or None if it can't reproduce sklearn exactly."""
+    try:
+        compiled = compile_preprocessing(preprocessing)
+    except (TypeError, ValueError, AttributeError) as e:
+        logger.warning("Compiled transform unavailable, falling back to sklearn: %s", e)
+        return None
+
+    # must reproduce the sklearn feature matrix exactly, otherwise don't use it
+    diff = max_abs_difference(preprocessing, compiled, probe_frame(profile))
+    if diff != 0.0:
+        logger.warning("Compiled transform differs from sklearn (max_abs_diff=%g), disabled", diff)
+        return None
+
+    logger.info("Compiled transform: features=%d imputed_slots=%d",
+                compiled.n_features_out, len(compiled.slot_columns))
+    return compiled
+
+
+def _registry_run_id(model_path: str) -> Optional[str]:
+    """run_id for a registry path (`<run_id>.joblib` or the `active` link), else None."""
+    p = Path(model_path)
+    registry = ModelRegistry(p.parent)
+    if p.name == registry.active_symlink().name:
+        try:
+            return registry.active_run_id()
+        except FileNotFoundError:
+            return None
+    if p.name.endswith(".joblib"):
+        return p.name[:-len(".joblib")]
+    return None
+
+
+def _plain_arrays(forest: CompiledForest) -> CompiledForest:
+    # plain ndarray views over the mapped pages (np.memmap subclass overhead on every gather)
+    for name in ("feature", "threshold", "left", "value", "roots"):
+        setattr(forest, name, np.asarray(getattr(forest, name)))
+    return forest
+
+
+def _load_bundle(model_path: str, run_id: Optional[str], compact: bool = False,
+                 mmap: bool = True) -> Optional[Dict[str, Any]]:
+    if run_id is None:
+        return None
+    registry = ModelRegistry(Path(model_path).parent)
+    path = registry.compact_path(run_id) if compact else registry.mmap_path(run_id)
+    if not path.exists():
+        logger.warning("No %s artifact at %s, loading %s instead",
+                       "compact" if compact else "memory-mapped", path, model_path)
+        return None
+    bundle = joblib.load(path, mmap_mode="r" if mmap else None)
+    _plain_arrays(bundle["forest"])
+    return bundle
+
+
+def _load_serving(model_path: str, run_id: Optional[str], mmap: bool) -> Optional[Predictor]:
+    if run_id is None:
+        return None
+    path = ModelRegistry(Path(model_path).parent).serving_path(run_id)
+    if not path.exists():
+        logger.warning("No serving artifact at %s, loading %s instead", path, model_path)
+        return None
+    bundle = joblib.load(path, mmap_mode="r" if mmap else None)
+    if bundle.get("format") != SERVING_FORMAT:
+        logger.warning("Serving artifact %s has format %s (expected %s), loading %s instead",
+                       path, bundle.get("format"), SERVING_FORMAT, model_path)
+        return None
+    forest = _plain_arrays(bundle["forest"])
+    return Predictor(model=None, forest=forest, transform=bundle["transform"],
+                     training_profile=bundle.get("training_profile"), run_id=run_id)
+
+
+def load_predictor(model_path: str, training_profile_path: str | None = None,
+                   engine: str = "sklearn", transform: str = "sklearn", mmap: bool = False,
+                   compact: bool = False, serving: bool = False) -> Predictor:
+    """Load a registry model.
+
+    With ``mmap=True`` the `<run_id>.mmap.joblib` layout is used instead: the compiled
+    forest's arrays are memory-mapped, so worker processes on one host share them
+    through the page cache and the sklearn forest is never unpickled.
+    ``compact=True`` loads `<run_id>.compact.joblib` (see ``forest.compact_forest``)
+    the same way; predictions are within the bound it was written with.
+    ``serving=True`` loads `<run_id>.serving.joblib`: compiled forest and transform
+    (checked at training time) plus the training profile, so neither sklearn nor the
+    Pipeline is unpickled. It takes precedence over the other layouts when present.
+    """
+    for name, value in (("engine", engine), ("transform", transform)):
+        if value not in ENGINES:
+            raise ValueError(f"Unknown inference {name}: {value!r} (expected one of {ENGINES})")
+
+    run_id = _registry_run_id(model_path)
+    if serving:
+        pred = _load_serving(model_path, run_id, mmap)
+        if pred is not None:
+            if pred.training_profile is None and training_profile_path:
+                pred.training_profile = _load_json_optional(training_profile_path)
+            logger.info("Serving artifact: run_id=%s trees=%d nodes=%d bytes=%d mmap=%s",
+                        run_id, pred.forest.n_trees, pred.forest.n_nodes, pred.forest.nbytes, mmap)
+            return pred
     profile = _load_json_optional(training_profile_path) if training_profile_path else None
-    return Predictor(model=model, training_profile=profile)
\ No newline at end of file
+
+    bundle = _load_bundle(model_path, run_id, compact=compact, mmap=mmap) if (mmap or compact) else None
+    if bundle is not None:
+        model, preprocessing, forest = None, bundle["preprocessing"], bundle["forest"]
+    else:
+        model = joblib.load(model_path)
+        preprocessing, forest = model[:-1], None
+
+    if forest is None and engine == "compiled":
+        try:
+            forest = compile_forest(model[-1])
+        except (TypeError, ValueError) as e:
+            # e.g. a non-forest final step; the sklearn path still works
+            logger.warning("Compiled engine unavailable, falling back to sklearn: %s", e)
+    if forest is not None:
+        logger.info("Compiled forest: trees=%d nodes=%d max_depth=%d bytes=%d mmap=%s compact=%s",
+                    forest.n_trees, forest.n_nodes, forest.max_depth, forest.nbytes,
+                    bundle is not None and mmap, forest.compact)
+
+    compiled_transform = compile_transform(preprocessing, profile) if transform == "compiled" else None
+
+    return Predictor(model=model, training_profile=profile, forest=forest, transform=compiled_transform,
+                     preprocessing=preprocessing, run_id=run_id)
@@ -1,28 +1,61 @@
-from typing import Any, Dict 
+from typing import Any, Dict, Iterable
+import warnings
+import numpy as np
 import pandas as pd 
 
 from .schema import REQUIRED_NUMERIC, REQUIRED_CATEGORICAL
+from .sketches import FrequencyCounter, QuantileSketch
+
+PROFILE_QUANTILES = {'q01': 0.01, 'q05': 0.05, 'q50': 0.50, 'q95': 0.95, 'q99': 0.99}
 
 def build_training_profile(df: pd.DataFrame) -> Dict[str, Any]:
     profile: Dict[str, Any] = {'numeric': {}, 'categorical': {}}
 
-    for col in REQUIRED_NUMERIC:
-        s = df[col] 
-        profile['numeric'][col] = {
-            'count': int(s.notna().sum()),
-            'q01': float(s.quantile(0.01)),
-            'q05': float(s.quantile(0.05)),
-            'q50': float(s.quantile(0.50)),
-            'q95': float(s.quantile(0.95)),
-            'q99': float(s.quantile(0.99)),
-        }
+    # butun numeric sutunlar ve quantile-lar bir defeye (Series.quantile ile eyni 'linear' metod)
+    arr = df[REQUIRED_NUMERIC].to_numpy(dtype=np.float64)
+    counts = (~np.isnan(arr)).sum(axis=0)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN column -> nan, like pandas
+        qs = np.nanquantile(arr, list(PROFILE_QUANTILES.values()), axis=0)
+
+    for j, col in enumerate(REQUIRED_NUMERIC):
+        profile['numeric'][col] = {'count': int(counts[j])}
+        for i, name in enumerate(PROFILE_QUANTILES):
+            profile['numeric'][col][name] = float(qs[i, j])
 
     for col in REQUIRED_CATEGORICAL:
-        freq = df[col].fillna("<<MISSING>>").value_counts(normalize=True)
+        # object first: a categorical column would reject the fill value and report unused categories
+        freq = df[col].astype(object).fillna("<<MISSING>>").value_counts(normalize=True)
         profile['categorical'][col] = {k: float(v) for k, v in freq.to_dict().items()}
     return profile
 
 
+def build_training_profile_chunks(chunks: Iterable[pd.DataFrame],
+                                  relative_accuracy: float = 0.005) -> Dict[str, Any]:
+    """Same JSON as build_training_profile from a stream of chunks (e.g. read_csv(chunksize=...)).
+
+    Counts and category frequencies are exact; quantiles come from mergeable sketches, so
+    they are sample values within `relative_accuracy` of the true rank (no interpolation).
+    """
+    sketches = {c: QuantileSketch(relative_accuracy) for c in REQUIRED_NUMERIC}
+    counters = {c: FrequencyCounter() for c in REQUIRED_CATEGORICAL}
+
+    for chunk in chunks:
+        arr = chunk[REQUIRED_NUMERIC].to_numpy(dtype=np.float64)
+        for j, col in enumerate(REQUIRED_NUMERIC):
+            sketches[col].add(arr[:, j])
+        for col in REQUIRED_CATEGORICAL:
+            counters[col].counts.update(chunk[col].astype(object).fillna("<<MISSING>>").value_counts().to_dict())
+
+    profile: Dict[str, Any] = {'numeric': {}, 'categorical': {}}
+    for col, sketch in sketches.items():
+        values = sketch.quantiles(PROFILE_QUANTILES.values())
+        profile['numeric'][col] = {'count': sketch.count, **dict(zip(PROFILE_QUANTILES, values))}
+    for col, counter in counters.items():
+        profile['categorical'][col] = {k: float(v) for k, v in counter.top(len(counter.counts))}
+    return profile
+
+
 def compare_to_profile(df: pd.DataFrame, profile: Dict[str, Any]) -> Dict[str, Any]:
 
     out: Dict[str, Any] = {'numeric': {}, 'categorical': {}}
@@ -7,6 +7,10 @@ from pathlib import Path
 
 import joblib
 
+from .forest import compact_forest, compile_forest
+
+SERVING_FORMAT = 1
+
 
 @dataclass(frozen=True)
 class ModelRegistry:
@@ -19,13 +23,69 @@ class ModelRegistry:
         # keep file extension stable for tools
         return self.registry_dir / f"{run_id}.joblib"
 
+    def mmap_path(self, run_id: str) -> Path:
+        # preprocessing + compiled forest, uncompressed so joblib can memory-map the arrays
+        return self.registry_dir / f"{run_id}.mmap.joblib"
+
+    def compact_path(self, run_id: str) -> Path:
+        # mmap layout with float32 thresholds, quantized leaves and narrow indices
+        return self.registry_dir / f"{run_id}.compact.joblib"
+
+    def serving_path(self, run_id: str) -> Path:
+        # inference-only bundle: compiled forest + compiled transform + training profile
+        return self.registry_dir / f"{run_id}.serving.joblib"
+
+    def runs(self) -> list[str]:
+        """run_ids with a `<run_id>.joblib` model, oldest first."""
+        if not self.registry_dir.is_dir():
+            return []
+        paths = [p for p in self.registry_dir.glob("*.joblib")
+                 if not p.name.endswith((".mmap.joblib", ".compact.joblib", ".serving.joblib"))]
+        return [p.name[:-len(".joblib")] for p in sorted(paths, key=lambda p: (p.stat().st_mtime, p.name))]
+
     def active_symlink(self) -> Path:
         return self.registry_dir / "active"
 
+    def active_run_file(self) -> Path:
+        return self.registry_dir / "active.run_id"
+
     def save(self, model, run_id: str) -> Path:
         self.ensure()
         path = self.model_path(run_id)
         joblib.dump(model, path)
+        self.save_mmap(model, run_id)
+        return path
+
+    def save_mmap(self, model, run_id: str) -> Path | None:
+        """Write the memory-mappable serving layout; skipped for non-forest models."""
+        try:
+            forest = compile_forest(model[-1])
+        except (TypeError, ValueError):
+            return None
+        path = self.mmap_path(run_id)
+        joblib.dump({"run_id": run_id, "preprocessing": model[:-1], "forest": forest}, path)
+        return path
+
+    def save_compact(self, model, run_id: str, max_leaf_error: float = 0.0) -> Path | None:
+        """Write the compact serving layout; predictions stay within max_leaf_error."""
+        try:
+            forest = compact_forest(compile_forest(model[-1]), max_leaf_error=max_leaf_error)
+        except (TypeError, ValueError):
+            return None
+        path = self.compact_path(run_id)
+        joblib.dump({"run_id": run_id, "preprocessing": model[:-1], "forest": forest,
+                     "max_leaf_error": float(max_leaf_error)}, path)
+        return path
+
+    def save_serving(self, run_id: str, forest, transform, training_profile=None) -> Path:
+        """Write the inference-only artifact; loading it imports neither sklearn nor the Pipeline.
+
+        ``transform`` must already be checked against the fitted preprocessing.
+        """
+        self.ensure()
+        path = self.serving_path(run_id)
+        joblib.dump({"format": SERVING_FORMAT, "run_id": run_id, "forest": forest, "transform": transform,
+                     "training_profile": training_profile}, path)
         return path
 
     def set_active(self, run_id: str) -> Path:
@@ -45,6 +105,9 @@ class ModelRegistry:
         except OSError:
             shutil.copy2(target, link)
 
+        # the copy fallback loses the run_id, so record it next to the link
+        self.active_run_file().write_text(run_id, encoding="utf-8")
+
         return link
 
     def resolve_active(self) -> Path:
@@ -52,4 +115,13 @@ class ModelRegistry:
         if not link.exists():
             raise FileNotFoundError("No active model set in registry.")
         # If it's a symlink, resolve; if it's a copied file fallback, use it directly
-        return link.resolve() if link.is_symlink() else link
\ No newline at end of file
+        return link.resolve() if link.is_symlink() else link
+
+    def active_run_id(self) -> str:
+        link = self.active_symlink()
+        if link.is_symlink():
+            return self.resolve_active().stem
+        run_file = self.active_run_file()
+        if run_file.exists():
+            return run_file.read_text(encoding="utf-8").strip()
+        raise FileNotFoundError("No active model set in registry.")
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:  # predictor/schema pull in pandas; the service imports this module at startup
+    from .predictor import Predictor
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up(pred: Predictor, sizes: Tuple[int, ...] = (1, 8, 32)) -> float:
+    """A few synthetic predictions so the first real request doesn't pay for lazy setup."""
+    from .schema import ValidatedBatch, validate_dataframe
+    from .transform import probe_frame
+
+    t0 = time.perf_counter()
+    probe = validate_dataframe(probe_frame(pred.training_profile), allow_extra_columns=True)
+    batch = ValidatedBatch.from_frame(probe)
+    for n in sizes:
+        idx = [i % len(batch) for i in range(n)]
+        pred.score(batch.take(idx))
+    return time.perf_counter() - t0
+
+
+def _signature(path: str) -> Optional[Tuple[Any, ...]]:
+    # changes when the active link is re-pointed or the copied fallback file is replaced
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return os.path.realpath(path), st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class ModelReloader:
+    """Owns the serving Predictor and swaps it without dropping requests.
+
+    A new model is loaded and warmed up on a background thread while the old one keeps
+    serving; the swap is a single reference assignment, so requests that already hold
+    the old predictor finish on it. Swap listeners run under the reload lock, in swap
+    order, and must not call back into the reloader.
+    """
+
+    def __init__(self, load: Callable[[], Predictor], watch_path: str, poll_seconds: float = 5.0,
+                 on_swap: Optional[Callable[[Predictor], None]] = None):
+        self._load = load
+        self.watch_path = watch_path
+        self.poll_seconds = float(poll_seconds)
+        self._on_swap: List[Callable[[Predictor], None]] = [on_swap] if on_swap else []
+
+        self.current: Optional[Predictor] = None
+        self.info: Dict[str, Any] = {"run_id": None, "reloads": 0, "last_error": None}
+        self._signature: Optional[Tuple[Any, ...]] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_swap_listener(self, fn: Callable[[Predictor], None]) -> None:
+        self._on_swap.append(fn)
+
+    def reload(self, force: bool = False) -> bool:
+        """Load, warm up and swap in the model behind watch_path; False if nothing changed."""
+        with self._lock:
+            signature = _signature(self.watch_path)
+            if signature is None:
+                self.info["last_error"] = f"Model not found: {self.watch_path}"
+                return False
+            if not force and signature == self._signature:
+                return False
+
+            try:
+                t0 = time.perf_counter()
+                pred = self._load()
+                load_seconds = time.perf_counter() - t0
+                warmup_seconds = warm_up(pred)
+            except Exception as e:
+                logger.exception("Model load failed, keeping run_id=%s", self.info["run_id"])
+                self.info["last_error"] = repr(e)
+                return False
+
+            previous = self.current
+            self.current = pred  # atomic swap
+            self._signature = signature
+            self.info.update({
+                "run_id": pred.run_id,
+                "previous_run_id": previous.run_id if previous is not None else None,
+                "load_seconds": load_seconds,
+                "warmup_seconds": warmup_seconds,
+                "loaded_at": time.time(),
+                "reloads": self.info["reloads"] + (previous is not None),
+                "last_error": None,
+            })
+            # still under the lock: a racing reload can't swap in between, so the listeners
+            # (app.state, drift, cache) always end on the same model as self.current
+            for fn in self._on_swap:
+                fn(pred)
+
+        logger.info("Model %s run_id=%s load_seconds=%.3f warmup_seconds=%.3f",
+                    "reloaded" if previous is not None else "loaded",
+                    pred.run_id, load_seconds, warmup_seconds)
+        return True
+
+    def start(self) -> None:
+        if self.poll_seconds <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="model-reloader", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.reload()
+            except Exception:
+                logger.exception("Model watch failed")
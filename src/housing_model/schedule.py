@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import joblib
+from joblib import Parallel, delayed, parallel_config
+from threadpoolctl import threadpool_limits
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("auto", "threads", "processes")
+
+# fit() runs in Cython/OpenMP/BLAS with the GIL released, so threads scale and share the data
+_GIL_FREE = ("RandomForestRegressor", "ExtraTreesRegressor", "HistGradientBoostingRegressor", "Ridge")
+
+
+def available_cores() -> int:
+    """Cores this process may use (affinity and cgroup quotas included)."""
+    return max(1, joblib.cpu_count())
+
+
+def resolve_cores(cores: Optional[int], n_jobs: Optional[int] = None) -> int:
+    """Core budget: ``cores`` if set, else the joblib meaning of ``n_jobs`` (-1 = all available)."""
+    available = available_cores()
+    if cores is not None:
+        if int(cores) > available:
+            logger.warning("Core budget %d is over the %d available cores; using %d", int(cores), available, available)
+        return max(1, min(int(cores), available))
+    if n_jobs is None:
+        return 1
+    n_jobs = int(n_jobs)
+    return max(1, min(n_jobs if n_jobs > 0 else available + 1 + n_jobs, available))
+
+
+def releases_gil(model) -> bool:
+    return type(model).__name__ in _GIL_FREE
+
+
+def _measured(fn: Callable, args: Tuple) -> Tuple[Any, float]:
+    # per-process CPU time: exact for a process worker running one task at a time
+    cpu0 = time.process_time()
+    result = fn(*args)
+    return result, time.process_time() - cpu0
+
+
+class CoreScheduler:
+    """Splits a training core budget between parallel CV fits (outer) and per-model threads (inner).
+
+    ``outer`` fits run at once and each model gets ``cores // outer`` threads: forest
+    ``n_jobs``, and the OpenMP/BLAS pools for the other backends. Task-level parallelism
+    comes first because whole fits scale better than the trees of one fit. Threads are
+    used when the model releases the GIL (the data is shared, nothing is copied), else
+    loky processes (large arrays are memory-mapped, not pickled). Wall and CPU time of
+    every ``run`` are accumulated into a core efficiency: CPU seconds / (wall × cores).
+
+    With ``cores=None`` fits run one at a time and the model keeps its own n_jobs.
+    """
+
+    def __init__(self, cores: Optional[int] = None, outer_jobs: Optional[int] = None, backend: str = "auto"):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown parallel backend: {backend!r} (expected one of {BACKENDS})")
+        self.cores = None if cores is None else max(1, int(cores))
+        self.outer_jobs = None if outer_jobs is None else max(1, int(outer_jobs))
+        self.backend = backend
+
+        self.calls = 0
+        self.tasks = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.core_seconds = 0.0
+        self.plans: Dict[str, int] = {}
+
+    def plan(self, n_tasks: int, model=None) -> Tuple[int, Optional[int], str]:
+        """(outer, inner, backend) for ``n_tasks`` independent fits of ``model``."""
+        if self.cores is None:
+            return 1, None, "sequential"
+        outer = max(1, min(n_tasks, self.outer_jobs or self.cores, self.cores))
+        inner = max(1, self.cores // outer)
+        if outer == 1:
+            return 1, inner, "sequential"
+        backend = self.backend
+        if backend == "auto":
+            backend = "threads" if model is None or releases_gil(model) else "processes"
+        return outer, inner, backend
+
+    @staticmethod
+    def set_threads(model, inner: Optional[int]):
+        """Give the model ``inner`` threads where it has an n_jobs (forests); returns the model."""
+        if inner is not None and "n_jobs" in model.get_params():
+            model.set_params(n_jobs=inner)
+        return model
+
+    def run(self, fn: Callable, tasks: Sequence[Tuple], model=None, label: str = "fits") -> List[Any]:
+        """``[fn(*args) for args in tasks]``, ``outer`` at a time; models in tasks should use ``set_threads``."""
+        tasks = list(tasks)
+        outer, inner, backend = self.plan(len(tasks), model)
+        cores = self.cores or 1
+        t0, cpu0 = time.perf_counter(), time.process_time()
+        if backend == "processes":
+            # loky passes inner_max_num_threads to the workers' OpenMP/BLAS pools
+            with parallel_config(backend="loky", n_jobs=outer, inner_max_num_threads=inner):
+                out = Parallel()(delayed(_measured)(fn, args) for args in tasks)
+            results = [r for r, _ in out]
+            cpu = sum(c for _, c in out)
+        else:
+            limits = threadpool_limits(limits=inner) if inner is not None else nullcontext()
+            with limits:
+                if backend == "threads":
+                    results = Parallel(n_jobs=outer, backend="threading")(delayed(fn)(*args) for args in tasks)
+                else:
+                    results = [fn(*args) for args in tasks]
+            cpu = time.process_time() - cpu0
+        wall = time.perf_counter() - t0
+
+        self.calls += 1
+        self.tasks += len(tasks)
+        self.wall_seconds += wall
+        self.cpu_seconds += cpu
+        self.core_seconds += wall * cores
+        plan = f"{backend} {outer}x{inner or 'model'}"
+        self.plans[plan] = self.plans.get(plan, 0) + len(tasks)
+        logger.info("Parallel %s: tasks=%d plan=%s cores=%d wall=%.2fs cpu=%.2fs core_efficiency=%.0f%%",
+                    label, len(tasks), plan, cores, wall, cpu, 100 * cpu / max(wall * cores, 1e-9))
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cores": self.cores,
+            "outer_jobs": self.outer_jobs,
+            "backend": self.backend,
+            "calls": self.calls,
+            "tasks": self.tasks,
+            "plans": dict(self.plans),
+            "wall_seconds": self.wall_seconds,
+            "cpu_seconds": self.cpu_seconds,
+            "core_efficiency": self.cpu_seconds / self.core_seconds if self.core_seconds else None,
+        }
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Sequence, Tuple
+import numpy as np
 import pandas as pd
 
 #gozlediyim reqem stutunlari/ yoxdursa problemdir
@@ -89,3 +90,184 @@ def validate_dataframe(
             raise SchemaError('Unknown ocean_proximity category.', {'unknown': unknown})
 
     return out
+
+
+# validate_dataframe-in pandas-siz versiyasi: records -> numeric blok + kateqoriya kodlari
+@dataclass
+class ValidatedBatch:
+    numeric: np.ndarray         # (n, len(REQUIRED_NUMERIC)) float64, column-major
+    codes: np.ndarray           # int32 index into `categories`, -1 = missing
+    categories: List[Any]       # ALLOWED_OCEAN_PROXIMITY followed by unseen labels
+
+    def __len__(self) -> int:
+        return int(self.numeric.shape[0])
+
+    def category_values(self) -> np.ndarray:
+        lut = np.array(list(self.categories) + [np.nan], dtype=object)
+        return lut[self.codes]  # -1 picks the trailing nan
+
+    def take(self, rows: np.ndarray) -> "ValidatedBatch":
+        return ValidatedBatch(numeric=np.asfortranarray(self.numeric[rows]),
+                              codes=self.codes[rows], categories=self.categories)
+
+    def to_frame(self) -> pd.DataFrame:
+        cols: Dict[str, Any] = {c: self.numeric[:, j] for j, c in enumerate(REQUIRED_NUMERIC)}
+        cols[REQUIRED_CATEGORICAL[0]] = self.category_values()
+        return pd.DataFrame(cols, columns=REQUIRED_COLUMNS)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ValidatedBatch":
+        """Build from an already validated dataframe (see validate_dataframe)."""
+        numeric = np.asfortranarray(df[REQUIRED_NUMERIC].to_numpy(dtype=np.float64))
+        codes, categories = _encode_categories(df[REQUIRED_CATEGORICAL[0]].tolist())
+        return cls(numeric=numeric, codes=codes, categories=categories)
+
+
+def _to_float(v: Any) -> float:
+    # pd.to_numeric(errors='coerce') semantics for a single value
+    if isinstance(v, (int, float)):
+        return float(v)
+    if isinstance(v, str):
+        try:
+            return float(v)
+        except ValueError:
+            return float('nan')
+    return float('nan')
+
+
+def _encode_categories(values: Sequence[Any]) -> Tuple[np.ndarray, List[Any]]:
+    vocab: Dict[Any, int] = {c: i for i, c in enumerate(ALLOWED_OCEAN_PROXIMITY)}
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, v in enumerate(values):
+        if v is None or (isinstance(v, float) and v != v):
+            codes[i] = -1
+        else:
+            codes[i] = vocab.setdefault(v, len(vocab))
+    return codes, list(vocab)
+
+
+def validate_records(
+        records: Sequence[Dict[str, Any]],
+        *,
+        allow_extra_columns: bool = False,
+        strict_categories: bool = False,
+        require_non_empty: bool = True
+) -> ValidatedBatch:
+    """Same checks and SchemaError messages as validate_dataframe, without building a DataFrame."""
+    if require_non_empty and len(records) == 0:
+        raise SchemaError('Input dataframe is empty.')
+
+    # pd.DataFrame(records) columns: union of keys in first-seen order
+    columns = list(dict.fromkeys(k for r in records for k in r))
+    cols = set(columns)
+    missing = [c for c in REQUIRED_COLUMNS if c not in cols]
+    extra = [c for c in columns if c not in set(REQUIRED_COLUMNS)]
+
+    if missing:
+        raise SchemaError('Missing required columns.', {'missing': missing})
+
+    if (not allow_extra_columns) and extra:
+        raise SchemaError('Unepected extra columns.', {'extra': extra})
+
+    n = len(records)
+    numeric = np.empty((n, len(REQUIRED_NUMERIC)), dtype=np.float64, order='F')
+    for j, c in enumerate(REQUIRED_NUMERIC):
+        values = [r.get(c) for r in records]
+        try:
+            # fast path: numbers, numeric strings and None (-> nan)
+            numeric[:, j] = np.array(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            numeric[:, j] = np.fromiter((_to_float(v) for v in values), dtype=np.float64, count=n)
+
+    bad_numeric = [c for c, bad in zip(REQUIRED_NUMERIC, np.isnan(numeric).all(axis=0)) if bad]
+    if bad_numeric:
+        raise SchemaError('Numeric columns contaion no valid numbers',
+                          {'all_nan_columns':bad_numeric})
+
+    codes, categories = _encode_categories([r.get('ocean_proximity') for r in records])
+
+    if strict_categories:
+        seen = set(np.unique(codes[codes >= len(ALLOWED_OCEAN_PROXIMITY)]).tolist())
+        unknown = sorted(categories[i] for i in seen)
+        if unknown:
+            raise SchemaError('Unknown ocean_proximity category.', {'unknown': unknown})
+
+    return ValidatedBatch(numeric=numeric, codes=codes, categories=categories)
+
+
+def _encode_category_array(values: Any) -> Tuple[np.ndarray, List[Any]]:
+    # vectorized _encode_categories: factorize once, then map the few uniques
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=True)
+    vocab: Dict[Any, int] = {c: i for i, c in enumerate(ALLOWED_OCEAN_PROXIMITY)}
+    lut = np.array([vocab.setdefault(u, len(vocab)) for u in uniques.tolist()] + [-1], dtype=np.int32)
+    return lut[codes], list(vocab)
+
+
+def validate_columns(
+        columns: Dict[str, Any],
+        *,
+        allow_extra_columns: bool = False,
+        strict_categories: bool = False,
+        require_non_empty: bool = True
+) -> ValidatedBatch:
+    """validate_records for a column-oriented body (column -> array); no per-row objects."""
+    lengths = {c: len(v) for c, v in columns.items()}
+    if len(set(lengths.values())) > 1:
+        raise SchemaError('Columns have different lengths.', {'lengths': lengths})
+    n = next(iter(lengths.values()), 0)
+    if require_non_empty and n == 0:
+        raise SchemaError('Input dataframe is empty.')
+
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+    extra = [c for c in columns if c not in set(REQUIRED_COLUMNS)]
+
+    if missing:
+        raise SchemaError('Missing required columns.', {'missing': missing})
+
+    if (not allow_extra_columns) and extra:
+        raise SchemaError('Unepected extra columns.', {'extra': extra})
+
+    numeric = np.empty((n, len(REQUIRED_NUMERIC)), dtype=np.float64, order='F')
+    for j, c in enumerate(REQUIRED_NUMERIC):
+        values = columns[c]
+        try:
+            numeric[:, j] = np.asarray(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            numeric[:, j] = np.fromiter((_to_float(v) for v in values), dtype=np.float64, count=n)
+
+    bad_numeric = [c for c, bad in zip(REQUIRED_NUMERIC, np.isnan(numeric).all(axis=0)) if bad]
+    if bad_numeric:
+        raise SchemaError('Numeric columns contaion no valid numbers',
+                          {'all_nan_columns':bad_numeric})
+
+    codes, categories = _encode_category_array(columns['ocean_proximity'])
+
+    if strict_categories:
+        seen = set(np.unique(codes[codes >= len(ALLOWED_OCEAN_PROXIMITY)]).tolist())
+        unknown = sorted(categories[i] for i in seen)
+        if unknown:
+            raise SchemaError('Unknown ocean_proximity category.', {'unknown': unknown})
+
+    return ValidatedBatch(numeric=numeric, codes=codes, categories=categories)
+
+
+def concat_batches(batches: Sequence[ValidatedBatch]) -> ValidatedBatch:
+    """Stack validated batches row-wise, merging their category vocabularies."""
+    if len(batches) == 1:
+        return batches[0]
+
+    vocab: Dict[Any, int] = {c: i for i, c in enumerate(ALLOWED_OCEAN_PROXIMITY)}
+    n = sum(len(b) for b in batches)
+    numeric = np.empty((n, len(REQUIRED_NUMERIC)), dtype=np.float64, order='F')
+    codes = np.empty(n, dtype=np.int32)
+
+    start = 0
+    for b in batches:
+        stop = start + len(b)
+        numeric[start:stop] = b.numeric
+        # last lut entry keeps missing (-1) as -1
+        lut = np.array([vocab.setdefault(c, len(vocab)) for c in b.categories] + [-1], dtype=np.int32)
+        codes[start:stop] = lut[b.codes]
+        start = stop
+
+    return ValidatedBatch(numeric=numeric, codes=codes, categories=list(vocab))
@@ -0,0 +1,245 @@
+import argparse
+import logging
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from .logging_setup import setup_logging
+from .predictor import ENGINES, Predictor, load_predictor
+from .registry import ModelRegistry
+from .schema import REQUIRED_NUMERIC, SchemaError, ValidatedBatch, validate_dataframe
+
+logger = logging.getLogger(__name__)
+
+# one predictor per worker process, loaded once by the pool initializer
+_worker_predictor: Optional[Predictor] = None
+
+
+def _init_worker(model_path: str, engine: str, transform: str) -> None:
+    global _worker_predictor
+    _worker_predictor = load_predictor(model_path, engine=engine, transform=transform)
+
+
+def _score_chunk(chunk: pd.DataFrame, strict_categories: bool = False) -> np.ndarray:
+    x = validate_dataframe(chunk, allow_extra_columns=True, strict_categories=strict_categories)
+    return _worker_predictor.score(ValidatedBatch.from_frame(x))
+
+
+class _WorkerSchemaError(Exception):
+    """SchemaError carried back from a worker process as plain (message, details) args."""
+
+
+def _score_chunk_in_worker(chunk: pd.DataFrame, strict_categories: bool = False) -> np.ndarray:
+    # SchemaError is a frozen dataclass: the pool can neither attach a traceback to it nor
+    # pickle it back, and the whole pool breaks; send its fields instead
+    try:
+        return _score_chunk(chunk, strict_categories)
+    except SchemaError as e:
+        raise _WorkerSchemaError(e.message, e.details) from None
+
+
+def _chunk_result(fut: Future) -> np.ndarray:
+    try:
+        return fut.result()
+    except _WorkerSchemaError as e:
+        raise SchemaError(*e.args) from None
+
+
+def read_chunks(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    suffix = Path(path).suffix.lower()
+    if suffix in (".jsonl", ".ndjson"):
+        reader = pd.read_json(path, lines=True, chunksize=chunksize)
+    elif suffix == ".csv":
+        reader = pd.read_csv(path, chunksize=chunksize)
+    else:
+        raise ValueError(f"Unsupported input format: {path} (expected .csv or .jsonl)")
+    with reader:
+        yield from reader
+
+
+def _output_dtypes(first: pd.DataFrame) -> Dict[str, str]:
+    """Column order and dtype of every output chunk, fixed from the input schema and the first chunk.
+
+    Chunks of a JSONL file infer their dtypes (and columns) independently: a column can be
+    int in one chunk and float or all-null in the next. Schema numeric columns are float64;
+    other columns are float64 when numeric in the first chunk, else strings (object).
+    """
+    dtypes = {}
+    for col in first.columns:
+        values = first[col]
+        numeric = (pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)
+                   and values.notna().any())
+        dtypes[col] = "float64" if col in REQUIRED_NUMERIC or numeric else "object"
+    return dtypes
+
+
+def _conform(df: pd.DataFrame, dtypes: Dict[str, str]) -> pd.DataFrame:
+    """``df`` with exactly the ``dtypes`` columns, in order; missing ones are null, extra ones dropped."""
+    out = df.reindex(columns=list(dtypes))
+    for col, dtype in dtypes.items():
+        if dtype == "float64":
+            out[col] = pd.to_numeric(out[col], errors="coerce").astype("float64")
+        else:
+            values = out[col].astype(object)
+            out[col] = values.where(values.isna(), values.astype(str))
+    return out
+
+
+class _CsvWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self._header = True
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text("", encoding="utf-8")
+
+    def write(self, df: pd.DataFrame) -> None:
+        df.to_csv(self.path, mode="a", header=self._header, index=False)
+        self._header = False
+
+    def close(self) -> None:
+        pass
+
+
+class _ParquetWriter:
+    def __init__(self, path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow") from e
+        self._pa, self._pq = pa, pq
+        self.path = path
+        self._writer = None
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    def write(self, df: pd.DataFrame) -> None:
+        # frames come through _conform(): float64 or string columns. The schema is explicit,
+        # because inferring it would type a column that is all-null in the first chunk as null.
+        if self._writer is None:
+            pa = self._pa
+            schema = pa.schema([(c, pa.float64() if df[c].dtype == "float64" else pa.string()) for c in df.columns])
+            self._writer = self._pq.ParquetWriter(self.path, schema)
+        table = self._pa.Table.from_pandas(df, schema=self._writer.schema, preserve_index=False)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+def open_writer(path: str):
+    suffix = Path(path).suffix.lower()
+    if suffix == ".csv":
+        return _CsvWriter(path)
+    if suffix in (".parquet", ".pq"):
+        return _ParquetWriter(path)
+    raise ValueError(f"Unsupported output format: {path} (expected .csv or .parquet)")
+
+
+def _output_frame(chunk: pd.DataFrame, preds: np.ndarray, keep_columns: bool) -> pd.DataFrame:
+    if keep_columns:
+        return chunk.assign(prediction=preds)
+    return pd.DataFrame({"prediction": preds})
+
+
+def score_file(
+        input_path: str,
+        output_path: str,
+        model_path: str,
+        *,
+        chunksize: int = 10_000,
+        workers: int = 1,
+        engine: str = "compiled",
+        transform: str = "compiled",
+        keep_columns: bool = True,
+        strict_categories: bool = False,
+) -> dict[str, Any]:
+    """Stream input_path through the model in chunks; output rows keep input order.
+
+    At most 2 * workers chunks are in flight, so memory does not grow with the file.
+    """
+    writer = open_writer(output_path)
+    rows = 0
+    t0 = time.perf_counter()
+    dtypes: Optional[Dict[str, str]] = None
+
+    def flush(chunk: pd.DataFrame, preds: np.ndarray) -> None:
+        nonlocal rows, dtypes
+        frame = _output_frame(chunk, preds, keep_columns)
+        if dtypes is None:
+            dtypes = _output_dtypes(frame)
+        dropped = [c for c in frame.columns if c not in dtypes]
+        if dropped:
+            logger.warning("Columns not in the first chunk are not written: %s", dropped)
+        writer.write(_conform(frame, dtypes))
+        rows += len(chunk)
+        elapsed = time.perf_counter() - t0
+        logger.info("scored rows=%d rows_per_sec=%.0f", rows, rows / elapsed if elapsed else 0.0)
+
+    try:
+        if workers <= 1:
+            _init_worker(model_path, engine, transform)
+            for chunk in read_chunks(input_path, chunksize):
+                flush(chunk, _score_chunk(chunk, strict_categories))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(model_path, engine, transform)) as pool:
+                pending: deque[tuple[pd.DataFrame, Future]] = deque()
+                for chunk in read_chunks(input_path, chunksize):
+                    pending.append((chunk, pool.submit(_score_chunk_in_worker, chunk, strict_categories)))
+                    if len(pending) >= 2 * workers:
+                        done_chunk, fut = pending.popleft()
+                        flush(done_chunk, _chunk_result(fut))
+                while pending:
+                    done_chunk, fut = pending.popleft()
+                    flush(done_chunk, _chunk_result(fut))
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - t0
+    return {"rows": rows, "seconds": elapsed, "rows_per_sec": rows / elapsed if elapsed else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-score a CSV/JSONL file with the registry's active model")
+    parser.add_argument("--input", required=True, help=".csv or .jsonl")
+    parser.add_argument("--output", required=True, help=".csv or .parquet")
+    parser.add_argument("--registry", default="artifacts/models/registry")
+    parser.add_argument("--model", default=None, help="explicit model path instead of the active one")
+    parser.add_argument("--chunksize", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--engine", choices=ENGINES, default="compiled")
+    parser.add_argument("--transform", choices=ENGINES, default="compiled")
+    parser.add_argument("--predictions-only", action="store_true", help="do not copy input columns")
+    parser.add_argument("--strict-categories", action="store_true")
+    args = parser.parse_args()
+
+    setup_logging()
+    model_path = args.model or str(ModelRegistry(Path(args.registry)).resolve_active())
+
+    try:
+        summary = score_file(
+            args.input,
+            args.output,
+            model_path,
+            chunksize=args.chunksize,
+            workers=args.workers,
+            engine=args.engine,
+            transform=args.transform,
+            keep_columns=not args.predictions_only,
+            strict_categories=args.strict_categories,
+        )
+    except SchemaError as e:
+        raise SystemExit(f"Invalid input: {e}")
+
+    logger.info("Done. model=%s rows=%d seconds=%.2f rows_per_sec=%.0f output=%s",
+                model_path, summary["rows"], summary["seconds"], summary["rows_per_sec"], args.output)
+
+
+if __name__ == '__main__':
+    main()
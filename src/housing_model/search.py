@@ -0,0 +1,470 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+from sklearn.base import BaseEstimator, RegressorMixin, clone
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import ParameterGrid, check_cv
+from sklearn.pipeline import Pipeline
+
+from .schedule import CoreScheduler
+
+logger = logging.getLogger(__name__)
+
+
+def _take(X, idx: np.ndarray):
+    return X.iloc[idx] if hasattr(X, "iloc") else X[idx]
+
+
+def preprocessing_fingerprint(preprocessing: Pipeline) -> str:
+    """Hash of the (unfitted) preprocessing config: same fingerprint => same fitted transform."""
+    return joblib.hash(clone(preprocessing))
+
+
+def _split_params(pipe: Pipeline, params: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    # "<final step>__x" goes to the model; everything else changes the preprocessing
+    prefix = pipe.steps[-1][0] + "__"
+    model = {k[len(prefix):]: v for k, v in params.items() if k.startswith(prefix)}
+    pre = {k: v for k, v in params.items() if not k.startswith(prefix)}
+    return pre, model
+
+
+class FoldCache:
+    """Transformed (train, test) feature matrices per CV fold.
+
+    Keyed by preprocessing fingerprint and the fold's row indices, so every grid
+    candidate and the sanity CV that share a fold reuse one preprocessing fit.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str, str], Tuple[Any, Any, float]] = {}
+        self.fits = 0
+        self.hits = 0
+        self.fit_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def _index_key(idx: np.ndarray) -> str:
+        return hashlib.sha256(np.ascontiguousarray(idx, dtype=np.int64).tobytes()).hexdigest()
+
+    def get(self, preprocessing: Pipeline, X, y, train_idx: np.ndarray, test_idx: np.ndarray,
+            fingerprint: Optional[str] = None):
+        fingerprint = fingerprint or preprocessing_fingerprint(preprocessing)
+        key = (fingerprint, self._index_key(train_idx), self._index_key(test_idx))
+        hit = self._entries.get(key)
+        if hit is not None:
+            self.hits += 1
+            self.saved_seconds += hit[2]
+            return hit[0], hit[1]
+
+        t0 = time.perf_counter()
+        pre = clone(preprocessing)
+        Xt_train = pre.fit_transform(_take(X, train_idx), _take(y, train_idx))
+        Xt_test = pre.transform(_take(X, test_idx))
+        seconds = time.perf_counter() - t0
+
+        self._entries[key] = (Xt_train, Xt_test, seconds)
+        self.fits += 1
+        self.fit_seconds += seconds
+        return Xt_train, Xt_test
+
+    def fit_all(self, preprocessing: Pipeline, X, y, fingerprint: Optional[str] = None):
+        """(fitted preprocessing, transformed matrix) over every row, for OOB scoring."""
+        fingerprint = fingerprint or preprocessing_fingerprint(preprocessing)
+        key = (fingerprint, self._index_key(np.arange(len(y))), "")
+        hit = self._entries.get(key)
+        if hit is not None:
+            self.hits += 1
+            self.saved_seconds += hit[2]
+            return hit[0], hit[1]
+
+        t0 = time.perf_counter()
+        pre = clone(preprocessing)
+        Xt = pre.fit_transform(X, y)
+        seconds = time.perf_counter() - t0
+
+        self._entries[key] = (pre, Xt, seconds)
+        self.fits += 1
+        self.fit_seconds += seconds
+        return pre, Xt
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "fits": self.fits,
+            "hits": self.hits,
+            "fit_seconds": self.fit_seconds,
+            "saved_seconds": self.saved_seconds,
+        }
+
+
+def supports_oob(model) -> bool:
+    """Bagged forests: each row can be scored by the trees that never saw it."""
+    params = model.get_params()
+    return "oob_score" in params and bool(params.get("bootstrap"))
+
+
+class _OOBPredictions(RegressorMixin, BaseEstimator):
+    # stands in for the forest so any regression scorer can rate its out-of-bag predictions
+    def __init__(self, predictions=None):
+        self.predictions = predictions
+
+    def predict(self, X):
+        return self.predictions
+
+
+class _OOBScorer:
+    """``scoring`` over a fitted forest's out-of-bag predictions.
+
+    Rows that every tree drew have no OOB prediction (sklearn reports 0 for them),
+    so they are left out.
+    """
+
+    def __init__(self, scoring: str):
+        self.scorer = get_scorer(scoring)
+
+    def __call__(self, model, X, y) -> float:
+        y = np.asarray(y)
+        left_out = np.zeros(len(y), dtype=bool)
+        for rows in model.estimators_samples_:
+            in_bag = np.zeros(len(y), dtype=bool)
+            in_bag[rows] = True
+            left_out |= ~in_bag
+        predictions = np.asarray(model.oob_prediction_)[left_out]
+        return self.scorer(_OOBPredictions(predictions), None, y[left_out])
+
+
+def _folds(cv, X, y: np.ndarray, rows: Optional[np.ndarray]):
+    # fold indices are absolute row numbers, so subsets (halving) never collide in the cache
+    idx = np.arange(len(y)) if rows is None else np.asarray(rows)
+    for train, test in check_cv(cv, y[idx], classifier=False).split(_take(X, idx), y[idx]):
+        yield idx[train], idx[test]
+
+
+def _fit_fold(model, Xt_train, y_train, Xt_test, y_test, scorer, n_estimators=None, keep=False):
+    """Fit and score one CV fold; with ``n_estimators`` the warm-started forest grows through each count.
+
+    Returns (scores, seconds, the fitted model if ``keep``).
+    """
+    scores, seconds = [], []
+    for n in n_estimators or (None,):
+        t0 = time.perf_counter()
+        if n is not None:
+            model.set_params(n_estimators=n)
+        model.fit(Xt_train, y_train)
+        scores.append(scorer(model, Xt_test, y_test))
+        seconds.append(time.perf_counter() - t0)
+    return scores, seconds, model if keep else None
+
+
+def _fold_tasks(pipe: Pipeline, X, y: np.ndarray, *, cv, scorer, cache: FoldCache, params: Dict[str, Any],
+                rows: Optional[np.ndarray] = None, n_estimators: Optional[List[int]] = None) -> List[Tuple]:
+    # preprocessing runs here, through the cache; only model fits are handed to the scheduler
+    pre_params, model_params = _split_params(pipe, params)
+    preprocessing = clone(pipe[:-1]).set_params(**pre_params)
+    fingerprint = preprocessing_fingerprint(preprocessing)
+    if n_estimators:
+        model_params = {**model_params, "warm_start": True}
+    tasks = []
+    for train_idx, test_idx in _folds(cv, X, y, rows):
+        Xt_train, Xt_test = cache.get(preprocessing, X, y, train_idx, test_idx, fingerprint)
+        model = clone(pipe[-1]).set_params(**model_params)
+        tasks.append((model, Xt_train, y[train_idx], Xt_test, y[test_idx], scorer, n_estimators))
+    return tasks
+
+
+def _oob_task(pipe: Pipeline, X, y: np.ndarray, *, scorer: _OOBScorer, cache: FoldCache, params: Dict[str, Any],
+              n_estimators: Optional[List[int]] = None, keep: bool = False) -> Tuple:
+    # one fit on every row: the OOB score is read from the same forest, train and "test" are the same rows
+    pre_params, model_params = _split_params(pipe, params)
+    _, Xt = cache.fit_all(clone(pipe[:-1]).set_params(**pre_params), X, y)
+    model_params = {**model_params, "oob_score": True}
+    if n_estimators:
+        model_params["warm_start"] = True
+    return (clone(pipe[-1]).set_params(**model_params), Xt, y, Xt, y, scorer, n_estimators, keep)
+
+
+def _run_folds(scheduler: CoreScheduler, pipe: Pipeline, tasks: List[Tuple], label: str) -> List[Tuple]:
+    _, inner, _ = scheduler.plan(len(tasks), pipe[-1])
+    for task in tasks:
+        scheduler.set_threads(task[0], inner)
+    return scheduler.run(_fit_fold, tasks, model=pipe[-1], label=label)
+
+
+def cross_val_score_cached(pipe: Pipeline, X, y, *, cv, scoring: str, cache: FoldCache,
+                           params: Optional[Dict[str, Any]] = None,
+                           rows: Optional[np.ndarray] = None,
+                           scheduler: Optional[CoreScheduler] = None) -> np.ndarray:
+    """Same scores as ``cross_val_score(clone(pipe).set_params(**params), X[rows], y[rows], ...)``."""
+    y = np.asarray(y)
+    tasks = _fold_tasks(pipe, X, y, cv=cv, scorer=get_scorer(scoring), cache=cache, params=params or {}, rows=rows)
+    results = _run_folds(scheduler or CoreScheduler(), pipe, tasks, "cv folds")
+    return np.asarray([scores[0] for scores, _, _ in results], dtype=float)
+
+
+def oob_score_cached(pipe: Pipeline, X, y, *, scoring: str, cache: FoldCache,
+                     params: Optional[Dict[str, Any]] = None,
+                     scheduler: Optional[CoreScheduler] = None) -> Tuple[float, Pipeline]:
+    """Out-of-bag score of one fit on all rows, and that fitted pipeline (no refit needed)."""
+    y = np.asarray(y)
+    params = params or {}
+    task = _oob_task(pipe, X, y, scorer=_OOBScorer(scoring), cache=cache, params=params, keep=True)
+    [(scores, _, model)] = _run_folds(scheduler or CoreScheduler(), pipe, [task], "oob fit")
+    pre_params, _ = _split_params(pipe, params)
+    preprocessing, _ = cache.fit_all(clone(pipe[:-1]).set_params(**pre_params), X, y)
+    return float(scores[0]), Pipeline(preprocessing.steps + [(pipe.steps[-1][0], model)])
+
+
+def warm_start_scores(pipe: Pipeline, X, y, *, cv, scoring: str, cache: FoldCache,
+                      params: Dict[str, Any], n_estimators: List[int],
+                      rows: Optional[np.ndarray] = None,
+                      scheduler: Optional[CoreScheduler] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """CV scores for each tree count, growing one forest per fold instead of refitting.
+
+    With an int random_state a warm-started forest of n trees is the forest a fresh
+    fit with n trees would build, so the scores match ``cross_val_score_cached``.
+    Returns (scores[len(n_estimators), n_folds], seconds[len(n_estimators)]).
+    """
+    y = np.asarray(y)
+    tasks = _fold_tasks(pipe, X, y, cv=cv, scorer=get_scorer(scoring), cache=cache, params=params, rows=rows,
+                        n_estimators=sorted(n_estimators))
+    results = _run_folds(scheduler or CoreScheduler(), pipe, tasks, "warm-start folds")
+    scores = np.asarray([s for s, _, _ in results], dtype=float).T
+    return scores, np.asarray([sec for _, sec, _ in results]).sum(axis=0)
+
+
+class CachedGridSearch:
+    """GridSearchCV over a preprocessing + model Pipeline that reuses fold preprocessing.
+
+    strategy="exhaustive" scores every candidate on all rows; strategy="halving" runs
+    successive halving, keeping the best 1/factor of the candidates per round while the
+    resource (training rows, or trees via resource="n_estimators") grows by factor.
+    With warm_start, candidates that only differ in n_estimators share one growing
+    forest per fold.
+
+    evaluation="oob" replaces CV with the out-of-bag score of one fit per candidate on
+    all rows (bagged forests only; other models fall back to CV), "both" scores CV and
+    selects on it but also records OOB scores (``oob_scores_``) to compare the two.
+
+    The fold fits of all candidates go to ``scheduler`` together, so they can run in
+    parallel within its core budget (default: one at a time, the model's own n_jobs does
+    the parallel work). Selection and refit follow GridSearchCV: highest mean score,
+    first candidate on ties. Under evaluation="oob" there is no refit: the best
+    candidate's forest was already fitted on all rows.
+    """
+
+    def __init__(self, pipe: Pipeline, param_grid: Dict[str, List[Any]], *, cv, scoring: str,
+                 cache: Optional[FoldCache] = None, strategy: str = "exhaustive",
+                 warm_start: bool = False, resource: str = "n_samples", factor: int = 3,
+                 random_state: int = 0, scheduler: Optional[CoreScheduler] = None, evaluation: str = "cv"):
+        if strategy not in ("exhaustive", "halving"):
+            raise ValueError(f"Unknown search strategy: {strategy!r}")
+        if evaluation not in ("cv", "oob", "both"):
+            raise ValueError(f"Unknown evaluation: {evaluation!r} (expected cv, oob or both)")
+        if resource not in ("n_samples", "n_estimators"):
+            raise ValueError(f"Unknown halving resource: {resource!r}")
+        if factor < 2:
+            raise ValueError("factor must be >= 2")
+        self.pipe = pipe
+        self.param_grid = param_grid
+        self.cv = cv
+        self.scoring = scoring
+        self.cache = cache if cache is not None else FoldCache()
+        self.strategy = strategy
+        self.warm_start = warm_start
+        self.resource = resource
+        self.factor = int(factor)
+        self.random_state = random_state
+        self.scheduler = scheduler or CoreScheduler()
+        self.evaluation = evaluation
+        self._trees_key = pipe.steps[-1][0] + "__n_estimators"
+
+    def _record(self, results: List[Dict[str, Any]], params: Dict[str, Any], scores: np.ndarray,
+                seconds: float, **extra) -> None:
+        results.append({"params": params, "mean_test_score": float(scores.mean()),
+                        "std_test_score": float(scores.std()), "fit_seconds": float(seconds), **extra})
+        logger.info("Candidate %s %sscore=%.4f seconds=%.2f", params,
+                    "".join(f"{k}={v} " for k, v in extra.items()), scores.mean(), seconds)
+
+    def _groups(self, candidates: List[Dict[str, Any]]) -> List[Tuple[List[int], Optional[List[int]]]]:
+        # with warm_start, candidates differing only in n_estimators share one growing forest
+        groups: Dict[str, List[int]] = {}
+        for i, params in enumerate(candidates):
+            rest = {k: v for k, v in params.items() if k != self._trees_key}
+            key = repr(sorted(rest.items())) if self.warm_start and self._trees_key in params else str(i)
+            groups.setdefault(key, []).append(i)
+        out = []
+        for members in groups.values():
+            if len(members) == 1:
+                out.append((members, None))
+            else:
+                members = sorted(members, key=lambda i: candidates[i][self._trees_key])
+                out.append((members, [candidates[i][self._trees_key] for i in members]))
+        return out
+
+    def _score_oob(self, X, y, candidates: List[Dict[str, Any]], results: Optional[List[Dict[str, Any]]],
+                   keep: bool = False) -> Tuple[List[float], Dict[int, Any]]:
+        """OOB score per candidate (in order) from one fit on all rows; result rows only if ``results``.
+
+        With ``keep`` also returns the fitted forests by candidate index. A warm-started
+        group's forest ends at its largest tree count, so only that candidate gets one.
+        """
+        y = np.asarray(y)
+        scorer = _OOBScorer(self.scoring)
+        groups = self._groups(candidates)
+        tasks = [_oob_task(self.pipe, X, y, scorer=scorer, cache=self.cache, params=candidates[members[0]],
+                           n_estimators=n_estimators, keep=keep) for members, n_estimators in groups]
+        means: Dict[int, float] = {}
+        models: Dict[int, Any] = {}
+        for (members, _), (scores, seconds, model) in zip(groups, _run_folds(self.scheduler, self.pipe, tasks,
+                                                                            "oob fits")):
+            for k, i in enumerate(members):
+                means[i] = float(scores[k])
+                if results is not None:
+                    self._record(results, candidates[i], np.asarray([scores[k]]), seconds[k], evaluation="oob")
+            if model is not None:
+                models[members[-1]] = model
+        return [means[i] for i in range(len(candidates))], models
+
+    def _fitted_oob(self, X, y, params: Dict[str, Any], model) -> Pipeline:
+        # the forest the OOB score came from was fitted on all rows: it is the refit
+        if model is None:
+            # best of a warm-start group below its largest tree count: a forest can't drop trees
+            _, best = oob_score_cached(self.pipe, X, y, scoring=self.scoring, cache=self.cache, params=params,
+                                      scheduler=self.scheduler)
+            model = best[-1]
+        model.set_params(warm_start=self.pipe[-1].get_params()["warm_start"])
+        pre_params, _ = _split_params(self.pipe, params)
+        preprocessing, _ = self.cache.fit_all(clone(self.pipe[:-1]).set_params(**pre_params), X, np.asarray(y))
+        return Pipeline(preprocessing.steps + [(self.pipe.steps[-1][0], model)])
+
+    def _score(self, X, y, candidates: List[Dict[str, Any]], results: List[Dict[str, Any]],
+               rows: Optional[np.ndarray] = None, **extra) -> List[float]:
+        """Mean CV score per candidate (in order); appends one result row per candidate."""
+        y = np.asarray(y)
+        scorer = get_scorer(self.scoring)
+        tasks, owners = [], []
+        for members, n_estimators in self._groups(candidates):
+            group = _fold_tasks(self.pipe, X, y, cv=self.cv, scorer=scorer, cache=self.cache,
+                                params=candidates[members[0]], rows=rows, n_estimators=n_estimators)
+            tasks += group
+            owners.append((members, len(group)))
+
+        fits = iter(_run_folds(self.scheduler, self.pipe, tasks, "grid fits"))
+        means: Dict[int, float] = {}
+        for members, n_folds in owners:
+            folds = [next(fits) for _ in range(n_folds)]
+            for k, i in enumerate(members):
+                scores = np.asarray([f[0][k] for f in folds], dtype=float)
+                means[i] = float(scores.mean())
+                self._record(results, candidates[i], scores, sum(f[1][k] for f in folds), **extra)
+        return [means[i] for i in range(len(candidates))]
+
+    def _survivors(self, candidates: List[Any], means: List[float]) -> List[Any]:
+        keep = max(1, -(-len(candidates) // self.factor))
+        order = sorted(range(len(candidates)), key=lambda i: (-means[i], i))[:keep]
+        return [candidates[i] for i in sorted(order)]
+
+    def _halving_rows(self, X, y, results):
+        candidates = list(ParameterGrid(self.param_grid))
+        n = len(y)
+        n_rounds = 1 + int(np.floor(np.log(len(candidates)) / np.log(self.factor)))
+        perm = np.random.RandomState(self.random_state).permutation(n)
+        for r in range(n_rounds):
+            n_rows = n if r == n_rounds - 1 else n // self.factor ** (n_rounds - 1 - r)
+            means = self._score(X, y, candidates, results, rows=np.sort(perm[:n_rows]),
+                                round=r, n_resources=n_rows)
+            if r == n_rounds - 1:
+                return candidates, means
+            candidates = self._survivors(candidates, means)
+
+    def _halving_trees(self, X, y, results):
+        if self._trees_key not in self.param_grid:
+            raise ValueError(f"resource=n_estimators needs {self._trees_key} in the param grid")
+        rungs = sorted(set(self.param_grid[self._trees_key]))
+        candidates = list(ParameterGrid({k: v for k, v in self.param_grid.items() if k != self._trees_key}))
+        y = np.asarray(y)
+        scorer = get_scorer(self.scoring)
+        folds = list(_folds(self.cv, X, y, None))
+        # with warm_start the survivors' forests are kept and grown to the next rung
+        models: Dict[Tuple[int, int], Any] = {}
+        alive = list(range(len(candidates)))
+
+        for r, n_trees in enumerate(rungs):
+            tasks = []
+            for c in alive:
+                pre_params, model_params = _split_params(self.pipe, {**candidates[c], self._trees_key: n_trees})
+                preprocessing = clone(self.pipe[:-1]).set_params(**pre_params)
+                fingerprint = preprocessing_fingerprint(preprocessing)
+                for f, (train_idx, test_idx) in enumerate(folds):
+                    Xt_train, Xt_test = self.cache.get(preprocessing, X, y, train_idx, test_idx, fingerprint)
+                    model = models.get((c, f))
+                    if model is None:
+                        model = clone(self.pipe[-1]).set_params(**model_params, warm_start=self.warm_start)
+                    tasks.append((model, Xt_train, y[train_idx], Xt_test, y[test_idx], scorer, [n_trees],
+                                  self.warm_start))
+
+            fits = iter(_run_folds(self.scheduler, self.pipe, tasks, f"halving round {r}"))
+            means = []
+            for c in alive:
+                scores, seconds = [], 0.0
+                for f in range(len(folds)):
+                    fold_scores, fold_seconds, model = next(fits)
+                    scores.append(fold_scores[0])
+                    seconds += fold_seconds[0]
+                    if self.warm_start:
+                        models[(c, f)] = model
+                means.append(float(np.mean(scores)))
+                self._record(results, {**candidates[c], self._trees_key: n_trees}, np.asarray(scores), seconds,
+                             round=r, n_resources=n_trees)
+
+            if r == len(rungs) - 1:
+                return [{**candidates[c], self._trees_key: n_trees} for c in alive], means
+            alive = self._survivors(alive, means)
+            models = {k: m for k, m in models.items() if k[0] in alive}
+
+    def fit(self, X, y) -> "CachedGridSearch":
+        results: List[Dict[str, Any]] = []
+        oob = self.evaluation != "cv" and supports_oob(self.pipe[-1])
+        self.evaluation_ = self.evaluation if oob else "cv"
+        oob_means, oob_models = None, {}
+        if self.evaluation_ == "oob":
+            if self.strategy != "exhaustive":
+                logger.info("OOB evaluation fits every candidate once on all rows; strategy=%s is not used",
+                            self.strategy)
+            final = list(ParameterGrid(self.param_grid))
+            oob_means, oob_models = self._score_oob(X, y, final, results, keep=True)
+            means = oob_means
+        elif self.strategy == "exhaustive":
+            final = list(ParameterGrid(self.param_grid))
+            means = self._score(X, y, final, results)
+        elif self.resource == "n_samples":
+            final, means = self._halving_rows(X, y, results)
+        else:
+            final, means = self._halving_trees(X, y, results)
+        if self.evaluation_ == "both":
+            oob_means, _ = self._score_oob(X, y, final, None)
+
+        best = int(np.argmax(means))
+        self.cv_results_ = results
+        # final-round candidates, best first (ties: grid order)
+        order = sorted(range(len(final)), key=lambda i: (-means[i], i))
+        self.ranked_ = [(final[i], means[i]) for i in order]
+        # OOB score of each ranked_ entry (evaluation oob/both on a bagged forest), else None
+        self.oob_scores_ = None if oob_means is None else [oob_means[i] for i in order]
+        self.best_params_ = final[best]
+        self.best_score_ = means[best]
+        if self.evaluation_ == "oob":
+            best_estimator = self._fitted_oob(X, y, self.best_params_, oob_models.get(best))
+            self.scheduler.set_threads(best_estimator[-1], self.scheduler.cores)
+        else:
+            best_estimator = clone(self.pipe).set_params(**self.best_params_)
+            self.scheduler.set_threads(best_estimator[-1], self.scheduler.cores)
+            best_estimator.fit(X, y)
+        self.best_estimator_ = best_estimator
+        return self
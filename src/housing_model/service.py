@@ -1,16 +1,32 @@
-import time
+from __future__ import annotations
+
+from ._import_clock import IMPORT_T0
 import logging
+import threading
+import time
 from pathlib import Path
 from contextlib import asynccontextmanager
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-import pandas as pd
-import yaml
 from fastapi import FastAPI, HTTPException, Request
-from pydantic import BaseModel, Field
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel, Field, ValidationError
+
+# Only light modules at import time so /health answers quickly; pandas, sklearn and the
+# model come in _start_inference (in the background with startup.background_load).
+from .executor import InferenceExecutor, resolve_max_threads
+from .formats import (ARROW, JSON, NPY, UnsupportedFormat, decode_columns, encode_predictions, loads_json,
+                      media_type, negotiate)
+from .metrics import MetricsRegistry, current_timer, span
+from .middleware import (AdmissionControl, AdmissionMiddleware, TimingMiddleware, handler_finished,
+                         handler_started)
+from .pool import ModelPool
+from .registry import ModelRegistry
+from .reload import ModelReloader
 
-from .predictor import load_predictor
-from .schema import REQUIRED_COLUMNS, SchemaError, validate_dataframe
+if TYPE_CHECKING:
+    from .predictor import Predictor
 
 logger = logging.getLogger(__name__)
 
@@ -23,80 +39,456 @@ class PredictResponse(BaseModel):
     latency_ms: float
 
 def _load_serve_cfg() -> dict:
+    import yaml
+
     return yaml.safe_load(Path("configs/serve.yaml").read_text(encoding="utf-8"))
 
+def _memory_mb() -> Dict[str, float]:
+    # Linux only. RssAnon is private to this worker; RssFile counts mapped (shareable) pages.
+    out: Dict[str, float] = {}
+    try:
+        for line in Path("/proc/self/status").read_text(encoding="utf-8").splitlines():
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "RssAnon", "RssFile"):
+                out[key] = int(value.split()[0]) / 1024.0
+    except (OSError, ValueError):
+        pass
+    return out
+
+def _make_loader(serve_cfg: dict):
+    artifacts = serve_cfg["artifacts"]
+    inference = serve_cfg.get("inference", {})
+    behavior = serve_cfg["behavior"]
+    # the same value the InferenceExecutor reports on /meta and budgets against the cores
+    max_threads = resolve_max_threads(inference.get("max_threads"))
+
+    def load(model_path: Optional[str] = None) -> Predictor:
+        from .predictor import load_predictor
+
+        pred = load_predictor(model_path=model_path or artifacts["model_path"],
+                              training_profile_path=artifacts.get("training_profile_path"),
+                              engine=inference.get("engine", "sklearn"),
+                              transform=inference.get("transform", "sklearn"),
+                              mmap=bool(artifacts.get("mmap", False)),
+                              compact=bool(artifacts.get("compact", False)),
+                              serving=bool(artifacts.get("serving", False)))
+        pred.allow_extra_columns = bool(behavior.get("allow_extra_columns", False))
+        pred.strict_categories = bool(behavior.get("strict_categories", False))
+        pred.set_parallelism(parallel_min_rows=int(inference.get("parallel_min_rows", 0)),
+                             max_threads=max_threads)
+        return pred
+
+    return load
+
+def _start_inference(app: FastAPI, serve_cfg: dict) -> None:
+    """Heavy imports, inference components and the first model load + warm-up."""
+    startup = app.state.startup
+    t0 = time.perf_counter()
+    from .batching import MicroBatcher
+    from .cache import PredictionCache
+    from .drift import DriftMonitor
+    from . import predictor, schema  # noqa: F401  (pandas; sklearn only if the model needs it)
+    startup["inference_import_seconds"] = time.perf_counter() - t0
+
+    batching = serve_cfg.get("batching", {})
+    if batching.get("enabled", False):
+        app.state.batcher = MicroBatcher(
+            max_batch_rows=int(batching.get("max_batch_rows", 512)),
+            max_wait_ms=float(batching.get("max_wait_ms", 2.0)),
+        )
+        app.state.batcher.start()
+
+    drift_cfg = serve_cfg.get("drift", {})
+    if app.state.drift_mode == "async":
+        app.state.drift_monitor = DriftMonitor(
+            None,  # baseline is set by swap() once a model is loaded
+            window_seconds=float(drift_cfg.get("window_seconds", 300)),
+            windows=int(drift_cfg.get("windows", 12)),
+            interval_seconds=float(drift_cfg.get("interval_seconds", 5)),
+            rel_shift_threshold=float(drift_cfg.get("rel_shift_threshold", 0.25)),
+            unknown_share_threshold=float(drift_cfg.get("unknown_share_threshold", 0.05)),
+        )
+        app.state.drift_monitor.start()
+
+    cache_cfg = serve_cfg.get("cache", {})
+    if cache_cfg.get("enabled", False):
+        app.state.cache = PredictionCache(
+            max_entries=int(cache_cfg.get("max_entries", 100_000)),
+            max_bytes=int(cache_cfg.get("max_bytes", 64 * 1024 * 1024)),
+            ttl_seconds=cache_cfg.get("ttl_seconds"),
+        )
+
+    # no model yet (e.g. fresh checkout): stay up, /predict answers 503 until one appears
+    reloader = app.state.reloader
+    if not reloader.reload():
+        logger.warning("No model loaded: %s", reloader.info["last_error"])
+    pred = app.state.predictor
+    reloader.start()
+
+    startup.update({
+        "load_seconds": reloader.info.get("load_seconds"),
+        "warmup_seconds": reloader.info.get("warmup_seconds"),
+        "ready_seconds": time.perf_counter() - startup["_t0"],
+    })
+    logger.info("Service started. model=%s run_id=%s profile_loaded=%s engine=%s transform=%s "
+                "import_seconds=%.3f inference_import_seconds=%.3f load_seconds=%s warmup_seconds=%s "
+                "ready_seconds=%.3f reload_poll_seconds=%s memory_mb=%s",
+                serve_cfg["artifacts"]["model_path"], reloader.info["run_id"],
+                "yes" if pred is not None and pred.training_profile else "no",
+                pred.engine if pred is not None else None, pred.transform_engine if pred is not None else None,
+                startup["import_seconds"], startup["inference_import_seconds"],
+                reloader.info.get("load_seconds"), reloader.info.get("warmup_seconds"),
+                startup["ready_seconds"], reloader.poll_seconds, _memory_mb())
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    t0 = time.perf_counter()
     serve_cfg = _load_serve_cfg() #yukle
 
     model_path = serve_cfg["artifacts"]["model_path"]
-    profile_path = serve_cfg["artifacts"].get("training_profile_path")
-
-    pred = load_predictor(model_path = model_path, training_profile_path=profile_path)
-    pred.allow_extra_columns = bool(serve_cfg["behavior"].get("allow_extra_columns",False))
-    pred.strict_categories = bool(serve_cfg["behavior"].get("strict_categories", False))
+    reload_cfg = serve_cfg.get("reload", {})
+    startup_cfg = serve_cfg.get("startup", {})
 
     app.state.serve_cfg = serve_cfg
-    app.state.predictor = pred
+    app.state.predictor = None
+    app.state.batcher = None
+    app.state.drift_monitor = None
+    app.state.cache = None
+    app.state.startup = {"_t0": t0, "import_seconds": IMPORT_SECONDS,
+                         "background_load": bool(startup_cfg.get("background_load", False))}
+    load = _make_loader(serve_cfg)
+    reloader = ModelReloader(load, watch_path=model_path,
+                             poll_seconds=float(reload_cfg.get("poll_seconds", 0)))
+    app.state.reloader = reloader
 
-    logger.info("Service started. model=%s profile=%s profile_loaded=%s",
-                model_path, profile_path, "yes" if pred.training_profile else "no")
+    # other registry runs for /predict?run_id=..., loaded on first use
+    registry = ModelRegistry(Path(model_path).parent)
+    pool_cfg = serve_cfg.get("pool", {})
+    app.state.registry = registry
+    app.state.pool = None
+    if pool_cfg.get("enabled", False):
+        app.state.pool = ModelPool(
+            lambda run_id: load(str(registry.model_path(run_id))),
+            max_bytes=int(pool_cfg.get("max_bytes", 1 << 30)),
+            max_models=int(pool_cfg.get("max_models", 4)),
+        )
 
-    yield
+    def swap(pred: Predictor) -> None:
+        # requests read app.state.predictor once, so in-flight ones finish on the old model
+        app.state.predictor = pred
+        if app.state.pool is not None:
+            app.state.pool.discard(pred.run_id)  # now resident as the active model
+        if app.state.drift_monitor is not None:
+            app.state.drift_monitor.reset(pred.training_profile)
+        if app.state.cache is not None:
+            app.state.cache.set_model(pred.run_id)
+
+    reloader.add_swap_listener(swap)
+
+    inference = serve_cfg.get("inference", {})
+    app.state.executor = InferenceExecutor(
+        workers=int(inference.get("workers", 4)),
+        max_threads=resolve_max_threads(inference.get("max_threads")),
+        native_threads=inference.get("native_threads", 1),
+    )
+    app.state.executor.start()
+
+    drift_mode = serve_cfg.get("drift", {}).get("mode", "inline")
+    if drift_mode not in ("inline", "async", "off"):
+        raise ValueError(f"Unknown drift mode: {drift_mode!r}")
+    app.state.drift_mode = drift_mode
+
+    admission_cfg = serve_cfg.get("admission", {})
+    app.state.admission = None
+    if admission_cfg.get("enabled", False):
+        app.state.admission = AdmissionControl(
+            metrics,
+            paths=admission_cfg.get("paths", ["/predict"]),
+            max_body_bytes=int(admission_cfg.get("max_body_bytes", 1 << 20)),
+            max_rows=int(admission_cfg.get("max_rows", 10_000)),
+            max_concurrency=int(admission_cfg.get("max_concurrency", 4)),
+            max_queue=int(admission_cfg.get("max_queue", 64)),
+            queue_timeout_ms=float(admission_cfg.get("queue_timeout_ms", 1000)),
+            retry_after_seconds=int(admission_cfg.get("retry_after_seconds", 1)),
+        )
+
+    starter = None
+    if app.state.startup["background_load"]:
+        # /health answers now; /ready (and /predict) report 503 until the model is in
+        starter = threading.Thread(target=_start_inference, args=(app, serve_cfg),
+                                   name="model-startup", daemon=True)
+        starter.start()
+        logger.info("Service accepting requests, model loading in the background. import_seconds=%.3f "
+                    "lifespan_seconds=%.3f", IMPORT_SECONDS, time.perf_counter() - t0)
+    else:
+        _start_inference(app, serve_cfg)
 
+    yield
 
+    if starter is not None:
+        starter.join()
+    reloader.stop()
+    if app.state.batcher is not None:
+        app.state.batcher.stop()
+    if app.state.drift_monitor is not None:
+        app.state.drift_monitor.stop()
+    app.state.executor.stop()
     logger.info("Service shutting down.")
 
 app = FastAPI(title="Housing Price Model", version="0.1.0", lifespan=lifespan)
 
+# latency histograms per endpoint / run_id / stage, scraped from /metrics
+metrics = MetricsRegistry()
+# added last = outermost: rejected requests are still timed and counted
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(TimingMiddleware, registry=metrics)
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+@app.get("/ready")
+def ready(request: Request):
+    """200 once a model is loaded and warmed up, else 503 (liveness stays on /health)."""
+    pred = request.app.state.predictor
+    startup = {k: v for k, v in request.app.state.startup.items() if not k.startswith("_")}
+    body = {"ready": pred is not None, "run_id": pred.run_id if pred is not None else None,
+            "reload_error": request.app.state.reloader.info["last_error"], **startup}
+    return body if pred is not None else JSONResponse(status_code=503, content=body)
+
+def _require_predictor(request: Request, run_id: Optional[str] = None) -> Predictor:
+    pred = request.app.state.predictor
+    if run_id is not None and (pred is None or run_id != pred.run_id):
+        pool = request.app.state.pool
+        if pool is None:
+            raise HTTPException(status_code=404, detail="Serving other runs is disabled (pool.enabled)")
+        # only names listed by the registry, never a caller-supplied path
+        if run_id not in request.app.state.registry.runs():
+            raise HTTPException(status_code=404, detail=f"Unknown run_id: {run_id}")
+        try:
+            return pool.get(run_id)
+        except Exception:
+            # the cause (paths, exception text) goes to the log, not to the client
+            logger.exception("Loading run_id=%s failed", run_id)
+            raise HTTPException(status_code=503, detail=f"Model {run_id} could not be loaded")
+    if pred is None:
+        raise HTTPException(status_code=503, detail="No active model loaded")
+    return pred
+
+def _runs(request: Request) -> List[Dict[str, Any]]:
+    pred = request.app.state.predictor
+    registry = request.app.state.registry
+    pooled = request.app.state.pool.loaded() if request.app.state.pool is not None else {}
+    out = []
+    for run_id in registry.runs():
+        path = registry.model_path(run_id)
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        out.append({"run_id": run_id, "active": pred is not None and run_id == pred.run_id,
+                    "loaded": (pred is not None and run_id == pred.run_id) or run_id in pooled,
+                    "pool_bytes": pooled.get(run_id), "file_bytes": st.st_size, "modified_at": st.st_mtime})
+    return out
+
 @app.get("/meta")
 def meta(request: Request):
+    from .schema import REQUIRED_COLUMNS
+
     serve_cfg = request.app.state.serve_cfg
     pred = request.app.state.predictor
+    reload_info = request.app.state.reloader.info
     return{
         "model_path": serve_cfg["artifacts"]["model_path"],
+        "run_id": pred.run_id if pred is not None else None,
+        "model_loaded": pred is not None,
+        "mmap": bool(serve_cfg["artifacts"].get("mmap", False)),
+        "compact": bool(pred is not None and pred.forest is not None and pred.forest.compact),
+        "load_seconds": reload_info.get("load_seconds"),
+        "warmup_seconds": reload_info.get("warmup_seconds"),
+        "loaded_at": reload_info.get("loaded_at"),
+        "reloads": reload_info["reloads"],
+        "reload_error": reload_info["last_error"],
+        "memory_mb": _memory_mb(),
         "training_profile_path": serve_cfg["artifacts"].get("training_profile_path"),
-        "training_profile_loaded": bool(pred.training_profile),
-        "allow_extra_columns": pred.allow_extra_columns,
-        "strict_categories": pred.strict_categories,
+        "training_profile_loaded": bool(pred is not None and pred.training_profile),
+        "allow_extra_columns": pred.allow_extra_columns if pred is not None else None,
+        "strict_categories": pred.strict_categories if pred is not None else None,
+        "engine": pred.engine if pred is not None else None,
+        "transform": pred.transform_engine if pred is not None else None,
         "required_columns": REQUIRED_COLUMNS,
+        "batching": request.app.state.batcher.stats() if request.app.state.batcher else None,
+        "cache": request.app.state.cache.stats() if request.app.state.cache else None,
+        "drift_mode": request.app.state.drift_mode,
+        "admission": request.app.state.admission.stats() if request.app.state.admission else None,
+        "executor": request.app.state.executor.stats(),
+        "startup": {k: v for k, v in request.app.state.startup.items() if not k.startswith("_")},
+        "pool": request.app.state.pool.stats() if request.app.state.pool else None,
+        "runs": _runs(request),
     }
 
-@app.post("/predict", response_model=PredictResponse)
-def predict(req: PredictRequest, request: Request):
-    pred = request.app.state.predictor
+@app.post("/admin/reload")
+def admin_reload(request: Request, force: bool = False):
+    if not request.app.state.serve_cfg.get("reload", {}).get("admin_endpoint", False):
+        raise HTTPException(status_code=404, detail="Not Found")
+    reloader = request.app.state.reloader
+    # runs in the threadpool: /predict keeps serving the old model during load + warm-up
+    swapped = reloader.reload(force=force)
+    if not swapped and reloader.info["last_error"]:
+        raise HTTPException(status_code=503 if request.app.state.predictor is None else 500,
+                            detail=reloader.info["last_error"])
+    return {"reloaded": swapped, **reloader.info}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/drift")
+def drift(request: Request):
+    monitor = request.app.state.drift_monitor
+    if monitor is None:
+        raise HTTPException(status_code=404, detail="Async drift monitoring is disabled (drift.mode != async)")
+    report = monitor.refresh()
+    if report is None:
+        raise HTTPException(status_code=404, detail="No training profile loaded")
+    return report
 
-    t0 = time.time()
+# documented here because /predict reads the raw body (content negotiation, no per-record pydantic)
+_PREDICT_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            JSON: {"schema": {"oneOf": [
+                PredictRequest.model_json_schema(),
+                {"type": "object", "required": ["columns"],
+                 "properties": {"columns": {"type": "object", "additionalProperties": {"type": "array"}}}},
+            ]}},
+            ARROW: {"schema": {"type": "string", "format": "binary"}},
+            NPY: {"schema": {"type": "string", "format": "binary", "description": "structured array, one field per column"}},
+        },
+    },
+}
+
+def _body_error(error_type: str, msg: str, loc=("body",)) -> RequestValidationError:
+    return RequestValidationError([{"type": error_type, "loc": loc, "msg": msg, "input": None}])
+
+def _decode(content_type: str, body: bytes):
+    """-> ("records", list of dicts) or ("columns", column -> array)."""
+    if not body:
+        raise _body_error("missing", "Field required")
+    if content_type != JSON:
+        try:
+            return "columns", decode_columns(content_type, body)
+        except UnsupportedFormat as e:
+            raise HTTPException(status_code=415, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Cannot decode {content_type} body: {e}")
+
+    try:
+        payload = loads_json(body)
+    except ValueError:
+        raise _body_error("json_invalid", "JSON decode error", loc=("body", 0))
+    if isinstance(payload, dict) and "columns" in payload:
+        columns = payload["columns"]
+        if not isinstance(columns, dict) or not all(isinstance(v, list) for v in columns.values()):
+            from .schema import SchemaError
+            raise SchemaError('Columns must map column name -> array.')
+        return "columns", columns
     try:
-        df = pd.DataFrame(req.records)
+        return "records", PredictRequest.model_validate(payload).records
+    except ValidationError as e:
+        raise RequestValidationError([{**err, "loc": ("body", *err["loc"])} for err in e.errors()])
 
-        df = validate_dataframe(
-            df,
-            allow_extra_columns=pred.allow_extra_columns,
-            strict_categories=pred.strict_categories,
-            require_non_empty=True,
-        )
-        df = df[REQUIRED_COLUMNS]
+def _predict(request: Request, body: bytes, content_type: str, accept: str,
+             run_id: Optional[str] = None) -> Response:
+    from .schema import SchemaError, validate_columns, validate_records
+
+    t0 = time.perf_counter()
+    try:
+        with span("decode"):
+            kind, payload = _decode(content_type, body)
+        n_rows = len(payload) if kind == "records" else len(next(iter(payload.values()), []))
+
+        admission = request.app.state.admission
+        if admission is not None and n_rows > admission.max_rows:
+            admission.reject("too_many_rows", "/predict")
+            raise HTTPException(status_code=413, detail=f"Too many records: {n_rows} > {admission.max_rows}")
+        pred = _require_predictor(request, run_id)
+        timer = current_timer()
+        if timer is not None:
+            timer.labels["run_id"] = pred.run_id or "none"
 
-        result = pred.predict_df(df)
+        # validated once, straight from the records / columns (no DataFrame round trip)
+        with span("validate"):
+            validate = validate_records if kind == "records" else validate_columns
+            batch = validate(
+                payload,
+                allow_extra_columns=pred.allow_extra_columns,
+                strict_categories=pred.strict_categories,
+                require_non_empty=True,
+            )
+
+        batcher = request.app.state.batcher
+        cache = request.app.state.cache
+        # batched: scored together with concurrent requests; drift stays per request
+        scorer = pred.score if batcher is None else (lambda b: batcher.submit(pred, b))
+        # "score" includes the nested transform/forest spans (and cache lookup, batch wait)
+        with span("score"):
+            if cache is None:
+                scores = scorer(batch)
+            else:
+                # keys carry the run_id, so pooled runs share the cache with the active one
+                scores = cache.score(pred, batch, scorer)
+
+        with span("drift"):
+            monitor = request.app.state.drift_monitor
+            if monitor is not None:
+                # async: just hand the batch over; full report on /drift
+                monitor.observe(batch)
+                drift = monitor.flag()
+            elif request.app.state.drift_mode == "inline":
+                drift = pred.drift(batch)
+            else:
+                drift = None
+
+        latency_ms = (time.perf_counter() - t0) * 1000.0
+        # predictions go out as one array (JSON list / .npy / Arrow column), never per-row objects
+        with span("serialize"):
+            content, media = encode_predictions(accept, scores, {"drift": drift, "latency_ms": latency_ms})
 
     except SchemaError as e:
         raise HTTPException(status_code=422,
                             detail={"error": str(e), "details":e.details})
-    
+
+    except (HTTPException, RequestValidationError):
+        raise
+
     except Exception:
         logger.exception("Prediction failed")
         raise HTTPException(status_code=500, detail="Internal error")
-    
-    latency_ms = (time.time() - t0) * 1000.0
-    logger.info("predict_ok rows=%d latency_ms=%.2f", len(req.records), latency_ms)
-
-    return PredictResponse(
-        predictions=result["predictions"],
-        drift=result.get("drift"),
-        latency_ms=latency_ms,
-    )
+
+    logger.info("predict_ok rows=%d format=%s latency_ms=%.2f", n_rows, content_type, latency_ms)
+    handler_finished(request.scope)
+    return Response(content=content, media_type=media,
+                    headers={"X-Latency-Ms": f"{latency_ms:.3f}", "X-Run-Id": pred.run_id or ""})
+
+@app.post("/predict", response_model=PredictResponse, openapi_extra=_PREDICT_OPENAPI)
+async def predict(request: Request, run_id: Optional[str] = None):
+    """Body: JSON {"records": [...]} or {"columns": {...}}, Arrow IPC stream, or .npy structured array.
+
+    The response format follows Accept (JSON, .npy or Arrow); binary responses carry
+    only the predictions, with the latency in X-Latency-Ms. ``run_id`` scores with that
+    registry run instead of the active one (see /meta "runs"); X-Run-Id names the model used.
+    """
+    handler_started(request.scope)
+    try:
+        content_type = media_type(request.headers.get("content-type"))
+        accept = negotiate(request.headers.get("accept"))
+    except UnsupportedFormat as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    body = await request.body()
+    # dedicated inference pool: model calls never queue behind other sync endpoints
+    return await request.app.state.executor.run(_predict, request, body, content_type, accept, run_id)
+
+IMPORT_SECONDS = time.perf_counter() - IMPORT_T0
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Sequence
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from .forest import compile_forest
+from .predictor import Predictor, compile_transform
+from .schema import REQUIRED_COLUMNS
+
+
+def time_call(fn: Callable[[], Any], min_seconds: float = 0.2, min_repeats: int = 3,
+              max_repeats: int = 1000) -> Dict[str, float]:
+    """Per-call wall time; repeats until both min_repeats and min_seconds are reached."""
+    fn()  # warm-up (lazy imports, caches)
+    times: List[float] = []
+    start = time.perf_counter()
+    while len(times) < min_repeats or (time.perf_counter() - start < min_seconds and len(times) < max_repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    ms = np.asarray(times) * 1000.0
+    return {
+        "repeats": len(times),
+        "median_ms": float(np.median(ms)),
+        "min_ms": float(ms.min()),
+        "p90_ms": float(np.percentile(ms, 90)),
+        "p99_ms": float(np.percentile(ms, 99)),
+    }
+
+
+def sample_batches(df: pd.DataFrame, sizes: Sequence[int], seed: int = 0) -> Dict[int, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    frame = df[REQUIRED_COLUMNS]
+    return {n: frame.iloc[rng.integers(0, len(frame), size=n)].reset_index(drop=True) for n in sizes}
+
+
+def serving_predictor(pipe) -> Predictor:
+    """Predictor as the service builds it: compiled forest and transform where they apply."""
+    try:
+        forest = compile_forest(pipe[-1])
+    except (TypeError, ValueError):
+        forest = None
+    return Predictor(model=pipe, forest=forest, transform=compile_transform(pipe[:-1], None))
+
+
+def latency_profile(pred: Predictor, df: pd.DataFrame, sizes: Sequence[int] = (1, 1000),
+                    min_seconds: float = 0.5, seed: int = 0) -> Dict[str, Dict[str, float]]:
+    """p50/p99 of predict_df per batch size, keyed "rows_<n>"."""
+    out = {}
+    for n, batch in sample_batches(df, sizes, seed).items():
+        r = time_call(lambda: pred.predict_df(batch), min_seconds=min_seconds, min_repeats=5)
+        out[f"rows_{n}"] = {"p50_ms": r["median_ms"], "p99_ms": r["p99_ms"], "repeats": r["repeats"]}
+    return out
+
+
+def artifact_bytes(model) -> int:
+    """Size of the model as ModelRegistry.save writes it (joblib, uncompressed)."""
+    fd, path = tempfile.mkstemp(suffix=".joblib")
+    os.close(fd)
+    try:
+        joblib.dump(model, path)
+        return os.path.getsize(path)
+    finally:
+        os.remove(path)
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import math
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with relative accuracy (DDSketch-style log buckets).
+
+    Any quantile estimate is within ``relative_accuracy`` of a true sample value at
+    that rank. Memory grows with the log of the value range, not with the row count,
+    and two sketches with the same accuracy merge by adding bucket counts.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.005, min_value: float = 1e-9):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.positive: Counter = Counter()
+        self.negative: Counter = Counter()
+        self.zeros = 0
+        self.count = 0
+        self.missing = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _indices(self, magnitudes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        idx = np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+        return np.unique(idx, return_counts=True)
+
+    def add(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64).ravel()
+        nan = np.isnan(values)
+        self.missing += int(nan.sum())
+        values = values[~nan]
+        if values.size == 0:
+            return
+
+        self.count += int(values.size)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        pos = values[values > self.min_value]
+        neg = -values[values < -self.min_value]
+        self.zeros += int(values.size - pos.size - neg.size)
+        for store, mags in ((self.positive, pos), (self.negative, neg)):
+            if mags.size:
+                for i, c in zip(*self._indices(mags)):
+                    store[int(i)] += int(c)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative_accuracy")
+        self.positive.update(other.positive)
+        self.negative.update(other.negative)
+        self.zeros += other.zeros
+        self.count += other.count
+        self.missing += other.missing
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def _value(self, index: int) -> float:
+        return 2.0 * self._gamma ** index / (self._gamma + 1.0)
+
+    def quantiles(self, qs: Iterable[float]) -> List[float]:
+        qs = list(qs)
+        if self.count == 0:
+            return [float("nan")] * len(qs)
+
+        # buckets in ascending value order: negatives (largest magnitude first), zero, positives
+        buckets: List[Tuple[float, int]] = [(-self._value(i), self.negative[i])
+                                             for i in sorted(self.negative, reverse=True)]
+        if self.zeros:
+            buckets.append((0.0, self.zeros))
+        buckets += [(self._value(i), self.positive[i]) for i in sorted(self.positive)]
+
+        cum = np.cumsum([c for _, c in buckets])
+        out = []
+        for q in qs:
+            rank = q * (self.count - 1)
+            value = buckets[int(np.searchsorted(cum, rank, side="right"))][0]
+            out.append(float(min(max(value, self.min), self.max)))
+        return out
+
+    def quantile(self, q: float) -> float:
+        return self.quantiles([q])[0]
+
+
+class FrequencyCounter:
+    """Mergeable category counter; missing values are counted under ``missing_label``."""
+
+    def __init__(self, missing_label: str = "<<MISSING>>"):
+        self.missing_label = missing_label
+        self.counts: Counter = Counter()
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def add(self, values: Iterable[Any]) -> None:
+        self.counts.update(self.missing_label if (v is None or v != v) else v for v in values)
+
+    def add_codes(self, codes: np.ndarray, categories: List[Any]) -> None:
+        """Count integer codes into `categories` (-1 = missing) without touching each row."""
+        n = np.bincount(codes + 1, minlength=len(categories) + 1)
+        if n[0]:
+            self.counts[self.missing_label] += int(n[0])
+        for cat, c in zip(categories, n[1:].tolist()):
+            if c:
+                self.counts[cat] += c
+
+    def merge(self, other: "FrequencyCounter") -> None:
+        self.counts.update(other.counts)
+
+    def frequencies(self) -> Dict[Any, float]:
+        total = self.total
+        return {k: v / total for k, v in self.counts.items()} if total else {}
+
+    def top(self, n: int = 5) -> List[Tuple[Any, float]]:
+        return sorted(self.frequencies().items(), key=lambda x: -x[1])[:n]
+
+
+def merged(sketches: Iterable[Optional[QuantileSketch]]) -> Optional[QuantileSketch]:
+    out = None
+    for s in sketches:
+        if s is None:
+            continue
+        if out is None:
+            out = QuantileSketch(s.relative_accuracy, s.min_value)
+        out.merge(s)
+    return out
@@ -1,56 +1,281 @@
 import logging
+import time
 from pathlib import Path
+from typing import Optional
 
-from sklearn.model_selection import GridSearchCV, cross_val_score
+import numpy as np
+from sklearn.base import clone
+from threadpoolctl import threadpool_limits
 
 from .config import AppConfig
 from .pipeline import build_pipeline
 from .evaluate import regression_metrics
 from .io import write_json
+from .forest import compile_forest
+from .predictor import compile_transform, load_predictor
 from .profiling import build_training_profile
 from .registry import ModelRegistry
+from .schedule import CoreScheduler, resolve_cores
+from .serving import artifact_bytes, latency_profile, serving_predictor, time_call
+from .search import CachedGridSearch, FoldCache, cross_val_score_cached, oob_score_cached, supports_oob
 
 logger = logging.getLogger(__name__)
 
 
-def train_and_select(cfg: AppConfig, X_train, y_train):
-    pipe = build_pipeline(random_state=cfg.model.random_state, n_jobs=cfg.model.n_jobs)
+def _backend_grid(pipe, param_grid: dict) -> dict:
+    # param_grid may hold keys for several backends; each searches the keys of its own steps
+    steps = {name for name, _ in pipe.steps}
+    return {k: v for k, v in param_grid.items() if k.split("__", 1)[0] in steps}
+
+
+def _rmse(scoring: str, score: Optional[float]):
+    if score is None:
+        return None
+    if scoring == "neg_mean_squared_error":
+        return float(np.sqrt(-score))
+    if scoring == "neg_root_mean_squared_error":
+        return float(-score)
+    return None
+
+
+def _rank_corr(a, b) -> Optional[float]:
+    # Spearman: do CV and OOB order the candidates the same way?
+    if len(a) < 2:
+        return None
+    ra, rb = np.argsort(np.argsort(a)), np.argsort(np.argsort(b))
+    if ra.std() == 0 or rb.std() == 0:
+        return None
+    return float(np.corrcoef(ra, rb)[0, 1])
+
+
+def _has_budget(model_cfg) -> bool:
+    return model_cfg.latency_budget_ms is not None or model_cfg.batch_latency_budget_ms is not None
 
-    cv_scores = cross_val_score(
-        pipe,
-        X_train,
-        y_train,
-        cv=3,
-        scoring="neg_root_mean_squared_error",
-        n_jobs=cfg.model.n_jobs,
-    )
-    logger.info("Sanity CV RMSE: mean=%.4f std=%.4f", (-cv_scores).mean(), (-cv_scores).std())
 
-    if not cfg.grid.enabled:
-        pipe.fit(X_train, y_train)
-        meta = {"cv_rmse_mean": float((-cv_scores).mean()), "cv_rmse_std": float((-cv_scores).std())}
-        return pipe, meta
+def _within_budget(model_cfg, latency: dict) -> bool:
+    single = latency["rows_1"]["p99_ms"]
+    batch = latency[f"rows_{model_cfg.latency_batch_rows}"]["p99_ms"]
+    return ((model_cfg.latency_budget_ms is None or single <= model_cfg.latency_budget_ms)
+            and (model_cfg.batch_latency_budget_ms is None or batch <= model_cfg.batch_latency_budget_ms))
 
-    gs = GridSearchCV(
-        estimator=pipe,
-        param_grid=cfg.grid.param_grid,
+
+def make_scheduler(cfg: AppConfig) -> CoreScheduler:
+    cores = resolve_cores(cfg.parallel.cores, cfg.model.n_jobs)
+    return CoreScheduler(cores=cores, outer_jobs=cfg.parallel.outer_jobs, backend=cfg.parallel.backend)
+
+
+def search_backend(cfg: AppConfig, model_type: str, X_train, y_train, fold_cache: FoldCache,
+                   scheduler: Optional[CoreScheduler] = None, evaluation: Optional[str] = None):
+    """Grid search one backend, then walk its candidates best-first until one fits the latency budget.
+
+    ``evaluation`` overrides ``cfg.grid.evaluation``. Returns (fitted model or None, report).
+    """
+    scheduler = scheduler or make_scheduler(cfg)
+    # single fits (refits, the budget walk) get every core of the budget
+    pipe = build_pipeline(random_state=cfg.model.random_state, n_jobs=scheduler.cores, model_type=model_type)
+    gs = CachedGridSearch(
+        pipe,
+        param_grid=_backend_grid(pipe, cfg.grid.param_grid) if cfg.grid.enabled else {},
         cv=cfg.grid.cv,
         scoring=cfg.grid.scoring,
-        n_jobs=cfg.model.n_jobs,
-        refit=True,
+        cache=fold_cache,
+        strategy=cfg.grid.strategy,
+        warm_start=cfg.grid.warm_start,
+        resource=cfg.grid.resource,
+        factor=cfg.grid.factor,
+        random_state=cfg.model.random_state,
+        scheduler=scheduler,
+        evaluation=evaluation or cfg.grid.evaluation,
     )
+    t0 = time.perf_counter()
     gs.fit(X_train, y_train)
+    search_seconds = time.perf_counter() - t0
+
+    report = {"evaluation": gs.evaluation_,
+              "search": {"strategy": cfg.grid.strategy, "warm_start": cfg.grid.warm_start,
+                         "candidates_scored": len(gs.cv_results_), "seconds": search_seconds},
+              "rejected": []}
+    if gs.evaluation_ == "both":
+        report["search"]["oob_cv_rank_corr"] = _rank_corr([s for _, s in gs.ranked_], gs.oob_scores_)
+    if gs.oob_scores_ is not None:
+        # the candidate with the pipeline's own parameters, if the grid has one (the sanity score)
+        defaults = pipe.get_params()
+        report["search"]["default_oob_score"] = next(
+            (float(oob) for (params, _), oob in zip(gs.ranked_, gs.oob_scores_)
+             if all(defaults[k] == v for k, v in params.items())), None)
+    for rank, (params, score) in enumerate(gs.ranked_):
+        model = gs.best_estimator_ if rank == 0 else clone(pipe).set_params(**params).fit(X_train, y_train)
+        latency = latency_profile(serving_predictor(model), X_train, sizes=(1, cfg.model.latency_batch_rows))
+        # "score" is what selection uses: OOB under evaluation=oob, else CV
+        cv_score = None if gs.evaluation_ == "oob" else float(score)
+        candidate = {"params": params, "score": float(score), "rmse": _rmse(cfg.grid.scoring, score),
+                     "cv_score": cv_score, "cv_rmse": _rmse(cfg.grid.scoring, cv_score), "latency_ms": latency}
+        if gs.oob_scores_ is not None:
+            candidate.update(oob_score=float(gs.oob_scores_[rank]),
+                             oob_rmse=_rmse(cfg.grid.scoring, gs.oob_scores_[rank]))
+        if _within_budget(cfg.model, latency):
+            report.update(candidate, artifact_bytes=artifact_bytes(model))
+            logger.info("Backend %s: %s_rmse=%s params=%s p99_ms(1)=%.3f p99_ms(%d)=%.3f bytes=%d",
+                        model_type, gs.evaluation_, candidate["rmse"], params, latency["rows_1"]["p99_ms"],
+                        cfg.model.latency_batch_rows,
+                        latency[f"rows_{cfg.model.latency_batch_rows}"]["p99_ms"], report["artifact_bytes"])
+            return model, report
+        logger.warning("Backend %s candidate %s over the latency budget: %s", model_type, params, latency)
+        report["rejected"].append(candidate)
+    return None, report
+
+
+def train_and_select(cfg: AppConfig, X_train, y_train):
+    scheduler = make_scheduler(cfg)
+    # OpenMP (HGB) and BLAS (Ridge) pools stay within the budget as well
+    with threadpool_limits(limits=scheduler.cores):
+        model, meta = _select(cfg, X_train, y_train, scheduler)
+    meta["parallel"] = scheduler.stats()
+    logger.info("Core budget: %s", meta["parallel"])
+    return model, meta
 
-    logger.info("Best params: %s", gs.best_params_)
-    best = gs.best_estimator_
+
+def _select(cfg: AppConfig, X_train, y_train, scheduler: CoreScheduler):
+    pipe = build_pipeline(random_state=cfg.model.random_state, n_jobs=scheduler.cores,
+                          model_type=cfg.model.type)
+
+    # model.type first, so it wins ties
+    backends = list(dict.fromkeys((cfg.model.type, *cfg.model.compare)))
+    budget = {"latency_budget_ms": cfg.model.latency_budget_ms,
+              "batch_latency_budget_ms": cfg.model.batch_latency_budget_ms,
+              "latency_batch_rows": cfg.model.latency_batch_rows}
+    evaluation = cfg.grid.evaluation
+    if evaluation == "oob" and len(backends) > 1:
+        # an OOB score is not comparable with the CV scores of backends without out-of-bag rows
+        logger.warning("evaluation=oob with backends %s: selecting all of them on CV, "
+                       "OOB scores are recorded as with evaluation=both", backends)
+        evaluation = "both"
+
+    # each fold's preprocessing is fitted once and shared by the sanity CV and every grid candidate
+    fold_cache = FoldCache()
+    oob = evaluation != "cv" and supports_oob(pipe[-1])
+    sanity = {}
+    if not (oob and evaluation == "oob"):
+        cv_scores = cross_val_score_cached(
+            pipe,
+            X_train,
+            y_train,
+            cv=3,
+            scoring="neg_root_mean_squared_error",
+            cache=fold_cache,
+            scheduler=scheduler,
+        )
+        logger.info("Sanity CV RMSE: mean=%.4f std=%.4f", (-cv_scores).mean(), (-cv_scores).std())
+        sanity.update(cv_rmse_mean=float((-cv_scores).mean()), cv_rmse_std=float((-cv_scores).std()))
+
+    if not cfg.grid.enabled and backends == [cfg.model.type] and not _has_budget(cfg.model):
+        if oob:
+            # one fit on all training rows gives both the sanity score and the final model
+            oob_score, model = oob_score_cached(pipe, X_train, y_train, scoring="neg_root_mean_squared_error",
+                                                cache=fold_cache, scheduler=scheduler)
+            logger.info("Sanity OOB RMSE: %.4f", -oob_score)
+            sanity["oob_rmse"] = float(-oob_score)
+        else:
+            model = pipe.fit(X_train, y_train)
+        meta = {"model_type": cfg.model.type, "evaluation": evaluation if oob else "cv",
+                **sanity, "fold_cache": fold_cache.stats()}
+        return model, meta
+
+    fitted, reports = {}, {}
+    for model_type in backends:
+        model, reports[model_type] = search_backend(cfg, model_type, X_train, y_train, fold_cache, scheduler,
+                                                    evaluation=evaluation)
+        if model is not None:
+            fitted[model_type] = model
+    if not fitted:
+        raise ValueError(f"No {'/'.join(backends)} candidate meets the latency budget {budget}")
+    if oob:
+        # the grid has fitted the default parameters on all rows already, if they are one of its candidates
+        oob_rmse = _rmse(cfg.grid.scoring, reports[cfg.model.type]["search"].get("default_oob_score"))
+        if oob_rmse is None:
+            oob_score, _ = oob_score_cached(pipe, X_train, y_train, scoring="neg_root_mean_squared_error",
+                                            cache=fold_cache, scheduler=scheduler)
+            oob_rmse = float(-oob_score)
+        logger.info("Sanity OOB RMSE: %.4f", oob_rmse)
+        sanity["oob_rmse"] = oob_rmse
+
+    selected = max(fitted, key=lambda t: (reports[t]["score"], -backends.index(t)))
+    best = reports[selected]
+    logger.info("Selected backend %s: params=%s %s_score=%.4f (backends=%s)",
+                selected, best["params"], best["evaluation"], best["score"],
+                {t: (r.get("evaluation"), r.get("rmse")) for t, r in reports.items()})
+    logger.info("Fold cache: %s", fold_cache.stats())
 
     meta = {
-        "best_params": gs.best_params_,
-        "best_cv_score": float(gs.best_score_),
-        "sanity_cv_rmse_mean": float((-cv_scores).mean()),
-        "sanity_cv_rmse_std": float((-cv_scores).std()),
+        "model_type": selected,
+        "best_params": best["params"],
+        "evaluation": best["evaluation"],
+        "best_score": best["score"],
+        "best_cv_score": best["cv_score"],
+        "cv_rmse": best["cv_rmse"],
+        "oob_rmse": best.get("oob_rmse"),
+        "search": best["search"],
+        "latency_budget": budget,
+        "backends": reports,
+        **{f"sanity_{k}": v for k, v in sanity.items()},
+        "fold_cache": fold_cache.stats(),
     }
-    return best, meta
+    return fitted[selected], meta
+
+
+def _timed_load(path: str, **kwargs):
+    t0 = time.perf_counter()
+    pred = load_predictor(path, engine="compiled", transform="compiled", **kwargs)
+    return pred, time.perf_counter() - t0
+
+
+def compact_report(registry: ModelRegistry, run_id: str, max_leaf_error: float, X_test, y_test) -> dict:
+    """Compact artifact vs. the full model: prediction error, file size, load time and latency."""
+    model_path = str(registry.model_path(run_id))
+    full, full_load = _timed_load(model_path)
+    compact, compact_load = _timed_load(model_path, compact=True, mmap=True)
+    if not compact.forest or not compact.forest.compact:
+        return {"enabled": False}
+
+    p_full = np.asarray(full.predict_df(X_test)["predictions"])
+    p_compact = np.asarray(compact.predict_df(X_test)["predictions"])
+    diff = np.abs(p_compact - p_full)
+    one = X_test.iloc[:1]
+
+    def size(path):
+        return path.stat().st_size if path.exists() else None
+
+    return {
+        "enabled": True,
+        "path": str(registry.compact_path(run_id)),
+        "max_leaf_error": max_leaf_error,
+        "max_abs_error": float(diff.max()),
+        "mean_abs_error": float(diff.mean()),
+        "rmse_full": float(np.sqrt(np.mean((np.asarray(y_test) - p_full) ** 2))),
+        "rmse_compact": float(np.sqrt(np.mean((np.asarray(y_test) - p_compact) ** 2))),
+        "bytes": {"joblib": size(registry.model_path(run_id)), "mmap": size(registry.mmap_path(run_id)),
+                  "compact": size(registry.compact_path(run_id))},
+        "forest_bytes": {"full": full.forest.nbytes, "compact": compact.forest.nbytes},
+        "load_seconds": {"full": full_load, "compact": compact_load},
+        "latency_ms": {
+            "full": {"rows_1": time_call(lambda: full.predict_df(one))["median_ms"],
+                     f"rows_{len(X_test)}": time_call(lambda: full.predict_df(X_test))["median_ms"]},
+            "compact": {"rows_1": time_call(lambda: compact.predict_df(one))["median_ms"],
+                        f"rows_{len(X_test)}": time_call(lambda: compact.predict_df(X_test))["median_ms"]},
+        },
+    }
+
+
+def save_serving_artifact(registry: ModelRegistry, model, run_id: str, profile: dict):
+    """Inference-only artifact for fast service starts; None when the model can't be compiled."""
+    try:
+        forest = compile_forest(model[-1])
+    except (TypeError, ValueError):
+        return None
+    transform = compile_transform(model[:-1], profile)
+    if transform is None:
+        return None
+    return str(registry.save_serving(run_id, forest, transform, profile))
 
 
 def fit(cfg: AppConfig, run_id: str, X_train, y_train, X_test, y_test) -> dict:
@@ -68,11 +293,17 @@ def fit(cfg: AppConfig, run_id: str, X_train, y_train, X_test, y_test) -> dict:
     # Save model into registry + activate
     registry = ModelRegistry(Path("artifacts/models/registry"))
     model_path = str(registry.save(model, run_id=run_id))
+    # written before activation so a running service finds them on reload
+    serving_path = save_serving_artifact(registry, model, run_id, profile)
+    if cfg.compact.enabled and registry.save_compact(model, run_id, cfg.compact.max_leaf_error) is not None:
+        meta["compact"] = compact_report(registry, run_id, cfg.compact.max_leaf_error, X_test, y_test)
+        logger.info("Compact artifact: %s", meta["compact"])
     active_path = str(registry.set_active(run_id))
 
     # Persist metrics for debugging/ops
     metrics_path = "artifacts/reports/metrics.json"
-    write_json(metrics_path, {**metrics, **meta, "run_id": run_id, "model_path": model_path})
+    write_json(metrics_path, {**metrics, **meta, "run_id": run_id, "model_path": model_path,
+                              "serving_path": serving_path})
 
     logger.info(
         "train_done run_id=%s rmse=%.4f mae=%.4f r2=%.4f model=%s active=%s",
@@ -82,6 +313,7 @@ def fit(cfg: AppConfig, run_id: str, X_train, y_train, X_test, y_test) -> dict:
     return {
         "run_id": run_id,
         "registry_model_path": model_path,
+        "serving_path": serving_path,
         "active_model_path": active_path,
         "training_profile_path": profile_path,
         "metrics_path": metrics_path,
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# sklearn (and .features, which imports it) is only needed to compile: unpickling and
+# running a CompiledPreprocessor stays NumPy-only, which keeps service cold starts short
+from .schema import ALLOWED_OCEAN_PROXIMITY, REQUIRED_CATEGORICAL, REQUIRED_NUMERIC, ValidatedBatch
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Block:
+    # one ColumnTransformer branch, writing `width` output columns starting at `start`
+    kind: str                           # "numeric" or "onehot"
+    start: int
+    width: int
+    slots: List[int]                    # imputed input slots (numeric) / column index (onehot)
+    func: Optional[str] = None          # None, "ratio" or "log1p"
+    mean: Optional[np.ndarray] = None
+    scale: Optional[np.ndarray] = None
+    categories: Optional[Dict[Any, int]] = None
+    fill_index: int = -1                # one-hot column used for missing values
+
+
+@dataclass
+class CompiledPreprocessor:
+    """Fitted preprocessing ColumnTransformer re-expressed as plain NumPy operations.
+
+    Every (column, median) pair is imputed once into a float64 work array, then each
+    branch writes its columns straight into one preallocated output matrix.
+    """
+    numeric_columns: List[str]
+    categorical_columns: List[str]
+    slot_columns: np.ndarray            # input numeric column per slot
+    slot_fill: np.ndarray               # imputation value per slot (nan = no imputation)
+    blocks: List[_Block] = field(default_factory=list)
+    n_features_out: int = 0
+
+    def transform(self, df: pd.DataFrame, out: Optional[np.ndarray] = None) -> np.ndarray:
+        src = df[[self.numeric_columns[i] for i in self.slot_columns]].to_numpy(dtype=np.float64, copy=True)
+        cat_index = []
+        for b in self.blocks:
+            if b.kind == "onehot":
+                values = df[self.categorical_columns[b.slots[0]]].to_numpy(dtype=object)
+                idx = np.fromiter((b.categories.get(v, -1) for v in values), dtype=np.intp, count=len(values))
+                idx[pd.isna(values)] = b.fill_index
+                cat_index.append(idx)
+        return self._run(src, cat_index, out)
+
+    def transform_batch(self, batch: ValidatedBatch, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Same output as transform(batch.to_frame()), straight from the validated arrays."""
+        if self.categorical_columns and self.categorical_columns != REQUIRED_CATEGORICAL:
+            raise ValueError(f"Unsupported categorical columns: {self.categorical_columns}")
+        positions = [REQUIRED_NUMERIC.index(self.numeric_columns[i]) for i in self.slot_columns]
+        src = batch.numeric[:, positions]
+        cat_index = []
+        for b in self.blocks:
+            if b.kind == "onehot":
+                # per-category lookup table instead of per-row dict lookups; last entry = missing
+                lut = np.array([b.categories.get(c, -1) for c in batch.categories] + [b.fill_index],
+                               dtype=np.intp)
+                cat_index.append(lut[batch.codes])
+        return self._run(src, cat_index, out)
+
+    def _run(self, src: np.ndarray, cat_index: List[np.ndarray],
+             out: Optional[np.ndarray] = None) -> np.ndarray:
+        n = src.shape[0]
+        if out is None:
+            out = np.empty((n, self.n_features_out), dtype=np.float64)
+
+        impute = ~np.isnan(self.slot_fill)
+        np.copyto(src, self.slot_fill, where=np.isnan(src) & impute)
+
+        onehot = iter(cat_index)
+        for b in self.blocks:
+            dst = out[:, b.start:b.start + b.width]
+            if b.kind == "onehot":
+                idx = next(onehot)
+                dst.fill(0.0)
+                hit = idx >= 0  # unknown categories stay all-zero (handle_unknown="ignore")
+                dst[np.flatnonzero(hit), idx[hit]] = 1.0
+                continue
+
+            if b.func == "ratio":
+                num, den = src[:, b.slots[0]], src[:, b.slots[1]]
+                dst.fill(0.0)
+                np.divide(num[:, None], den[:, None], out=dst, where=(den != 0)[:, None])
+            elif b.func == "log1p":
+                np.clip(src[:, b.slots], 0, None, out=dst)
+                np.log1p(dst, out=dst)
+            else:
+                dst[...] = src[:, b.slots]
+
+            if b.mean is not None:
+                dst -= b.mean
+            if b.scale is not None:
+                dst /= b.scale
+
+        return out
+
+
+def _steps(transformer) -> list:
+    from sklearn.pipeline import Pipeline
+
+    if transformer == "passthrough":
+        return []
+    if isinstance(transformer, Pipeline):
+        return [s for _, s in transformer.steps if s != "passthrough"]
+    return [transformer]
+
+
+def _scaler_params(scaler):
+    mean = np.asarray(scaler.mean_, dtype=np.float64) if scaler.with_mean else None
+    scale = np.asarray(scaler.scale_, dtype=np.float64) if scaler.with_std else None
+    return mean, scale
+
+
+def compile_preprocessing(preprocessing) -> CompiledPreprocessor:
+    """Compile a fitted ``make_preprocessing()`` ColumnTransformer (or a Pipeline wrapping it)."""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, StandardScaler
+
+    from .features import safe_log1p, safe_ratio
+
+    funcs = {safe_ratio: "ratio", safe_log1p: "log1p"}
+    if isinstance(preprocessing, Pipeline) and len(preprocessing.steps) == 1:
+        preprocessing = preprocessing.steps[0][1]
+    if not isinstance(preprocessing, ColumnTransformer):
+        raise ValueError(f"Cannot compile {type(preprocessing).__name__}: expected a ColumnTransformer")
+
+    names_in = list(preprocessing.feature_names_in_)
+    numeric_columns: List[str] = []
+    categorical_columns: List[str] = []
+    slots: Dict[tuple, int] = {}
+    slot_columns: List[int] = []
+    slot_fill: List[float] = []
+    blocks: List[_Block] = []
+    start = 0
+
+    def slot(col: str, fill: float) -> int:
+        if col not in numeric_columns:
+            numeric_columns.append(col)
+        key = (col, None if np.isnan(fill) else fill)
+        if key not in slots:
+            slots[key] = len(slot_columns)
+            slot_columns.append(numeric_columns.index(col))
+            slot_fill.append(fill)
+        return slots[key]
+
+    for name, transformer, columns in preprocessing.transformers_:
+        if transformer == "drop":
+            continue
+        cols = [names_in[c] if isinstance(c, (int, np.integer)) else c for c in columns]
+        if not cols:
+            continue
+        steps = _steps(transformer)
+
+        if steps and isinstance(steps[-1], OneHotEncoder):
+            enc = steps[-1]
+            if (len(cols) != 1 or enc.handle_unknown != "ignore" or enc.drop_idx_ is not None
+                    or getattr(enc, "_infrequent_enabled", False)):
+                raise ValueError(f"Unsupported OneHotEncoder configuration in {name!r}")
+            cats = list(enc.categories_[0])
+            fill_index = -1
+            for s in steps[:-1]:
+                if not (isinstance(s, SimpleImputer) and s.strategy in ("most_frequent", "constant")):
+                    raise ValueError(f"Unsupported step {type(s).__name__} in {name!r}")
+                fill = s.statistics_[0]
+                fill_index = cats.index(fill) if fill in cats else -1
+            categorical_columns.append(cols[0])
+            blocks.append(_Block(kind="onehot", start=start, width=len(cats),
+                                 slots=[len(categorical_columns) - 1],
+                                 categories={c: i for i, c in enumerate(cats)},
+                                 fill_index=fill_index))
+            start += len(cats)
+            continue
+
+        fills = [float("nan")] * len(cols)
+        func = None
+        mean = scale = None
+        for s in steps:
+            if isinstance(s, SimpleImputer) and func is None and mean is None:
+                if s.add_indicator or not (isinstance(s.missing_values, float) and np.isnan(s.missing_values)):
+                    raise ValueError(f"Unsupported SimpleImputer configuration in {name!r}")
+                stats = np.asarray(s.statistics_, dtype=np.float64)
+                if np.isnan(stats).any():
+                    raise ValueError(f"SimpleImputer in {name!r} has empty features")
+                fills = [float(v) for v in stats]
+            elif isinstance(s, FunctionTransformer) and func is None and mean is None:
+                func = funcs.get(s.func)
+                if func is None or s.kw_args:
+                    raise ValueError(f"Unsupported function {s.func!r} in {name!r}")
+            elif isinstance(s, StandardScaler) and mean is None and scale is None:
+                mean, scale = _scaler_params(s)
+            else:
+                raise ValueError(f"Unsupported step {type(s).__name__} in {name!r}")
+
+        if func == "ratio" and len(cols) != 2:
+            raise ValueError(f"Ratio branch {name!r} needs exactly two columns")
+        width = 1 if func == "ratio" else len(cols)
+        blocks.append(_Block(kind="numeric", start=start, width=width,
+                             slots=[slot(c, f) for c, f in zip(cols, fills)],
+                             func=func, mean=mean, scale=scale))
+        start += width
+
+    return CompiledPreprocessor(
+        numeric_columns=numeric_columns,
+        categorical_columns=categorical_columns,
+        slot_columns=np.asarray(slot_columns, dtype=np.intp),
+        slot_fill=np.asarray(slot_fill, dtype=np.float64),
+        blocks=blocks,
+        n_features_out=start,
+    )
+
+
+def probe_frame(training_profile: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """Synthetic rows that exercise quantiles, missing values, zeros and unknown categories."""
+    numeric = (training_profile or {}).get("numeric", {})
+    rows = []
+    for q in ("q01", "q05", "q50", "q95", "q99"):
+        rows.append({c: float(numeric[c][q]) if c in numeric else 1.0 for c in REQUIRED_NUMERIC})
+    rows.append({c: 0.0 for c in REQUIRED_NUMERIC})
+    rows.append({c: -1.0 for c in REQUIRED_NUMERIC})
+    rows.append({c: float("nan") for c in REQUIRED_NUMERIC})
+
+    cats = list(ALLOWED_OCEAN_PROXIMITY) + [None, "UNKNOWN"]
+    for i, r in enumerate(rows):
+        r["ocean_proximity"] = cats[i % len(cats)]
+    rows += [{**rows[2], "ocean_proximity": c} for c in cats]
+    return pd.DataFrame(rows)
+
+
+def max_abs_difference(preprocessing, compiled: CompiledPreprocessor, df: pd.DataFrame) -> float:
+    """Largest deviation of both compiled entry points (frame and batch) from sklearn."""
+    expected = preprocessing.transform(df)
+    if hasattr(expected, "toarray"):
+        expected = expected.toarray()
+
+    expected = np.asarray(expected, dtype=np.float64)
+    worst = 0.0
+    for got in (compiled.transform(df), compiled.transform_batch(ValidatedBatch.from_frame(df))):
+        got = np.asarray(got, dtype=np.float64)
+        if expected.shape != got.shape:
+            return float("inf")
+        if np.array_equal(expected, got, equal_nan=True):
+            continue
+        # NaN on one side only (or a different infinity) is no rounding error
+        finite = np.isfinite(expected) & np.isfinite(got)
+        if not np.array_equal(expected[~finite], got[~finite], equal_nan=True):
+            return float("inf")
+        worst = max(worst, float(np.abs(expected[finite] - got[finite]).max()))
+    return worst
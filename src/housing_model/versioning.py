@@ -7,9 +7,13 @@ def sha256_bytes(b: bytes) -> str:
     return hashlib.sha256(b).hexdigest()
 
 
-def sha256_file(path: str) -> str:
-    p = Path(path)
-    return sha256_bytes(p.read_bytes())
+def sha256_file(path: str, chunk_size: int = 1 << 20) -> str:
+    # streamed: memory stays at one chunk whatever the file size
+    h = hashlib.sha256()
+    with Path(path).open('rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
 
 
 def sha256_json(obj: Dict[str, Any]) -> str:
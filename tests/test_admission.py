@@ -0,0 +1,97 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI, Request
+
+from housing_model.metrics import MetricsRegistry
+from housing_model.middleware import AdmissionControl, AdmissionMiddleware
+
+
+def _app(**limits):
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware)
+    app.state.admission = AdmissionControl(MetricsRegistry(), **limits)
+
+    @app.post("/predict")
+    async def predict(request: Request):
+        body = await request.json()
+        await asyncio.sleep(0.05)
+        return {"n": len(body["records"])}
+
+    return app
+
+
+async def _post_many(app, n, body):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(client.post("/predict", json=body) for _ in range(n)))
+
+
+def test_body_limit_and_passthrough():
+    app = _app(max_body_bytes=64)
+    ok, = asyncio.run(_post_many(app, 1, {"records": [1, 2]}))
+    assert ok.status_code == 200 and ok.json() == {"n": 2}
+
+    big, = asyncio.run(_post_many(app, 1, {"records": list(range(100))}))
+    assert big.status_code == 413
+    assert app.state.admission.rejections == {"body_too_large": 1}
+
+
+def test_overload_is_shed_with_retry_after():
+    app = _app(max_concurrency=1, max_queue=1, queue_timeout_ms=500, retry_after_seconds=2)
+    responses = asyncio.run(_post_many(app, 4, {"records": [1]}))
+    codes = sorted(r.status_code for r in responses)
+    assert codes == [200, 200, 429, 429]
+    assert all(r.headers["retry-after"] == "2" for r in responses if r.status_code == 429)
+
+    app = _app(max_concurrency=1, max_queue=4, queue_timeout_ms=10)
+    codes = sorted(r.status_code for r in asyncio.run(_post_many(app, 3, {"records": [1]})))
+    assert codes == [200, 503, 503]
+    control = app.state.admission
+    assert control.rejections == {"queue_timeout": 2}
+    assert control.active == 0 and control.waiting == 0
+
+
+def test_uploads_hold_a_place_and_overflow_is_rejected_unread():
+    app = _app(max_concurrency=1, max_queue=1)
+    control = app.state.admission
+    body = {"type": "http.request", "body": b'{"records": [1]}', "more_body": False}
+    scope = {"type": "http", "http_version": "1.1", "method": "POST", "path": "/predict", "raw_path": b"/predict",
+             "query_string": b"", "root_path": "", "scheme": "http", "server": ("test", 80), "client": ("c", 1),
+             "headers": [(b"content-type", b"application/json")]}
+
+    async def call(receive):
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        await app(dict(scope), receive, send)
+        return messages[0]["status"], messages[0].get("headers", [])
+
+    async def run():
+        uploaded = asyncio.Event()
+
+        async def slow_upload():
+            await uploaded.wait()
+            return body
+
+        reads = []
+
+        async def counted():
+            reads.append(1)
+            return body
+
+        slow = [asyncio.create_task(call(slow_upload)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        assert control.reading == 2 and control.active == 0  # uploading: no concurrency slot held
+
+        status, headers = await call(counted)
+        assert status == 429 and (b"retry-after", b"1") in headers
+        assert reads == []  # rejected before any of the upload was read
+
+        uploaded.set()
+        return [s for s, _ in await asyncio.gather(*slow)]
+
+    assert asyncio.run(run()) == [200, 200]
+    assert control.reading == 0 and control.active == 0 and control.rejections == {"queue_full": 1}
@@ -0,0 +1,64 @@
+import threading
+import time
+
+import numpy as np
+from housing_model.batching import MicroBatcher
+from housing_model.schema import concat_batches, validate_records
+
+RECORD = {
+    "longitude": -122.23, "latitude": 37.88, "housing_median_age": 41, "total_rooms": 880,
+    "total_bedrooms": 129, "population": 322, "households": 126, "median_income": 8.3252,
+    "ocean_proximity": "NEAR BAY",
+}
+
+
+class _SumPredictor:
+    def __init__(self, gate=None):
+        self.calls = 0
+        self.rows_per_call = []
+        self.gate = gate
+
+    def score(self, batch):
+        if self.gate is not None:
+            self.gate.wait(5)  # hold the first call so the other requests queue up behind it
+        self.calls += 1
+        self.rows_per_call.append(len(batch))
+        return batch.numeric[:, 5] * 2.0
+
+
+def test_concat_batches_merges_vocabularies():
+    a = validate_records([{**RECORD, "ocean_proximity": "MARS"}])
+    b = validate_records([{**RECORD, "ocean_proximity": None}, {**RECORD, "ocean_proximity": "VENUS"}])
+    merged = concat_batches([a, b])
+    assert len(merged) == 3
+    assert merged.category_values()[0] == "MARS"
+    assert merged.category_values()[2] == "VENUS"
+
+
+def test_micro_batcher_splits_results_per_request():
+    gate = threading.Event()
+    pred = _SumPredictor(gate)
+    batcher = MicroBatcher(max_batch_rows=64, max_wait_ms=20)
+    batcher.start()
+    batches = [validate_records([{**RECORD, "population": i}] * (i % 3 + 1)) for i in range(12)]
+    results = [None] * len(batches)
+
+    def call(i):
+        results[i] = batcher.submit(pred, batches[i])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(batches))]
+    for t in threads:
+        t.start()
+    time.sleep(0.2)  # every request is submitted while the first model call is held
+    gate.set()
+    for t in threads:
+        t.join()
+    batcher.stop()
+
+    # each caller got its own rows back (population differs per request)
+    for b, r in zip(batches, results):
+        assert np.array_equal(r, b.numeric[:, 5] * 2.0)
+    assert sum(pred.rows_per_call) == sum(len(b) for b in batches)
+    assert batcher.stats()["requests"] == len(batches)
+    assert pred.calls < len(batches)
+    assert max(pred.rows_per_call) > max(len(b) for b in batches)  # a call carried several requests
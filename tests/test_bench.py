@@ -0,0 +1,21 @@
+import pandas as pd
+
+from housing_model.bench import COMPONENTS, _load_or_fit, compare, run_benchmarks
+
+
+def test_run_benchmarks_covers_components_and_sizes():
+    df = pd.read_csv("data/raw/housing.csv", nrows=300)
+    sk, compiled, info = _load_or_fit(None, df, "median_house_value", fit_trees=3)
+    results = run_benchmarks(sk, compiled, df, sizes=(1, 10), min_seconds=0.0)
+
+    assert set(results) == {f"{c}/{n}" for c in COMPONENTS for n in (1, 10)}
+    assert all(r["median_ms"] > 0 and r["repeats"] >= 3 for r in results.values())
+    assert info == {"source": "fit", "n_estimators": 3}
+
+
+def test_compare_flags_only_real_slowdowns():
+    baseline = {"results": {"a/1": {"median_ms": 1.0}, "b/1": {"median_ms": 0.01}, "c/1": {"median_ms": 1.0}}}
+    current = {"results": {"a/1": {"median_ms": 2.0}, "b/1": {"median_ms": 0.03}, "c/1": {"median_ms": 1.1},
+                           "new/1": {"median_ms": 5.0}}}
+    regressions = compare(current, baseline, tolerance=0.25)
+    assert [r["key"] for r in regressions] == ["a/1"]
@@ -0,0 +1,64 @@
+import numpy as np
+from housing_model.cache import PredictionCache
+from housing_model.schema import validate_records
+
+RECORD = {
+    "longitude": -122.23, "latitude": 37.88, "housing_median_age": 41, "total_rooms": 880,
+    "total_bedrooms": 129, "population": 322, "households": 126, "median_income": 8.3252,
+    "ocean_proximity": "NEAR BAY",
+}
+
+
+class _Predictor:
+    def __init__(self, run_id):
+        self.run_id = run_id
+        self.rows_scored = 0
+
+    def score(self, batch):
+        self.rows_scored += len(batch)
+        return batch.numeric[:, 5].copy()
+
+
+def test_cache_dedupes_and_hits():
+    cache = PredictionCache(max_entries=10)
+    pred = _Predictor("run1")
+    batch = validate_records([RECORD, {**RECORD, "population": "322"}, {**RECORD, "population": 5}])
+
+    first = cache.score(pred, batch, pred.score)
+    assert np.array_equal(first, [322.0, 322.0, 5.0])
+    assert pred.rows_scored == 2
+
+    again = cache.score(pred, batch, pred.score)
+    assert np.array_equal(again, first)
+    assert pred.rows_scored == 2
+    assert cache.stats()["hits"] == 3
+
+
+def test_cache_evicts_and_invalidates_on_model_change():
+    cache = PredictionCache(max_entries=2)
+    pred = _Predictor("run1")
+    cache.set_model("run1")
+    cache.score(pred, validate_records([{**RECORD, "population": i} for i in range(3)]), pred.score)
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] == 1
+
+    cache.set_model("run2")
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_cache_never_serves_a_reloaded_model_under_the_same_run_id():
+    cache = PredictionCache(max_entries=10)
+    batch = validate_records([RECORD])
+    old = _Predictor("run1")
+    cache.set_model("run1")
+    assert np.array_equal(cache.score(old, batch, old.score), [322.0])
+
+    # retrained with the same config and data (or a forced reload): same run_id, new model
+    new = _Predictor("run1")
+    cache.set_model("run1")
+    assert cache.stats()["entries"] == 0
+    assert np.array_equal(cache.score(new, batch, lambda b: b.numeric[:, 5] + 1), [323.0])
+    # an in-flight request on the old model neither reads nor overwrites the new model's entries
+    assert np.array_equal(cache.score(old, batch, old.score), [322.0])
+    assert np.array_equal(cache.score(new, batch, new.score), [323.0])
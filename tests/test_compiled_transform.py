@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+from housing_model.pipeline import make_preprocessing
+from housing_model.schema import validate_records
+from housing_model.transform import compile_preprocessing, max_abs_difference, probe_frame
+
+
+def test_compiled_transform_matches_column_transformer():
+    df = pd.read_csv("data/raw/housing.csv", nrows=2000).drop(columns=["median_house_value"])
+    df.loc[::7, "total_bedrooms"] = np.nan
+    df.loc[::11, "ocean_proximity"] = np.nan
+    preprocessing = make_preprocessing().fit(df)
+    compiled = compile_preprocessing(preprocessing)
+
+    for x in (df, df.head(1), probe_frame()):
+        assert np.array_equal(preprocessing.transform(x), compiled.transform(x))
+
+
+def test_compiled_transform_batch_matches_frame():
+    df = pd.read_csv("data/raw/housing.csv", nrows=500).drop(columns=["median_house_value"])
+    preprocessing = make_preprocessing().fit(df)
+    compiled = compile_preprocessing(preprocessing)
+
+    batch = validate_records(df.to_dict(orient="records"))
+    assert np.array_equal(preprocessing.transform(df), compiled.transform_batch(batch))
+
+
+class _NaNAt00:
+    """Wraps a transform so its output has a NaN in the first cell."""
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    def transform(self, x):
+        out = np.array(self.inner.transform(x), dtype=np.float64)
+        out[0, 0] = np.nan
+        return out
+
+    def transform_batch(self, batch):
+        out = np.array(self.inner.transform_batch(batch), dtype=np.float64)
+        out[0, 0] = np.nan
+        return out
+
+
+def test_max_abs_difference_counts_nan_on_one_side_as_a_mismatch():
+    df = pd.read_csv("data/raw/housing.csv", nrows=500).drop(columns=["median_house_value"])
+    preprocessing = make_preprocessing().fit(df)
+    compiled = compile_preprocessing(preprocessing)
+    probe = probe_frame()
+
+    assert max_abs_difference(preprocessing, compiled, probe) == 0.0
+    assert max_abs_difference(preprocessing, _NaNAt00(compiled), probe) == float("inf")  # compiled side NaN
+    assert max_abs_difference(_NaNAt00(preprocessing), compiled, probe) == float("inf")  # sklearn side NaN
+    assert max_abs_difference(_NaNAt00(preprocessing), _NaNAt00(compiled), probe) == 0.0
@@ -0,0 +1,72 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from housing_model.data import load_housing, load_split, stratified_split, streaming_split
+from housing_model.versioning import sha256_file
+
+
+def test_sha256_file_streams_same_digest(tmp_path):
+    p = tmp_path / "blob.bin"
+    p.write_bytes(np.random.default_rng(0).bytes(3_000_001))
+    assert sha256_file(str(p), chunk_size=4096) == hashlib.sha256(p.read_bytes()).hexdigest()
+
+
+def test_column_cache_roundtrip_is_lossless(tmp_path):
+    csv = tmp_path / "housing.csv"
+    pd.read_csv("data/raw/housing.csv", nrows=500).to_csv(csv, index=False)
+    raw = pd.read_csv(csv)
+
+    first = load_housing(str(csv), cache_dir=str(tmp_path / "cache"))
+    cached = load_housing(str(csv), cache_dir=str(tmp_path / "cache"))
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+
+    assert list(cached.columns) == list(raw.columns)
+    assert cached["ocean_proximity"].dtype == "category"
+    assert cached["total_rooms"].dtype == np.float32
+    assert cached["longitude"].dtype == np.float64  # not exactly representable in float32
+    for c in raw.columns:
+        if c == "ocean_proximity":
+            assert cached[c].astype(object).tolist() == raw[c].astype(object).tolist()
+        else:
+            assert np.array_equal(cached[c].to_numpy(np.float64), raw[c].to_numpy(np.float64), equal_nan=True)
+            assert cached[c].dtype == first[c].dtype
+
+
+BINS = [0., 1.5, 3.0, 4.5, 6.0, float("inf")]
+LABELS = [1, 2, 3, 4, 5]
+
+
+def _split(tmp_path, **kw):
+    return streaming_split("data/raw/housing.csv", "median_house_value", "median_income", BINS, LABELS, 0.2, 42,
+                           out_dir=str(tmp_path), **kw)
+
+
+def test_streaming_split_matches_in_memory_strata_and_ignores_chunk_size(tmp_path):
+    info = _split(tmp_path / "a", chunk_rows=5000)
+    X_train, X_test, y_train, y_test = load_split(info["path"], "median_house_value")
+
+    df = load_housing("data/raw/housing.csv")
+    mem = stratified_split(df, "median_house_value", "median_income", BINS, LABELS, 0.2, 42)
+    assert (len(X_train), len(X_test)) == (len(mem[0]), len(mem[1])) == (info["train_rows"], info["test_rows"])
+
+    def counts(X):
+        return pd.cut(X["median_income"], BINS, labels=LABELS).value_counts().sort_index().tolist()
+
+    assert counts(X_train) == counts(mem[0]) == [s["train"] for s in info["strata"].values()]
+    assert counts(X_test) == counts(mem[1])
+    assert len(y_train) == len(X_train) and X_train["ocean_proximity"].dtype == "category"
+
+    other = load_split(_split(tmp_path / "b", chunk_rows=777)["path"], "median_house_value")
+    assert other[0].equals(X_train) and other[3].equals(y_test)
+    assert _split(tmp_path / "a", chunk_rows=5000)["reused"]
+
+
+def test_streaming_split_caps_sizes_proportionally(tmp_path):
+    info = _split(tmp_path, chunk_rows=3000, max_train_rows=1000, max_test_rows=300)
+    assert (info["train_rows"], info["test_rows"]) == (1000, 300)
+    rows = np.array([s["rows"] for s in info["strata"].values()])
+    train = np.array([s["train"] for s in info["strata"].values()])
+    assert np.abs(train - 1000 * rows / rows.sum()).max() <= 1
+
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+from housing_model.drift import DriftMonitor
+from housing_model.profiling import build_training_profile
+from housing_model.schema import validate_records
+from housing_model.sketches import QuantileSketch
+
+
+def test_quantile_sketch_relative_accuracy_and_merge():
+    rng = np.random.default_rng(0)
+    a, b = rng.lognormal(3, 1, 5000), -rng.lognormal(1, 0.5, 5000)
+    sketch, other = QuantileSketch(0.01), QuantileSketch(0.01)
+    sketch.add(a)
+    other.add(b)
+    sketch.merge(other)
+
+    values = np.concatenate([a, b])
+    for q in (0.05, 0.25, 0.75, 0.95):
+        est = sketch.quantile(q)
+        true = np.quantile(values, q)
+        assert abs(est - true) <= 0.02 * abs(true)
+
+
+def test_drift_monitor_reports_window_shift():
+    df = pd.read_csv("data/raw/housing.csv", nrows=1000).drop(columns=["median_house_value"])
+    monitor = DriftMonitor(build_training_profile(df), window_seconds=60, windows=2)
+
+    shifted = df.head(50).assign(median_income=df["median_income"].head(50) * 3)
+    monitor.observe(validate_records(shifted.to_dict(orient="records")))
+    report = monitor.refresh(now=0.0)
+
+    assert report["rows"] == 50
+    assert report["alert"]
+    assert "median_income" in report["alert_columns"]
+    assert monitor.flag() == {"alert": True, "details": "/drift"}
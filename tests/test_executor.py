@@ -0,0 +1,65 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+from housing_model.executor import InferenceExecutor
+from housing_model.forest import compile_forest
+from housing_model.metrics import current_timer, span, start_timer
+from housing_model.pipeline import build_pipeline
+from housing_model.predictor import Predictor
+from housing_model.schema import ValidatedBatch, validate_dataframe
+
+
+def _fitted_pipeline():
+    df = pd.read_csv("data/raw/housing.csv", nrows=2000)
+    y = df.pop("median_house_value")
+    pipe = build_pipeline(random_state=42, n_jobs=-1)
+    pipe.set_params(randomforestregressor__n_estimators=10)
+    pipe.fit(df, y)
+    return pipe, df
+
+
+def test_threads_scale_with_batch_size():
+    pred = Predictor(model=None)
+    assert pred.n_jobs_for(100_000) == 1  # parallelism off by default
+
+    pred.set_parallelism(parallel_min_rows=1000, max_threads=4)
+    assert pred.n_jobs_for(1) == 1
+    assert pred.n_jobs_for(999) == 1
+    assert pred.n_jobs_for(2500) == 2
+    assert pred.n_jobs_for(100_000) == 4
+
+
+def test_parallel_scoring_matches_single_threaded():
+    pipe, df = _fitted_pipeline()
+    batch = ValidatedBatch.from_frame(validate_dataframe(df))
+
+    sk = Predictor(model=pipe)
+    compiled = Predictor(model=pipe, forest=compile_forest(pipe[-1]))
+    expected = compiled.score(batch)
+
+    for pred in (sk, compiled):
+        pred.set_parallelism(parallel_min_rows=500, max_threads=3)
+        assert np.array_equal(pred.score(batch), expected)
+    assert pipe[-1].n_jobs is None  # the training-time n_jobs=-1 no longer applies
+
+
+def test_executor_runs_off_loop_and_keeps_request_context():
+    executor = InferenceExecutor(workers=2, max_threads=1, native_threads=None)
+    executor.start()
+
+    def work(x):
+        with span("forest"):
+            return x * 2, current_timer()
+
+    async def call():
+        timer = start_timer()
+        result, seen = await executor.run(work, 21)
+        return result, seen is timer and "forest" in timer.stages
+
+    try:
+        assert asyncio.run(call()) == (42, True)
+        stats = executor.stats()
+        assert stats["calls"] == 1 and stats["active"] == 0 and stats["workers"] == 2
+    finally:
+        executor.stop()
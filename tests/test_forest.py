@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+from housing_model.pipeline import build_pipeline
+from housing_model.forest import compile_forest
+
+
+def _fitted_pipeline():
+    df = pd.read_csv("data/raw/housing.csv", nrows=2000)
+    y = df.pop("median_house_value")
+    pipe = build_pipeline(random_state=42, n_jobs=1)
+    pipe.set_params(randomforestregressor__n_estimators=10)
+    pipe.fit(df, y)
+    return pipe, df
+
+
+def test_compiled_forest_matches_sklearn_bitwise():
+    pipe, df = _fitted_pipeline()
+    forest = compile_forest(pipe[-1])
+    features = pipe[:-1].transform(df)
+
+    expected = pipe[-1].predict(features)
+    got = forest.predict(features)
+    assert np.array_equal(expected, got)
+
+    # single row
+    assert np.array_equal(pipe[-1].predict(features[:1]), forest.predict(features[:1]))
+
+
+def test_mmap_registry_layout_matches_joblib_model(tmp_path):
+    from pathlib import Path
+    from housing_model.predictor import load_predictor
+    from housing_model.registry import ModelRegistry
+
+    pipe, df = _fitted_pipeline()
+    registry = ModelRegistry(Path(tmp_path))
+    registry.save(pipe, run_id="run1")
+    active = str(registry.set_active("run1"))
+
+    mapped = load_predictor(active, mmap=True)
+    assert mapped.model is None and mapped.run_id == "run1"
+    assert np.array_equal(mapped.predict_df(df)["predictions"], pipe.predict(df))
+
+
+def test_compact_forest_routes_exactly_and_bounds_leaf_error():
+    from housing_model.forest import compact_forest
+
+    pipe, df = _fitted_pipeline()
+    forest = compile_forest(pipe[-1])
+    features = pipe[:-1].transform(df)
+
+    exact = compact_forest(forest)
+    assert exact.threshold.dtype == np.float32 and exact.feature.dtype == np.int8
+    assert np.array_equal(exact.apply(features), forest.apply(features))
+    assert np.array_equal(exact.predict(features), forest.predict(features))
+
+    quantized = compact_forest(forest, max_leaf_error=50.0)
+    assert quantized.value.dtype == np.uint16 and quantized.nbytes < forest.nbytes / 2
+    assert np.abs(quantized.predict(features) - forest.predict(features)).max() <= 50.0
+
+
+def test_compact_registry_layout_loads(tmp_path):
+    from pathlib import Path
+    from housing_model.predictor import load_predictor
+    from housing_model.registry import ModelRegistry
+
+    pipe, df = _fitted_pipeline()
+    registry = ModelRegistry(Path(tmp_path))
+    registry.save(pipe, run_id="run1")
+    assert registry.save_compact(pipe, run_id="run1", max_leaf_error=10.0) is not None
+    active = str(registry.set_active("run1"))
+
+    compact = load_predictor(active, compact=True)
+    assert compact.model is None and compact.forest.compact
+    diff = np.abs(np.asarray(compact.predict_df(df)["predictions"]) - pipe.predict(df))
+    assert diff.max() <= 10.0
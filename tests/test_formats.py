@@ -0,0 +1,31 @@
+import io
+
+import numpy as np
+import pytest
+
+from housing_model.formats import (JSON, NPY, UnsupportedFormat, decode_columns, encode_predictions, loads_json,
+                                   negotiate)
+
+
+def test_negotiate():
+    assert negotiate(None) == JSON
+    assert negotiate("*/*") == JSON
+    assert negotiate("application/x-npy;q=0.9, application/json") == NPY
+    with pytest.raises(UnsupportedFormat):
+        negotiate("text/html")
+
+
+def test_npy_roundtrip():
+    arr = np.array([(1.5, "INLAND"), (2.0, "NEAR BAY")], dtype=[("median_income", "f8"), ("ocean_proximity", "U10")])
+    buf = io.BytesIO()
+    np.save(buf, arr)
+    cols = decode_columns(NPY, buf.getvalue())
+    assert cols["median_income"].tolist() == [1.5, 2.0]
+    assert cols["ocean_proximity"].tolist() == ["INLAND", "NEAR BAY"]
+
+    preds = np.array([1.25, 3.0])
+    content, media = encode_predictions(NPY, preds, {})
+    assert media == NPY and np.array_equal(np.load(io.BytesIO(content)), preds)
+
+    content, media = encode_predictions(JSON, preds, {"drift": None, "latency_ms": 1.0})
+    assert loads_json(content) == {"predictions": [1.25, 3.0], "drift": None, "latency_ms": 1.0}
@@ -0,0 +1,33 @@
+import pytest
+
+from housing_model.metrics import MetricsRegistry, span, start_timer
+from housing_model.schema import SchemaError
+
+
+def test_spans_accumulate_and_pass_exceptions_through():
+    timer = start_timer()
+    with span("validate"):
+        pass
+    with span("validate"):
+        pass
+    with pytest.raises(SchemaError):
+        with span("score"):
+            raise SchemaError("bad", {})
+    assert set(timer.stages) == {"validate", "score"}
+    assert "validate;dur=" in timer.server_timing()
+
+
+def test_prometheus_text_histogram_is_cumulative():
+    reg = MetricsRegistry(buckets=(1.0, 10.0))
+    reg.describe("lat_ms", "histogram", "Latency")
+    for v in (0.5, 5.0, 50.0):
+        reg.observe("lat_ms", v, endpoint="/predict", run_id="r1")
+    reg.inc("req_total", endpoint="/predict", status="200")
+
+    text = reg.render()
+    assert '# TYPE lat_ms histogram' in text
+    assert 'lat_ms_bucket{endpoint="/predict",run_id="r1",le="1.0"} 1' in text
+    assert 'lat_ms_bucket{endpoint="/predict",run_id="r1",le="10.0"} 2' in text
+    assert 'lat_ms_bucket{endpoint="/predict",run_id="r1",le="+Inf"} 3' in text
+    assert 'lat_ms_count{endpoint="/predict",run_id="r1"} 3' in text
+    assert 'req_total{endpoint="/predict",status="200"} 1.0' in text
@@ -1,5 +1,5 @@
 import pandas as pd
-from housing_model.pipeline import make_pipeline
+from housing_model.pipeline import build_pipeline
 
 def test_pipeline_fit_predict_smoke():
     df = pd.DataFrame({
@@ -15,8 +15,7 @@ def test_pipeline_fit_predict_smoke():
     })
     y = pd.Series([100000, 150000])
 
-    pipe = make_pipeline(random_state=42, n_jobs=1)
+    pipe = build_pipeline(random_state=42, n_jobs=1)
     pipe.fit(df, y)
     pred = pipe.predict(df)
     assert len(pred) == 2
-pfs-kafp-wfg
\ No newline at end of file
@@ -0,0 +1,82 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from housing_model.pool import ModelPool, predictor_nbytes
+from housing_model.predictor import Predictor
+
+
+class _Predictor:
+    training_profile = None
+
+    def __init__(self, run_id):
+        self.run_id = run_id
+
+    def score(self, batch):
+        return batch.numeric[:, 5].copy()
+
+
+def test_pool_evicts_least_recently_used_by_bytes_and_count():
+    sizes = {"a": 40, "b": 40, "c": 40, "big": 500}
+    pool = ModelPool(_Predictor, max_bytes=100, max_models=3, sizeof=lambda p: sizes[p.run_id])
+
+    a = pool.get("a")
+    pool.get("b")
+    assert pool.get("a") is a  # hit, "a" becomes most recent
+    pool.get("c")  # 120 bytes > 100: least recently used ("b") goes
+    assert list(pool.loaded()) == ["a", "c"]
+
+    pool.get("big")  # alone over the limit: kept, everything else dropped
+    assert list(pool.loaded()) == ["big"]
+    assert pool.stats()["evictions"] == 3 and pool.stats()["hits"] == 1
+
+
+def test_concurrent_first_requests_share_one_load():
+    calls = []
+
+    def load(run_id):
+        calls.append(run_id)
+        time.sleep(0.1)
+        return _Predictor(run_id)
+
+    pool = ModelPool(load, sizeof=lambda p: 1)
+    got = []
+    threads = [threading.Thread(target=lambda: got.append(pool.get("run2"))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert calls == ["run2"]
+    assert len(got) == 5 and all(p is got[0] for p in got)
+    assert pool.stats()["shared_loads"] == 4
+
+
+def test_failed_load_is_reported_and_retried():
+    attempts = []
+
+    def load(run_id):
+        attempts.append(run_id)
+        if len(attempts) == 1:
+            raise RuntimeError("broken artifact")
+        return _Predictor(run_id)
+
+    pool = ModelPool(load, sizeof=lambda p: 1)
+    with pytest.raises(RuntimeError):
+        pool.get("run2")
+    assert pool.get("run2").run_id == "run2"
+    assert pool.stats()["load_errors"] == 1
+
+
+def test_predictor_nbytes_counts_owned_arrays_only(tmp_path):
+    import joblib
+
+    arr = np.zeros(1000)
+    owned = Predictor(model=None, preprocessing={"w": arr, "again": arr})
+    assert predictor_nbytes(owned) == arr.nbytes
+
+    joblib.dump({"w": arr}, tmp_path / "m.joblib")
+    mapped = joblib.load(tmp_path / "m.joblib", mmap_mode="r")
+    assert predictor_nbytes(Predictor(model=None, preprocessing={"w": np.asarray(mapped["w"])})) == 0
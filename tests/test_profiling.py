@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+from housing_model.profiling import build_training_profile, build_training_profile_chunks
+from housing_model.schema import REQUIRED_NUMERIC
+
+QUANTILES = {"q01": 0.01, "q05": 0.05, "q50": 0.50, "q95": 0.95, "q99": 0.99}
+
+
+def _reference_numeric(df):
+    # the original per-column Series.quantile profile
+    return {
+        col: {"count": int(df[col].notna().sum()), **{k: float(df[col].quantile(q)) for k, q in QUANTILES.items()}}
+        for col in REQUIRED_NUMERIC
+    }
+
+
+def _frame():
+    df = pd.read_csv("data/raw/housing.csv", nrows=5000)
+    df.loc[::13, "total_bedrooms"] = np.nan
+    df.loc[::17, "ocean_proximity"] = np.nan
+    return df
+
+
+def test_profile_matches_series_quantile():
+    df = _frame()
+    profile = build_training_profile(df)
+    expected = _reference_numeric(df)
+
+    for col, stats in expected.items():
+        assert profile["numeric"][col]["count"] == stats["count"]
+        for k in QUANTILES:
+            assert np.isclose(profile["numeric"][col][k], stats[k], rtol=1e-12, atol=0)
+    assert "<<MISSING>>" in profile["categorical"]["ocean_proximity"]
+
+
+def test_chunked_profile_within_sketch_tolerance():
+    df = _frame()
+    exact = build_training_profile(df)
+    streamed = build_training_profile_chunks(df.iloc[i:i + 700] for i in range(0, len(df), 700))
+
+    for col, stats in exact["numeric"].items():
+        assert streamed["numeric"][col]["count"] == stats["count"]
+        values = df[col].dropna().to_numpy()
+        for k, q in QUANTILES.items():
+            # sketches return a sample value, so allow the interpolation gap plus 1%
+            lo, hi = np.quantile(values, q, method="lower"), np.quantile(values, q, method="higher")
+            tol = 0.01 * max(abs(lo), abs(hi))
+            assert lo - tol <= streamed["numeric"][col][k] <= hi + tol
+    for k, v in exact["categorical"]["ocean_proximity"].items():
+        assert np.isclose(streamed["categorical"]["ocean_proximity"][k], v)
@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+
+from housing_model.reload import ModelReloader
+
+
+class _Predictor:
+    training_profile = None
+
+    def __init__(self, run_id):
+        self.run_id = run_id
+        self.rows_scored = 0
+
+    def score(self, batch):
+        self.rows_scored += len(batch)
+        return batch.numeric[:, 5].copy()
+
+
+def _point(tmp_path, run_id):
+    (tmp_path / f"{run_id}.joblib").write_text(run_id)
+    link = tmp_path / "active.tmp"
+    os.symlink(f"{run_id}.joblib", link)
+    os.replace(link, tmp_path / "active")
+
+
+def test_reload_swaps_only_on_change_and_keeps_old_model_on_failure(tmp_path):
+    active = tmp_path / "active"
+    fail = {"on": False}
+
+    def load():
+        if fail["on"]:
+            raise RuntimeError("broken artifact")
+        return _Predictor(os.path.basename(os.path.realpath(active)).split(".")[0])
+
+    swapped = []
+    reloader = ModelReloader(load, str(active), poll_seconds=0, on_swap=swapped.append)
+    assert not reloader.reload()
+    assert reloader.current is None and "not found" in reloader.info["last_error"]
+
+    _point(tmp_path, "run1")
+    assert reloader.reload()
+    assert reloader.current.run_id == "run1"
+    assert reloader.current.rows_scored > 0  # warmed up before the swap
+    assert not reloader.reload()
+
+    _point(tmp_path, "run2")
+    fail["on"] = True
+    assert not reloader.reload()
+    assert reloader.current.run_id == "run1"
+
+    fail["on"] = False
+    assert reloader.reload()
+    assert [p.run_id for p in swapped] == ["run1", "run2"]
+    assert reloader.info["reloads"] == 1
+    assert reloader.info["previous_run_id"] == "run1"
+
+
+def test_racing_reloads_leave_listeners_on_the_current_model(tmp_path):
+    _point(tmp_path, "run1")
+    loads = []
+
+    def load():
+        loads.append(len(loads) + 1)
+        return _Predictor(f"gen{len(loads)}")
+
+    state = {}
+    first_swap = threading.Event()
+
+    def listener(pred):
+        if pred.run_id == "gen1":
+            first_swap.set()
+            time.sleep(0.1)  # a slow listener for the older swap
+        state["pred"] = pred
+
+    reloader = ModelReloader(load, str(tmp_path / "active"), poll_seconds=0, on_swap=listener)
+    first = threading.Thread(target=reloader.reload, kwargs={"force": True})
+    first.start()
+    first_swap.wait(5)
+    second = threading.Thread(target=reloader.reload, kwargs={"force": True})
+    second.start()
+    first.join()
+    second.join()
+
+    assert reloader.current.run_id == "gen2"
+    assert state["pred"] is reloader.current
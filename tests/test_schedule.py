@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.neighbors import KNeighborsRegressor
+
+from housing_model.pipeline import build_pipeline
+from housing_model.schedule import CoreScheduler, available_cores, resolve_cores
+from housing_model.search import CachedGridSearch
+
+GRID = {"randomforestregressor__n_estimators": [5, 10], "randomforestregressor__max_depth": [4, None]}
+
+
+def test_budget_is_split_between_outer_fits_and_model_threads():
+    forest = RandomForestRegressor()
+    assert CoreScheduler(cores=8).plan(3, forest) == (3, 2, "threads")
+    assert CoreScheduler(cores=8).plan(20, forest) == (8, 1, "threads")
+    assert CoreScheduler(cores=8, outer_jobs=2).plan(20, forest) == (2, 4, "threads")
+    assert CoreScheduler(cores=8).plan(1, forest) == (1, 8, "sequential")
+    assert CoreScheduler(cores=8).plan(4, KNeighborsRegressor()) == (4, 2, "processes")
+    assert CoreScheduler().plan(12, forest) == (1, None, "sequential")
+    with pytest.raises(ValueError, match="backend"):
+        CoreScheduler(cores=2, backend="gpu")
+
+
+def test_resolve_cores_follows_n_jobs_and_caps_at_available():
+    n = available_cores()
+    assert resolve_cores(None, -1) == n
+    assert resolve_cores(None, 1) == 1
+    assert resolve_cores(n + 10) == n
+
+
+@pytest.mark.parametrize("backend", ["threads", "processes"])
+def test_parallel_search_matches_sequential_scores(backend):
+    df = pd.read_csv("data/raw/housing.csv", nrows=1000)
+    y = df.pop("median_house_value")
+    pipe = build_pipeline(random_state=0, n_jobs=1)
+
+    def scores(gs):
+        return sorted(r["mean_test_score"] for r in gs.cv_results_)
+
+    sequential = CachedGridSearch(pipe, GRID, cv=3, scoring="neg_mean_squared_error").fit(df, y)
+    scheduler = CoreScheduler(cores=4, backend=backend)
+    parallel = CachedGridSearch(pipe, GRID, cv=3, scoring="neg_mean_squared_error", warm_start=True,
+                                scheduler=scheduler).fit(df, y)
+
+    assert np.allclose(scores(parallel), scores(sequential), rtol=0, atol=1e-6)
+    assert parallel.best_params_ == sequential.best_params_
+    assert parallel.best_estimator_[-1].n_jobs == 4  # the refit gets the whole budget
+    stats = scheduler.stats()
+    assert stats["tasks"] == 6 and stats["plans"] == {f"{backend} 4x1": 6} and stats["core_efficiency"] > 0
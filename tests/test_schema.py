@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+from housing_model.schema import (
+    REQUIRED_NUMERIC, SchemaError, ValidatedBatch, validate_columns, validate_dataframe, validate_records,
+)
+
+RECORD = {
+    "longitude": -122.23,
+    "latitude": 37.88,
+    "housing_median_age": 41,
+    "total_rooms": 880,
+    "total_bedrooms": 129,
+    "population": 322,
+    "households": 126,
+    "median_income": 8.3252,
+    "ocean_proximity": "NEAR BAY",
+}
+
+
+def _error(fn, *args, **kwargs):
+    with pytest.raises(SchemaError) as e:
+        fn(*args, **kwargs)
+    return e.value.message, e.value.details
+
+
+def test_validate_records_matches_dataframe():
+    records = [
+        RECORD,
+        {**RECORD, "total_bedrooms": None, "ocean_proximity": "SOMEWHERE"},
+        {**RECORD, "population": "1200", "median_income": "n/a", "ocean_proximity": None},
+    ]
+    batch = validate_records(records)
+    expected = validate_dataframe(pd.DataFrame(records))
+
+    assert np.array_equal(batch.numeric, expected[REQUIRED_NUMERIC].to_numpy(float), equal_nan=True)
+    assert batch.numeric.flags.f_contiguous
+    assert batch.category_values()[0] == "NEAR BAY"
+    assert batch.category_values()[1] == "SOMEWHERE"
+    assert pd.isna(batch.category_values()[2])
+    assert np.array_equal(ValidatedBatch.from_frame(expected).codes, batch.codes)
+
+
+@pytest.mark.parametrize("records, kwargs", [
+    ([], {}),
+    ([{k: v for k, v in RECORD.items() if k != "households"}], {}),
+    ([{**RECORD, "extra": 1}], {}),
+    ([{**RECORD, "population": "abc"}], {}),
+    ([{**RECORD, "ocean_proximity": "MOON"}], {"strict_categories": True}),
+])
+def test_validate_records_errors_match_dataframe(records, kwargs):
+    assert _error(validate_records, records, **kwargs) == _error(
+        validate_dataframe, pd.DataFrame(records), **kwargs)
+
+
+def test_validate_columns_matches_records():
+    records = [
+        RECORD,
+        {**RECORD, "total_bedrooms": None, "ocean_proximity": "SOMEWHERE"},
+        {**RECORD, "population": "1200", "ocean_proximity": None},
+        {**RECORD, "ocean_proximity": "SOMEWHERE"},
+    ]
+    columns = {c: [r[c] for r in records] for c in RECORD}
+    expected = validate_records(records)
+    for cols in (columns, {c: np.asarray(v) for c, v in columns.items()}):
+        batch = validate_columns(cols)
+        assert np.array_equal(batch.numeric, expected.numeric, equal_nan=True)
+        assert np.array_equal(batch.codes, expected.codes)
+        assert batch.categories == expected.categories
+
+    assert _error(validate_columns, {**columns, "extra": [1] * 4}) == _error(
+        validate_records, [{**r, "extra": 1} for r in records])
+    assert _error(validate_columns, {**columns, "population": [1]})[0] == "Columns have different lengths."
@@ -0,0 +1,73 @@
+import json
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from housing_model.pipeline import build_pipeline
+from housing_model.schema import SchemaError
+from housing_model.score import score_file
+
+
+def test_score_file_streams_in_input_order(tmp_path):
+    df = pd.read_csv("data/raw/housing.csv", nrows=300)
+    y = df.pop("median_house_value")
+    pipe = build_pipeline(random_state=42, n_jobs=1)
+    pipe.set_params(randomforestregressor__n_estimators=5)
+    pipe.fit(df, y)
+    joblib.dump(pipe, tmp_path / "model.joblib")
+
+    df.to_json(tmp_path / "in.jsonl", orient="records", lines=True)
+    summary = score_file(str(tmp_path / "in.jsonl"), str(tmp_path / "out.csv"),
+                         str(tmp_path / "model.joblib"), chunksize=64)
+
+    out = pd.read_csv(tmp_path / "out.csv")
+    assert summary["rows"] == len(df) == len(out)
+    assert np.allclose(out["prediction"], pipe.predict(df))
+
+
+def _mixed_jsonl(tmp_path):
+    # chunk 1 (50 rows): integral numbers as JSON ints, "note" all null; later chunks: floats and strings
+    df = pd.read_csv("data/raw/housing.csv", nrows=150)
+    y = df.pop("median_house_value")
+    pipe = build_pipeline(random_state=42, n_jobs=1).set_params(randomforestregressor__n_estimators=5)
+    pipe.fit(df, y)
+    joblib.dump(pipe, tmp_path / "model.joblib")
+    with open(tmp_path / "in.jsonl", "w", encoding="utf-8") as f:
+        for i, record in enumerate(df.to_dict(orient="records")):
+            if i < 50:
+                record = {k: int(v) if isinstance(v, float) and v.is_integer() else v for k, v in record.items()}
+            record.update(units=i if i < 50 else i + 0.5, note=None if i < 50 else f"n{i}")
+            if i >= 100:
+                record = {"late": 1, **record}  # not in the first chunk, and placed first
+            f.write(json.dumps(record) + "\n")
+    return df, pipe
+
+
+@pytest.mark.parametrize("suffix", ["csv", "parquet"])
+def test_mixed_int_float_jsonl_chunks_keep_one_layout(tmp_path, suffix):
+    if suffix == "parquet":
+        pytest.importorskip("pyarrow")
+    df, pipe = _mixed_jsonl(tmp_path)
+    out_path = tmp_path / f"out.{suffix}"
+    score_file(str(tmp_path / "in.jsonl"), str(out_path), str(tmp_path / "model.joblib"), chunksize=50)
+
+    out = pd.read_csv(out_path) if suffix == "csv" else pd.read_parquet(out_path)
+    assert list(out.columns) == [*df.columns, "units", "note", "prediction"]
+    assert out["units"].dtype == "float64" and out["units"].iloc[60] == 60.5
+    assert out["note"].isna().sum() == 50 and out["note"].iloc[-1] == "n149"
+    assert np.allclose(out["prediction"], pipe.predict(df))
+
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_schema_errors_reach_the_caller_from_worker_processes(tmp_path, workers):
+    df = pd.read_csv("data/raw/housing.csv", nrows=100)
+    y = df.pop("median_house_value")
+    pipe = build_pipeline(random_state=42, n_jobs=1).set_params(randomforestregressor__n_estimators=5)
+    joblib.dump(pipe.fit(df, y), tmp_path / "model.joblib")
+    df.drop(columns="households").to_csv(tmp_path / "in.csv", index=False)
+
+    with pytest.raises(SchemaError, match="households"):
+        score_file(str(tmp_path / "in.csv"), str(tmp_path / "out.csv"), str(tmp_path / "model.joblib"),
+                   chunksize=50, workers=workers)
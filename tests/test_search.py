@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import GridSearchCV, cross_val_score
+
+from housing_model.pipeline import build_pipeline
+from housing_model.search import CachedGridSearch, FoldCache, cross_val_score_cached, oob_score_cached
+
+GRID = {"randomforestregressor__n_estimators": [5, 10], "randomforestregressor__max_depth": [4, None]}
+
+
+def _data():
+    df = pd.read_csv("data/raw/housing.csv", nrows=600)
+    y = df.pop("median_house_value")
+    return df, y
+
+
+def test_cached_grid_search_matches_gridsearchcv():
+    X, y = _data()
+    pipe = build_pipeline(random_state=42, n_jobs=1)
+    cache = FoldCache()
+
+    sanity = cross_val_score_cached(pipe, X, y, cv=3, scoring="neg_root_mean_squared_error", cache=cache)
+    expected = cross_val_score(pipe, X, y, cv=3, scoring="neg_root_mean_squared_error")
+    assert np.allclose(sanity, expected)
+
+    ours = CachedGridSearch(pipe, GRID, cv=3, scoring="neg_mean_squared_error", cache=cache).fit(X, y)
+    ref = GridSearchCV(pipe, GRID, cv=3, scoring="neg_mean_squared_error").fit(X, y)
+    assert ours.best_params_ == ref.best_params_
+    assert np.isclose(ours.best_score_, ref.best_score_)
+    assert np.allclose(ours.best_estimator_.predict(X), ref.best_estimator_.predict(X))
+
+    # 3 folds fitted once, then reused by 4 candidates
+    assert cache.stats()["fits"] == 3
+    assert cache.stats()["hits"] == 12
+
+
+def test_preprocessing_params_get_their_own_cache_entries():
+    X, y = _data()
+    pipe = build_pipeline(random_state=42, n_jobs=1)
+    cache = FoldCache()
+    grid = {"columntransformer__remainder__simpleimputer__strategy": ["median", "mean"],
+            "randomforestregressor__n_estimators": [5]}
+    CachedGridSearch(pipe, grid, cv=2, scoring="neg_mean_squared_error", cache=cache).fit(X, y)
+    assert cache.stats()["fits"] == 4
+
+
+def test_warm_start_matches_exhaustive_scores():
+    X, y = _data()
+    pipe = build_pipeline(random_state=42, n_jobs=1)
+    cold = CachedGridSearch(pipe, GRID, cv=3, scoring="neg_mean_squared_error").fit(X, y)
+    warm = CachedGridSearch(pipe, GRID, cv=3, scoring="neg_mean_squared_error", warm_start=True).fit(X, y)
+
+    assert warm.best_params_ == cold.best_params_
+    assert np.isclose(warm.best_score_, cold.best_score_)
+    by_params = {repr(sorted(r["params"].items())): r["mean_test_score"] for r in cold.cv_results_}
+    for r in warm.cv_results_:
+        assert np.isclose(r["mean_test_score"], by_params[repr(sorted(r["params"].items()))])
+
+
+def test_halving_narrows_candidates():
+    X, y = _data()
+    pipe = build_pipeline(random_state=42, n_jobs=1)
+    grid = {"randomforestregressor__n_estimators": [5, 10, 20],
+            "randomforestregressor__max_depth": [3, 6, None]}
+
+    rows = CachedGridSearch(pipe, grid, cv=3, scoring="neg_mean_squared_error",
+                            strategy="halving", warm_start=True).fit(X, y)
+    assert [r["n_resources"] for r in rows.cv_results_] == [len(y) // 9] * 9 + [len(y) // 3] * 3 + [len(y)]
+    assert set(rows.best_params_) == set(grid)
+
+    trees = CachedGridSearch(pipe, grid, cv=3, scoring="neg_mean_squared_error",
+                             strategy="halving", resource="n_estimators", warm_start=True).fit(X, y)
+    assert [r["n_resources"] for r in trees.cv_results_] == [5, 5, 5, 10, 20]
+    assert trees.best_params_["randomforestregressor__n_estimators"] == 20
+    assert trees.best_estimator_[-1].n_estimators == 20
+
+
+def test_oob_scores_match_sklearn_and_fit_each_candidate_once():
+    X, y = _data()
+    pipe = build_pipeline(random_state=42, n_jobs=1).set_params(randomforestregressor__n_estimators=40)
+    cache = FoldCache()
+
+    score, fitted = oob_score_cached(pipe, X, y, scoring="r2", cache=cache)
+    ref = pipe.set_params(randomforestregressor__oob_score=True).fit(X, y)
+    assert np.isclose(score, ref[-1].oob_score_)
+    assert np.allclose(fitted.predict(X), ref.predict(X))
+
+    grid = {"randomforestregressor__n_estimators": [20, 40], "randomforestregressor__max_depth": [4, None]}
+    cold = CachedGridSearch(pipe, grid, cv=3, scoring="neg_mean_squared_error", evaluation="oob").fit(X, y)
+    warm = CachedGridSearch(pipe, grid, cv=3, scoring="neg_mean_squared_error", evaluation="oob",
+                            warm_start=True).fit(X, y)
+    assert cold.evaluation_ == "oob" and len(cold.cv_results_) == 4
+    assert all(r["evaluation"] == "oob" for r in cold.cv_results_)
+    assert np.allclose([s for _, s in cold.ranked_], [s for _, s in warm.ranked_])
+    assert cold.oob_scores_ == [s for _, s in cold.ranked_]
+    assert cache.stats()["fits"] == 1  # preprocessing fitted once on all rows
+
+    both = CachedGridSearch(pipe, grid, cv=3, scoring="neg_mean_squared_error", evaluation="both").fit(X, y)
+    cv = CachedGridSearch(pipe, grid, cv=3, scoring="neg_mean_squared_error").fit(X, y)
+    assert both.best_params_ == cv.best_params_
+    assert len(both.oob_scores_) == len(both.ranked_)
+
+
+
+def test_oob_search_keeps_the_best_candidates_forest_instead_of_refitting():
+    X, y = _data()
+    pipe = build_pipeline(random_state=42, n_jobs=1)
+    grid = {"randomforestregressor__n_estimators": [10, 20], "randomforestregressor__max_depth": [4, None]}
+    for warm_start in (False, True):
+        gs = CachedGridSearch(pipe, grid, cv=3, scoring="r2", evaluation="oob", warm_start=warm_start).fit(X, y)
+        forest = gs.best_estimator_[-1]
+        # a refit of the pipeline would have no OOB attributes; the kept forest scored best_score_
+        assert forest.oob_score and np.isclose(forest.oob_score_, gs.best_score_)
+        assert not forest.warm_start and len(forest.estimators_) == gs.best_params_["randomforestregressor__n_estimators"]
+        ref = build_pipeline(random_state=42, n_jobs=1).set_params(**gs.best_params_).fit(X, y)
+        assert np.allclose(gs.best_estimator_.predict(X), ref.predict(X))
@@ -0,0 +1,109 @@
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+from fastapi.testclient import TestClient
+
+from housing_model.pipeline import build_pipeline
+from housing_model.predictor import load_predictor
+from housing_model.registry import ModelRegistry
+from housing_model.train import save_serving_artifact
+
+
+def _registry(tmp_path):
+    df = pd.read_csv("data/raw/housing.csv", nrows=1000)
+    y = df.pop("median_house_value")
+    pipe = build_pipeline(random_state=42, n_jobs=1).set_params(randomforestregressor__n_estimators=5)
+    pipe.fit(df, y)
+    registry = ModelRegistry(Path(tmp_path))
+    registry.save(pipe, run_id="run1")
+    assert save_serving_artifact(registry, pipe, "run1", None) is not None
+    return registry, str(registry.set_active("run1")), pipe, df
+
+
+def test_service_import_defers_pandas_and_sklearn():
+    code = "import sys, housing_model.service; print('pandas' in sys.modules, 'sklearn' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ["False", "False"]
+
+
+def test_serving_artifact_matches_pipeline(tmp_path):
+    _, active, pipe, df = _registry(tmp_path)
+    pred = load_predictor(active, serving=True, mmap=True)
+    assert pred.model is None and pred.engine == "compiled" and pred.transform_engine == "compiled"
+    assert np.array_equal(pred.predict_df(df)["predictions"], pipe.predict(df))
+
+
+def test_health_answers_while_model_loads_in_background(tmp_path, monkeypatch):
+    import housing_model.service as service
+
+    _, active, _, df = _registry(tmp_path)
+    cfg = yaml.safe_load(Path("configs/serve.yaml").read_text(encoding="utf-8"))
+    cfg["artifacts"].update(model_path=active, training_profile_path=None)
+    cfg["startup"] = {"background_load": True}
+    cfg["reload"] = {"poll_seconds": 0}
+    monkeypatch.setattr(service, "_load_serve_cfg", lambda: cfg)
+
+    release = threading.Event()
+    make_loader = service._make_loader
+
+    def slow_loader(serve_cfg):
+        load = make_loader(serve_cfg)
+        return lambda *a: release.wait(5) and load(*a)
+
+    monkeypatch.setattr(service, "_make_loader", slow_loader)
+    body = {"records": df.head(2).to_dict(orient="records")}
+    with TestClient(service.app) as client:
+        assert client.get("/health").status_code == 200
+        assert client.get("/ready").status_code == 503
+        assert client.post("/predict", json=body).status_code == 503
+
+        release.set()
+        for _ in range(500):
+            r = client.get("/ready")
+            if r.status_code == 200:
+                break
+            time.sleep(0.01)
+        assert r.status_code == 200 and r.json()["run_id"] == "run1"
+        assert r.json()["ready_seconds"] >= r.json()["load_seconds"]
+        assert client.post("/predict", json=body).status_code == 200
+
+
+def test_null_max_threads_resolves_the_same_for_predictor_and_executor(tmp_path, monkeypatch):
+    import housing_model.executor as executor_module
+    import housing_model.service as service
+    from housing_model.executor import InferenceExecutor
+
+    monkeypatch.setattr(executor_module.os, "cpu_count", lambda: 8)
+
+    _, active, _, _ = _registry(tmp_path)
+    cfg = yaml.safe_load(Path("configs/serve.yaml").read_text(encoding="utf-8"))
+    cfg["artifacts"].update(model_path=active, training_profile_path=None)
+    cfg["inference"]["max_threads"] = None
+
+    pred = service._make_loader(cfg)()
+    executor = InferenceExecutor(max_threads=service.resolve_max_threads(cfg["inference"]["max_threads"]))
+    assert pred.max_threads == executor.max_threads == InferenceExecutor(max_threads=None).max_threads == 8
+
+
+def test_failed_pinned_run_load_hides_the_cause_from_clients(tmp_path, monkeypatch):
+    import housing_model.service as service
+
+    registry, active, _, df = _registry(tmp_path)
+    registry.model_path("run2").write_bytes(b"not a joblib file")
+    cfg = yaml.safe_load(Path("configs/serve.yaml").read_text(encoding="utf-8"))
+    cfg["artifacts"].update(model_path=active, training_profile_path=None, serving=False)
+    cfg["reload"] = {"poll_seconds": 0}
+    cfg["pool"] = {"enabled": True}
+    monkeypatch.setattr(service, "_load_serve_cfg", lambda: cfg)
+
+    body = {"records": df.head(2).to_dict(orient="records")}
+    with TestClient(service.app) as client:
+        r = client.post("/predict", params={"run_id": "run2"}, json=body)
+    assert r.status_code == 503
+    assert r.json()["detail"] == "Model run2 could not be loaded"
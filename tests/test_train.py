@@ -0,0 +1,111 @@
+import dataclasses
+
+import pandas as pd
+import pytest
+
+from housing_model.config import load_config
+from housing_model.pipeline import MODEL_TYPES, build_pipeline
+from housing_model.search import FoldCache
+from housing_model.train import search_backend, train_and_select
+
+GRID = {"randomforestregressor__n_estimators": [5, 10], "histgradientboostingregressor__max_iter": [20],
+        "ridge__alpha": [1.0]}
+
+
+def _data():
+    df = pd.read_csv("data/raw/housing.csv", nrows=600)
+    y = df.pop("median_house_value")
+    return df, y
+
+
+def _cfg(**model):
+    cfg = load_config("configs/train.yaml")
+    return dataclasses.replace(
+        cfg,
+        model=dataclasses.replace(cfg.model, n_jobs=1, latency_batch_rows=50, **model),
+        grid=dataclasses.replace(cfg.grid, cv=2, param_grid=GRID, strategy="exhaustive"),
+    )
+
+
+def test_model_type_selects_backend():
+    steps = [build_pipeline(random_state=0, n_jobs=1, model_type=t).steps[-1][0] for t in MODEL_TYPES]
+    assert steps == ["randomforestregressor", "histgradientboostingregressor", "ridge"]
+    with pytest.raises(ValueError, match="Unknown model.type"):
+        build_pipeline(random_state=0, n_jobs=1, model_type="xgboost")
+
+
+def test_backends_report_latency_and_size_and_best_is_selected():
+    X, y = _data()
+    model, meta = train_and_select(_cfg(type="linear", compare=("random_forest", "hist_gradient_boosting")), X, y)
+
+    assert set(meta["backends"]) == {"linear", "random_forest", "hist_gradient_boosting"}
+    for model_type, report in meta["backends"].items():
+        assert report["cv_rmse"] > 0 and report["artifact_bytes"] > 0
+        assert {"rows_1", "rows_50"} == set(report["latency_ms"])
+        # only the backend's own keys were searched
+        step = build_pipeline(0, 1, model_type=model_type).steps[-1][0]
+        assert report["params"] and all(k.startswith(step + "__") for k in report["params"])
+    best = max(meta["backends"], key=lambda t: meta["backends"][t]["cv_score"])
+    assert meta["model_type"] == best
+    assert model.steps[-1][0] == build_pipeline(0, 1, model_type=best).steps[-1][0]
+
+
+def test_latency_budget_rejects_slow_candidates():
+    X, y = _data()
+    model, report = search_backend(_cfg(latency_budget_ms=1e-6), "random_forest", X, y, FoldCache())
+    assert model is None and len(report["rejected"]) == 2
+
+    with pytest.raises(ValueError, match="latency budget"):
+        train_and_select(_cfg(type="random_forest", compare=(), latency_budget_ms=1e-6), X, y)
+
+
+def test_oob_evaluation_records_oob_next_to_cv():
+    X, y = _data()
+    cfg = _cfg(type="random_forest", compare=("linear",))
+    rf_grid = {"randomforestregressor__n_estimators": [20, 40], "ridge__alpha": [1.0]}
+
+    _, both = train_and_select(dataclasses.replace(cfg, grid=dataclasses.replace(
+        cfg.grid, param_grid=rf_grid, evaluation="both")), X, y)
+    forest = both["backends"]["random_forest"]
+    assert forest["evaluation"] == "both" and forest["cv_rmse"] > 0 and forest["oob_rmse"] > 0
+    assert both["sanity_cv_rmse_mean"] > 0 and both["sanity_oob_rmse"] > 0
+    assert both["backends"]["linear"]["evaluation"] == "cv"  # no out-of-bag rows for Ridge
+
+    # other backends only have CV scores to compare with: everything is selected on CV
+    _, mixed = train_and_select(dataclasses.replace(cfg, grid=dataclasses.replace(
+        cfg.grid, param_grid=rf_grid, evaluation="oob")), X, y)
+    assert mixed["backends"]["random_forest"]["evaluation"] == "both"
+    assert all(r["score"] == r["cv_score"] for r in mixed["backends"].values())
+
+    _, oob = train_and_select(dataclasses.replace(cfg, model=dataclasses.replace(cfg.model, compare=()),
+                                                  grid=dataclasses.replace(cfg.grid, param_grid=rf_grid,
+                                                                           evaluation="oob")), X, y)
+    assert "sanity_cv_rmse_mean" not in oob and oob["sanity_oob_rmse"] > 0
+    assert oob["backends"]["random_forest"]["cv_score"] is None
+    assert oob["backends"]["random_forest"]["rmse"] == oob["backends"]["random_forest"]["oob_rmse"]
+
+
+
+def test_oob_sanity_score_comes_from_the_grids_default_candidate(monkeypatch):
+    import housing_model.train as train
+
+    X, y = _data()
+    cfg = _cfg(type="random_forest", compare=())
+    grid = dataclasses.replace(cfg.grid, scoring="neg_root_mean_squared_error", evaluation="oob",
+                               param_grid={"randomforestregressor__n_estimators": [20, 100]})
+    fits = []
+    real = train.oob_score_cached
+
+    def counted(*args, **kwargs):
+        fits.append(1)
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(train, "oob_score_cached", counted)
+
+    _, meta = train_and_select(dataclasses.replace(cfg, grid=grid), X, y)
+    assert fits == []  # n_estimators=100 is the default: no extra sanity fit
+    assert meta["sanity_oob_rmse"] > 0
+
+    grid = dataclasses.replace(grid, param_grid={"randomforestregressor__n_estimators": [20, 40]})
+    _, meta = train_and_select(dataclasses.replace(cfg, grid=grid), X, y)
+    assert fits == [1] and meta["sanity_oob_rmse"] > 0